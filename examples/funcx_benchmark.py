@@ -0,0 +1,69 @@
+import json
+import argparse
+
+from appfl.funcx.benchmark import run_benchmark, format_report
+
+"""
+Measure the overheads of the funcX path with local endpoints (process pools) instead of the funcX service.
+
+python funcx_benchmark.py --num_clients=4 --num_rounds=5 --model_size=1000000 --latency 0.05 0.05 0.05 0.5
+"""
+
+""" read arguments """
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('--num_clients', type=int, default=4)
+parser.add_argument('--num_rounds', type=int, default=5)
+## approximate number of parameters of the linear model trained by the clients
+parser.add_argument('--model_size', type=int, default=100000)
+
+## endpoints: one latency/bandwidth for all, or one per client
+parser.add_argument('--num_workers', type=int, default=1)
+parser.add_argument('--latency', type=float, nargs='+', default=[0.0])
+## bytes per second (0: unlimited)
+parser.add_argument('--bandwidth', type=float, nargs='+', default=[0.0])
+
+## server
+parser.add_argument('--streaming_aggregation', action='store_true')
+parser.add_argument('--model_store', type=str, default="")
+parser.add_argument('--asynchronous', action='store_true')
+## updates returned by the endpoints: "" (local states), "float32", "float16" or "quantized" flat deltas
+parser.add_argument('--update_encoding', type=str, default="")
+parser.add_argument('--update_compression', type=str, default="")
+parser.add_argument('--update_to_store', action='store_true')
+
+parser.add_argument('--json', type=str, default="")
+
+args = parser.parse_args()
+
+
+def per_client(values):
+    return values[0] if len(values) == 1 else values
+
+
+def main():
+    report = run_benchmark(
+        args.num_clients,
+        num_rounds=args.num_rounds,
+        model_size=args.model_size,
+        num_workers=args.num_workers,
+        latency=per_client(args.latency),
+        bandwidth=per_client(args.bandwidth),
+        server={
+            "streaming_aggregation": args.streaming_aggregation,
+            "model_store": args.model_store,
+            "update_encoding": args.update_encoding,
+            "update_compression": args.update_compression,
+            "update_to_store": args.update_to_store,
+        },
+        config={"asynchronous": {"enable": args.asynchronous}},
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
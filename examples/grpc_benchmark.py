@@ -0,0 +1,57 @@
+import json
+import argparse
+
+from appfl.protos.benchmark import run_benchmark, format_report
+
+"""
+Measure how many clients a local gRPC server sustains, with fake clients uploading synthetic results.
+
+python grpc_benchmark.py --num_clients=100 --num_rounds=5 --model_size=1000000
+"""
+
+""" read arguments """
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument('--num_clients', type=int, default=10)
+parser.add_argument('--num_rounds', type=int, default=5)
+## number of float32 parameters of the synthetic model, and of tensors they are split into
+parser.add_argument('--model_size', type=int, default=1000000)
+parser.add_argument('--num_tensors', type=int, default=10)
+## processes running the fake clients (0: threads of this process)
+parser.add_argument('--client_processes', type=int, default=0)
+
+## server
+parser.add_argument('--port', type=int, default=50061)
+parser.add_argument('--use_aio', action='store_true')
+parser.add_argument('--long_poll_timeout', type=float, default=30.0)
+## 0: upload results in a single SendLearningResults stream
+parser.add_argument('--upload_retries', type=int, default=5)
+
+parser.add_argument('--json', type=str, default="")
+
+args = parser.parse_args()
+
+
+def main():
+    report = run_benchmark(
+        args.num_clients,
+        num_rounds=args.num_rounds,
+        model_size=args.model_size,
+        num_tensors=args.num_tensors,
+        client_processes=args.client_processes,
+        port=args.port,
+        server={
+            "use_aio": args.use_aio,
+            "long_poll_timeout": args.long_poll_timeout,
+            "upload_retries": args.upload_retries,
+        },
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,13 @@ parser.add_argument('--server_lr', type=float, required=False)
 parser.add_argument('--mparam_1', type=float, required=False)    
 parser.add_argument('--mparam_2', type=float, required=False)    
 parser.add_argument('--adapt_param', type=float, required=False)    
+
+## quantization of model updates (0: full precision, 2/4/8 bits)
+parser.add_argument('--quantization_bits', type=int, default=0)
+
+## clients on the host of the server exchange models through shared memory (and a Unix domain socket)
+parser.add_argument('--shared_memory', action='store_true')
+parser.add_argument('--uds_path', type=str, default="")
  
 args = parser.parse_args()    
 
@@ -137,6 +144,15 @@ def main():
     cfg.fed.servername = args.server
     cfg.num_epochs = args.num_epochs
 
+    ## quantization
+    if args.quantization_bits > 0:
+        cfg.quantization.enable = True
+        cfg.quantization.bits = args.quantization_bits
+
+    ## local transport
+    cfg.server.use_shared_memory = args.shared_memory
+    cfg.server.uds_path = args.uds_path
+
     ## outputs        
 
     cfg.output_dirname = "./outputs_%s_%s_%s"%(args.dataset, args.server, args.client_optimizer)     
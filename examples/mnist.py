@@ -45,6 +45,9 @@ parser.add_argument("--mparam_1", type=float, required=False)
 parser.add_argument("--mparam_2", type=float, required=False)
 parser.add_argument("--adapt_param", type=float, required=False)
 
+## quantization of model updates (0: full precision, 2/4/8 bits)
+parser.add_argument("--quantization_bits", type=int, default=0)
+
 
 args = parser.parse_args()
 
@@ -136,6 +139,11 @@ def main():
     cfg.fed.servername = args.server
     cfg.num_epochs = args.num_epochs
 
+    ## quantization
+    if args.quantization_bits > 0:
+        cfg.quantization.enable = True
+        cfg.quantization.bits = args.quantization_bits
+
     ## outputs
 
     cfg.use_tensorboard = False
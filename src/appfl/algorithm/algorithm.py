@@ -22,6 +22,17 @@ class BaseServer:
         device (str): device for computation
     """
 
+    ## Attributes carried across rounds, saved by ``state_dict`` along with the model
+    checkpoint_attributes = (
+        "weights",
+        "penalty",
+        "prim_res",
+        "dual_res",
+        "dual_states",
+        "primal_states_curr",
+        "is_first_iter",
+    )
+
     def __init__(
         self, weights: OrderedDict, model: nn.Module, loss_fn: nn.Module, num_clients: int, device
     ):
@@ -56,6 +67,21 @@ class BaseServer:
         for key, value in weights.items():
             self.weights[key] = value
 
+    def state_dict(self) -> OrderedDict:
+        """Copy of the model and the states of the algorithm, from which the server can resume."""
+        state = OrderedDict()
+        state["model"] = copy.deepcopy(self.model.state_dict())
+        for name in self.checkpoint_attributes:
+            if hasattr(self, name):
+                state[name] = copy.deepcopy(getattr(self, name))
+        return state
+
+    def load_state_dict(self, state: OrderedDict):
+        self.model.load_state_dict(state["model"])
+        for name in self.checkpoint_attributes:
+            if name in state:
+                setattr(self, name, state[name])
+
     def primal_recover_from_local_states(self, local_states):
         for _, states in enumerate(local_states):
             if states is not None:
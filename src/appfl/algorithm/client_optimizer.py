@@ -35,8 +35,13 @@ class ClientOptim(BaseClient):
         optimizer = eval(self.optim)(self.model.parameters(), **self.optim_args)
 
         """ Multiple local update """
+        ## With a budget of local steps (e.g., set per client by the funcX server), the epochs end after it
+        num_local_epochs = self.num_local_epochs
+        if self.num_local_steps > 0:
+            num_local_epochs = -(-self.num_local_steps // len(self.dataloader))
+        num_steps = 0
         start_time=time.time()
-        for t in range(self.num_local_epochs):
+        for t in range(num_local_epochs):
 
             if self.cfg.validation == True and self.test_dataloader != None:
                 train_loss, train_accuracy = super(ClientOptim, self).client_validation(
@@ -54,6 +59,9 @@ class ClientOptim(BaseClient):
 
             start_time=time.time()
             for data, target in self.dataloader:
+                if self.num_local_steps > 0 and num_steps == self.num_local_steps:
+                    break
+                num_steps += 1
                 data = data.to(self.cfg.device)
                 target = target.to(self.cfg.device)
                 optimizer.zero_grad()
@@ -88,7 +96,7 @@ class ClientOptim(BaseClient):
             ).client_validation(self.test_dataloader)
             per_iter_time = time.time() - start_time
             super(ClientOptim, self).client_log_content(
-                self.num_local_epochs, per_iter_time, train_loss, train_accuracy, test_loss, test_accuracy
+                num_local_epochs, per_iter_time, train_loss, train_accuracy, test_loss, test_accuracy
             )
         
         self.round += 1
@@ -109,6 +117,9 @@ class ClientOptim(BaseClient):
         self.local_state["dual"] = OrderedDict()
         self.local_state["penalty"] = OrderedDict()
         self.local_state["penalty"][self.id] = 0.0
+        ## Steps of a budget, with which the server normalizes the updates (see ``FedServer``)
+        if self.num_local_steps > 0:
+            self.local_state["num_steps"] = num_steps
 
         return self.local_state
  
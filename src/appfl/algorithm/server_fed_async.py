@@ -0,0 +1,134 @@
+import logging
+
+from collections import OrderedDict
+import numpy as np
+import torch
+import torch.nn as nn
+
+""" Asynchronous aggregation of local updates:
+    (1) FedAsync    : the global model is updated with every local update (buffer_size = 1)
+    (2) FedBuff     : the global model is updated once ``buffer_size`` local updates are buffered
+
+    A local update is the difference between the local model and the global model the client started from.
+    The update of client i, received ``staleness`` (tau_i) global versions after the client pulled its model, is weighted by
+            w_i * s(tau_i)
+    where w_i is the aggregation weight of client i and s is a staleness function:
+            constant    : s(tau) = 1
+            polynomial  : s(tau) = (1 + tau)^(-a)
+            hinge       : s(tau) = 1 if tau <= b, 1 / (a * (tau - b) + 1) otherwise
+    The global update is done by
+            global_model_parameter += mixing_rate * sum_i w_i s(tau_i) update_i / sum_i w_i
+
+    See the following papers for more details:
+    ``Xie, C., Koyejo, S. and Gupta, I., 2019. Asynchronous federated optimization. arXiv preprint arXiv:1903.03934``
+    ``Nguyen, J., Malik, K., Zhan, H., Yousefpour, A., Rabbat, M., Malek, M. and Huba, D., 2022. Federated learning with buffered asynchronous aggregation. AISTATS``
+"""
+
+
+def staleness_constant(staleness, **kwargs):
+    return 1.0
+
+
+def staleness_polynomial(staleness, a=0.5, **kwargs):
+    return (1.0 + staleness) ** (-a)
+
+
+def staleness_hinge(staleness, a=10.0, b=4, **kwargs):
+    if staleness <= b:
+        return 1.0
+    return 1.0 / (a * (staleness - b) + 1.0)
+
+
+def get_staleness_function(name):
+    return {
+        "constant": staleness_constant,
+        "polynomial": staleness_polynomial,
+        "hinge": staleness_hinge,
+    }[name]
+
+
+class FedAsyncAggregator:
+    """Buffer of staleness-weighted local updates applied to ``model`` every ``buffer_size`` updates.
+
+    Args:
+        model (nn.Module): global model updated in place
+        buffer_size (int): number of local updates per global update (1: FedAsync)
+        staleness_fn (str): name of the staleness function (``constant``, ``polynomial`` or ``hinge``)
+        staleness_args (Dict): arguments of the staleness function
+        max_staleness (int): local updates staler than this are dropped
+        mixing_rate (float): learning rate of the global update
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        buffer_size: int = 1,
+        staleness_fn: str = "polynomial",
+        staleness_args=None,
+        max_staleness: int = 10,
+        mixing_rate: float = 1.0,
+    ):
+        self.model = model
+        self.buffer_size = buffer_size
+        self.staleness_fn = get_staleness_function(staleness_fn)
+        self.staleness_args = dict(staleness_args) if staleness_args else {}
+        self.max_staleness = max_staleness
+        self.mixing_rate = mixing_rate
+        self.logger = logging.getLogger(__name__)
+        self.reset()
+
+    def reset(self):
+        self.accumulator = OrderedDict()
+        for name, param in self.model.named_parameters():
+            self.accumulator[name] = torch.zeros_like(param.data, device="cpu")
+        self.total_weight = 0.0
+        self.num_buffered = 0
+        self.staleness = []
+
+    def add(self, client_id, weight, local_state, base_state, staleness) -> bool:
+        """Buffer the update of a client.
+
+        Args:
+            client_id (int): client ID
+            weight (float): aggregation weight of the client
+            local_state (Dict): local model state after training
+            base_state (Dict): global model state (numpy arrays or tensors) the client started from
+            staleness (int): number of global updates since the client pulled ``base_state``
+
+        Return:
+            bool: ``True`` if the buffer is full, i.e., ``aggregate`` should be called
+        """
+        if staleness > self.max_staleness:
+            self.logger.warning(
+                "Dropped the update of client %d (staleness %d > %d)",
+                client_id,
+                staleness,
+                self.max_staleness,
+            )
+            return False
+
+        coefficient = weight * self.staleness_fn(staleness, **self.staleness_args)
+        for name in self.accumulator:
+            delta = np.asarray(local_state[name].cpu(), dtype=np.float32) - np.asarray(
+                base_state[name], dtype=np.float32
+            )
+            self.accumulator[name] += coefficient * torch.from_numpy(delta)
+        self.total_weight += weight
+        self.num_buffered += 1
+        self.staleness.append(staleness)
+        return self.num_buffered >= self.buffer_size
+
+    def aggregate(self):
+        """Apply the buffered updates to the global model and empty the buffer."""
+        if self.num_buffered == 0:
+            return
+        with torch.no_grad():
+            for name, param in self.model.named_parameters():
+                param.add_(
+                    (self.mixing_rate / self.total_weight)
+                    * self.accumulator[name].to(param.device)
+                )
+        self.logger.info(
+            "Aggregated %d updates (staleness: %s)", self.num_buffered, self.staleness
+        )
+        self.reset()
@@ -11,6 +11,8 @@ import copy
 
 
 class FedServer(BaseServer):
+    checkpoint_attributes = BaseServer.checkpoint_attributes + ("m_vector", "v_vector")
+
     def __init__(self, weights, model, loss_fn, num_clients, device, **kwargs):
         super(FedServer, self).__init__(weights, model, loss_fn, num_clients, device)
         self.__dict__.update(kwargs)
@@ -19,6 +21,8 @@ class FedServer(BaseServer):
         self.step = OrderedDict()
         """ Group 1 """
         self.pseudo_grad = OrderedDict()
+        self.pseudo_grad_accumulated = False  # set by end_update
+        self.local_steps = OrderedDict()  # client -> local steps of its last update, if reported
         self.m_vector = OrderedDict()
         self.v_vector = OrderedDict()
         for name, _ in self.model.named_parameters():
@@ -46,11 +50,31 @@ class FedServer(BaseServer):
                 + (1.0 - self.server_momentum_param_1) * self.pseudo_grad[name]
             )
 
+    def normalized_weights(self):
+        """Weights of the local updates, normalized by the number of local steps of each client if reported.
+
+        A client running more steps moves further from the global model. As in FedNova, each update is
+        divided by its number of steps and the average is multiplied by the (weighted) mean number of steps.
+        See ``Wang, J., Liu, Q., Liang, H., Joshi, G. and Poor, H.V., 2020. Tackling the objective inconsistency
+        problem in heterogeneous federated optimization. NeurIPS``
+        """
+        weight = sum(self.weights[i] for i in self.local_steps)
+        if len(self.local_steps) == 0 or weight == 0.0:
+            return self.weights
+        mean_steps = sum(self.weights[i] * steps for i, steps in self.local_steps.items()) / weight
+        weights = OrderedDict(self.weights)
+        for i, steps in self.local_steps.items():
+            weights[i] = self.weights[i] * mean_steps / steps
+        return weights
+
     def compute_pseudo_gradient(self):
+        if self.pseudo_grad_accumulated:
+            return
+        weights = self.normalized_weights()
         for name, _ in self.model.named_parameters():
             self.pseudo_grad[name] = torch.zeros_like(self.model.state_dict()[name])
             for i in range(self.num_clients):
-                self.pseudo_grad[name] += self.weights[i] * (
+                self.pseudo_grad[name] += weights[i] * (
                     self.global_state[name] - self.primal_states[i][name]
                 )
 
@@ -59,6 +83,13 @@ class FedServer(BaseServer):
         """Inputs for the global model update"""
         self.global_state = copy.deepcopy(self.model.state_dict())
         super(FedServer, self).primal_recover_from_local_states(local_states)
+        self.local_steps = OrderedDict(
+            (sid, state["num_steps"])
+            for states in local_states
+            if states is not None
+            for sid, state in states.items()
+            if state is not None and state.get("num_steps")
+        )
 
         """ residual calculation """
         super(FedServer, self).primal_residual_at_server()
@@ -78,6 +109,85 @@ class FedServer(BaseServer):
         """ model update """
         self.model.load_state_dict(self.global_state)
 
+    """
+    Streaming update: local states are folded into the pseudo gradient as they arrive
+    (``begin_update``, ``accumulate`` for each client, then ``end_update``), instead of being kept until
+    every client has sent its state. Clients that do not send their state have zero weight.
+    """
+
+    def begin_update(self):
+        self.global_state = copy.deepcopy(self.model.state_dict())
+        self.accumulated_weight = 0.0
+        self.accumulated_steps = 0.0
+        self.accumulated_step_weight = 0.0
+        self.accumulated_residual = 0.0
+        self.num_accumulated = 0
+        self.step_normalized_grad = OrderedDict()  # updates divided by their steps, scaled in ``end_update``
+        for name, _ in self.model.named_parameters():
+            self.pseudo_grad[name] = torch.zeros_like(self.global_state[name])
+
+    def accumulate(self, client_id, local_state):
+        primal = local_state["primal"]
+        self.accumulate_diffs(
+            client_id,
+            (
+                (name, self.global_state[name] - primal[name].to(self.device))
+                for name, _ in self.model.named_parameters()
+            ),
+            local_state.get("num_steps"),
+        )
+
+    def accumulate_delta(self, client_id, deltas, num_steps=None):
+        """Same as ``accumulate`` for the delta (local minus global state) of a client, e.g., a compact update."""
+        self.accumulate_diffs(
+            client_id,
+            ((name, -deltas[name].to(self.device)) for name, _ in self.model.named_parameters()),
+            num_steps,
+        )
+
+    def accumulate_diffs(self, client_id, diffs, num_steps=None):
+        ## Updates with their number of local steps are normalized as in ``normalized_weights``
+        weight = self.weights[client_id]
+        coefficient = weight
+        accumulated = self.pseudo_grad
+        if num_steps:
+            coefficient = weight / num_steps
+            self.accumulated_steps += weight * num_steps
+            self.accumulated_step_weight += weight
+            if len(self.step_normalized_grad) == 0:
+                for name, _ in self.model.named_parameters():
+                    self.step_normalized_grad[name] = torch.zeros_like(self.global_state[name])
+            accumulated = self.step_normalized_grad
+        for name, diff in diffs:
+            accumulated[name] += coefficient * diff
+            self.accumulated_residual += torch.sum(torch.square(diff)).item()
+        self.accumulated_weight += weight
+        self.num_accumulated += 1
+
+    def end_update(self):
+        """Update the global model with the accumulated states; return False if there is none."""
+        if self.num_accumulated == 0 or self.accumulated_weight == 0.0:
+            return False
+        ## Updates with steps are scaled by the mean steps of their clients; the weights are renormalized
+        mean_steps = 0.0
+        if self.accumulated_step_weight > 0:
+            mean_steps = self.accumulated_steps / self.accumulated_step_weight
+        for name, _ in self.model.named_parameters():
+            if len(self.step_normalized_grad) > 0:
+                self.pseudo_grad[name] += mean_steps * self.step_normalized_grad[name]
+            self.pseudo_grad[name] /= self.accumulated_weight
+        self.prim_res = self.accumulated_residual ** 0.5
+
+        self.pseudo_grad_accumulated = True
+        try:
+            self.compute_step()
+        finally:
+            self.pseudo_grad_accumulated = False
+        for name, _ in self.model.named_parameters():
+            self.global_state[name] += self.step[name]
+        self.model.load_state_dict(self.global_state)
+        return True
+
     def logging_iteration(self, cfg, logger, t):
         if t == 0:
             title = super(FedServer, self).log_title()
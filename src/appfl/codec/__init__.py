@@ -0,0 +1,6 @@
+"""
+This module provides codecs that reduce the size of model updates communicated between clients and a server.
+"""
+
+from .quantizer import *
+from .compact import *
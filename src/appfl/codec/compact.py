@@ -0,0 +1,156 @@
+import zlib
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import torch
+
+from .quantizer import QuantizationCodec, QuantizedTensor, dequantize
+
+""" Compact encoding of a model update as a single flat delta.
+
+    The floating-point entries of a local state are subtracted from the global state they were trained from,
+    flattened into one vector and encoded as float16, or quantized (see ``quantizer``), then optionally
+    compressed. The payload can also be written to a store shared with the server (e.g., ``appfl.funcx.store``),
+    in which case only its handle is returned. The server decodes the vector once and reads the delta of every
+    entry as a view of it.
+"""
+
+ENCODINGS = ("float32", "float16", "quantized")
+COMPRESSIONS = ("", "zlib", "zstd")
+
+FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        return zlib.compress(data, 1)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+@dataclass
+class CompactUpdate:
+    names: List[str]  # entries of the flat delta, in order
+    shapes: List[tuple]
+    encoding: str
+    compression: str
+    data: Any  # encoded (and compressed) delta, or the handle of its bytes in a store
+    scales: Optional[np.ndarray] = None  # quantized encoding
+    bits: int = 0
+    block_size: int = 0
+    other: Optional[Dict] = None  # entries passed through as they are
+
+    def nbytes(self) -> int:
+        nbytes = self.data.nbytes if hasattr(self.data, "nbytes") else len(self.data)
+        return nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def flat_delta(self) -> torch.Tensor:
+        data = self.data if isinstance(self.data, bytes) else self.data.load_bytes()
+        data = decompress(data, self.compression)
+        count = sum(int(np.prod(shape, dtype=np.int64)) for shape in self.shapes)
+        if self.encoding == "quantized":
+            flat = dequantize(
+                QuantizedTensor((count,), self.bits, self.block_size, data, self.scales)
+            )
+        else:
+            flat = np.frombuffer(data, dtype=self.encoding).astype(np.float32)
+        return torch.from_numpy(flat)
+
+    def deltas(self) -> OrderedDict:
+        """Delta of every encoded entry, as views of the decoded flat delta."""
+        deltas = OrderedDict()
+        offset = 0
+        flat = self.flat_delta()
+        for name, shape in zip(self.names, self.shapes):
+            count = int(np.prod(shape, dtype=np.int64))
+            deltas[name] = flat[offset : offset + count].view(shape)
+            offset += count
+        return deltas
+
+    def decode(self, global_state: Dict) -> OrderedDict:
+        """Recover the local state from the global state it was encoded against."""
+        deltas = self.deltas()
+        decoded = OrderedDict()
+        for name in list(self.names) + list(self.other or {}):
+            if name in deltas:
+                decoded[name] = (
+                    global_state[name].detach().cpu().to(torch.float32) + deltas[name]
+                )
+            else:
+                decoded[name] = self.other[name]
+        return decoded
+
+
+def encode_compact(
+    local_state: Dict,
+    global_state: Dict,
+    names: Optional[Iterable[str]] = None,
+    encoding: str = "float16",
+    compression: str = "",
+    codec: Optional[QuantizationCodec] = None,
+    store=None,
+) -> CompactUpdate:
+    """Encode ``local_state - global_state`` for the floating-point entries in ``names`` as one flat delta.
+
+    Args:
+        local_state (Dict): state after local training
+        global_state (Dict): state the training started from
+        names (Iterable): entries to encode (default: all); the others are passed through
+        encoding (str): "float32", "float16" or "quantized"
+        compression (str): "", "zlib" or "zstd" (requires the ``zstandard`` package)
+        codec (QuantizationCodec): codec of the quantized encoding (keeps the error feedback of the client)
+        store: store of the encoded bytes (with a ``put_blob`` method), if they are not returned in the update
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError("Unsupported encoding %s (supported: %s)" % (encoding, ENCODINGS))
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            "Unsupported compression %s (supported: %s)" % (compression, COMPRESSIONS)
+        )
+    names = set(local_state.keys() if names is None else names)
+    encoded_names, shapes, deltas = [], [], []
+    other = OrderedDict()
+    for name, tensor in local_state.items():
+        if name in names and name in global_state and torch.is_floating_point(tensor):
+            encoded_names.append(name)
+            shapes.append(tuple(tensor.shape))
+            deltas.append(
+                (tensor.detach().cpu() - global_state[name].detach().cpu())
+                .to(torch.float32)
+                .reshape(-1)
+            )
+        else:
+            other[name] = tensor
+    flat = torch.cat(deltas).numpy() if deltas else np.zeros(0, dtype=np.float32)
+
+    update = CompactUpdate(encoded_names, shapes, encoding, compression, b"", other=other)
+    if encoding == "quantized":
+        codec = codec if codec is not None else QuantizationCodec()
+        qtensor = codec.encode("compact", torch.from_numpy(flat))
+        update.data = qtensor.data_bytes
+        update.scales = qtensor.scales
+        update.bits = qtensor.bits
+        update.block_size = qtensor.block_size
+    elif encoding == "float16":
+        update.data = np.clip(flat, -FLOAT16_MAX, FLOAT16_MAX).astype(np.float16).tobytes()
+    else:
+        update.data = flat.tobytes()
+    update.data = compress(update.data, compression)
+    if store is not None:
+        update.data = store.put_blob(update.data)
+    return update
@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import torch
+from omegaconf import DictConfig
+
+
+""" Stochastic quantization of model updates (QSGD-style):
+
+    Each tensor is flattened and split into blocks of ``block_size`` entries. For every block,
+            scale = max(|x|)
+            level = stochastic_round( x / scale * s ),  s = 2^(bits-1) - 1
+    so that each entry is represented by an integer level in [-s, s] and the block by a single float32 scale.
+    The rounding is unbiased, i.e., E[level * scale / s] = x.
+
+    With error feedback, the quantization error of a round is kept at the client and added to the update of the next round.
+    See ``Karimireddy, S.P., Rebjock, Q., Stich, S. and Jaggi, M., 2019. Error feedback fixes SignSGD and other gradient compression schemes. ICML``
+"""
+
+SUPPORTED_BITS = (2, 4, 8)
+
+
+@dataclass
+class QuantizedTensor:
+    shape: tuple
+    bits: int
+    block_size: int
+    data_bytes: bytes  # packed quantization levels
+    scales: np.ndarray  # float32 scale of each block
+
+    def nbytes(self) -> int:
+        return len(self.data_bytes) + self.scales.nbytes
+
+
+def pack_levels(levels: np.ndarray, bits: int) -> bytes:
+    """Pack unsigned levels (each fitting in ``bits`` bits) into bytes."""
+    if bits == 8:
+        return levels.astype(np.uint8).tobytes()
+    per_byte = 8 // bits
+    padded = np.zeros(-(-levels.size // per_byte) * per_byte, dtype=np.uint8)
+    padded[: levels.size] = levels
+    padded = padded.reshape(-1, per_byte)
+    packed = np.zeros(padded.shape[0], dtype=np.uint8)
+    for i in range(per_byte):
+        packed |= padded[:, i] << (bits * i)
+    return packed.tobytes()
+
+
+def unpack_levels(data_bytes: bytes, bits: int, count: int) -> np.ndarray:
+    """Inverse of ``pack_levels``."""
+    packed = np.frombuffer(data_bytes, dtype=np.uint8)
+    if bits == 8:
+        return packed[:count]
+    per_byte = 8 // bits
+    mask = (1 << bits) - 1
+    levels = np.empty((packed.size, per_byte), dtype=np.uint8)
+    for i in range(per_byte):
+        levels[:, i] = (packed >> (bits * i)) & mask
+    return levels.reshape(-1)[:count]
+
+
+def quantize(
+    array: np.ndarray, bits: int = 8, block_size: int = 256, rng=None
+) -> QuantizedTensor:
+    """Stochastically quantize ``array`` to ``bits`` bits with per-block scales.
+
+    Args:
+        array (np.ndarray): tensor to quantize
+        bits (int): number of bits per entry (2, 4, or 8)
+        block_size (int): number of entries sharing a scale
+        rng (np.random.Generator): random generator for the stochastic rounding
+    """
+    if bits not in SUPPORTED_BITS:
+        raise ValueError(
+            "Unsupported number of bits %s (supported: %s)" % (bits, SUPPORTED_BITS)
+        )
+    if rng is None:
+        rng = np.random.default_rng()
+
+    flat = np.asarray(array, dtype=np.float32).reshape(-1)
+    num_blocks = max(1, -(-flat.size // block_size))
+    blocks = np.zeros(num_blocks * block_size, dtype=np.float32)
+    blocks[: flat.size] = flat
+    blocks = blocks.reshape(num_blocks, block_size)
+
+    s = 2 ** (bits - 1) - 1
+    scales = np.abs(blocks).max(axis=1)
+    scales[scales == 0.0] = 1.0
+    normalized = blocks / scales[:, None] * s
+    lower = np.floor(normalized)
+    levels = lower + (rng.random(normalized.shape, dtype=np.float32) < normalized - lower)
+    levels = np.clip(levels, -s, s) + s
+
+    return QuantizedTensor(
+        shape=tuple(np.shape(array)),
+        bits=bits,
+        block_size=block_size,
+        data_bytes=pack_levels(levels.reshape(-1)[: flat.size].astype(np.uint8), bits),
+        scales=scales.astype(np.float32),
+    )
+
+
+def dequantize(qtensor: QuantizedTensor) -> np.ndarray:
+    """Recover a float32 array from ``QuantizedTensor``."""
+    count = int(np.prod(qtensor.shape, dtype=np.int64))
+    s = 2 ** (qtensor.bits - 1) - 1
+    levels = unpack_levels(qtensor.data_bytes, qtensor.bits, count).astype(np.float32)
+    scales = np.repeat(qtensor.scales, qtensor.block_size)[:count]
+    return ((levels - s) * (scales / s)).reshape(qtensor.shape)
+
+
+class QuantizationCodec:
+    """Codec quantizing the difference between local and global model states.
+
+    Entries of a state that are not floating-point tensors (or not selected by ``names``) are passed through as they are.
+
+    Args:
+        bits (int): number of bits per entry (2, 4, or 8)
+        block_size (int): number of entries sharing a scale
+        error_feedback (bool): whether to carry the quantization error over to the next round
+        seed (int): optional seed of the stochastic rounding
+    """
+
+    def __init__(
+        self,
+        bits: int = 8,
+        block_size: int = 256,
+        error_feedback: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self.bits = bits
+        self.block_size = block_size
+        self.error_feedback = error_feedback
+        self.rng = np.random.default_rng(seed)
+        self.residual = OrderedDict()
+
+        ## Communication volume before/after encoding
+        self.bytes_raw = 0
+        self.bytes_encoded = 0
+
+    def encode(self, name: str, delta: torch.Tensor) -> QuantizedTensor:
+        delta = delta.detach().cpu().to(torch.float32).numpy()
+        if self.error_feedback and name in self.residual:
+            delta = delta + self.residual[name]
+        qtensor = quantize(delta, self.bits, self.block_size, self.rng)
+        if self.error_feedback:
+            self.residual[name] = delta - dequantize(qtensor)
+        self.bytes_raw += delta.nbytes
+        self.bytes_encoded += qtensor.nbytes()
+        return qtensor
+
+    def encode_update(
+        self,
+        local_state: Dict,
+        global_state: Dict,
+        names: Optional[Iterable[str]] = None,
+    ) -> OrderedDict:
+        """Encode ``local_state - global_state`` for every entry in ``names``."""
+        names = set(local_state.keys() if names is None else names)
+        encoded = OrderedDict()
+        for name, tensor in local_state.items():
+            if (
+                name in names
+                and name in global_state
+                and torch.is_floating_point(tensor)
+            ):
+                encoded[name] = self.encode(
+                    name, tensor.detach().cpu() - global_state[name].detach().cpu()
+                )
+            else:
+                encoded[name] = tensor
+        return encoded
+
+    @staticmethod
+    def decode_update(encoded: Dict, global_state: Dict) -> OrderedDict:
+        """Recover a local state from the output of ``encode_update``."""
+        decoded = OrderedDict()
+        for name, value in encoded.items():
+            if isinstance(value, QuantizedTensor):
+                decoded[name] = global_state[name].detach().cpu().to(
+                    torch.float32
+                ) + torch.from_numpy(dequantize(value))
+            else:
+                decoded[name] = value
+        return decoded
+
+    def compression_ratio(self) -> float:
+        if self.bytes_encoded == 0:
+            return 1.0
+        return self.bytes_raw / self.bytes_encoded
+
+
+def create_codec(cfg: DictConfig, seed: Optional[int] = None):
+    """Create a codec from ``cfg.quantization``; return ``None`` if quantization is disabled."""
+    if cfg.quantization.enable == False:
+        return None
+    return QuantizationCodec(
+        bits=cfg.quantization.bits,
+        block_size=cfg.quantization.block_size,
+        error_feedback=cfg.quantization.error_feedback,
+        seed=seed,
+    )
+
+
+def encode_local_state(codec, local_state: Dict, global_state: Dict, names=None):
+    """Replace the ``primal`` state of a client's ``local_state`` by its quantized update."""
+    if codec is None:
+        return local_state
+    encoded = OrderedDict(local_state)
+    encoded["primal"] = codec.encode_update(local_state["primal"], global_state, names)
+    return encoded
+
+
+def decode_local_states(local_states, global_state: Dict):
+    """Decode, in place, the quantized (or compact, see ``compact``) ``primal`` states gathered from clients."""
+    from .compact import CompactUpdate
+
+    for states in local_states:
+        if states is None:
+            continue
+        for _, state in states.items():
+            if state is not None and isinstance(state["primal"], CompactUpdate):
+                state["primal"] = state["primal"].decode(global_state)
+            elif state is not None and any(
+                isinstance(v, QuantizedTensor) for v in state["primal"].values()
+            ):
+                state["primal"] = QuantizationCodec.decode_update(
+                    state["primal"], global_state
+                )
+    return local_states
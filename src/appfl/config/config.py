@@ -33,6 +33,8 @@ class Config:
     validation: bool = True
     test_data_batch_size: int = 64
     test_data_shuffle: bool = False
+    # Validate, log and save the model of a round on a background thread while the next round runs
+    pipeline_validation: bool = False
 
     # Checking data sanity
     data_sanity: bool = False
@@ -70,6 +72,41 @@ class Config:
     logginginfo: DictConfig = OmegaConf.create({})
     summary_file: str = ""
 
+    # Partial participation: clients sampled for each round and the deadline of their results
+    participation: DictConfig = OmegaConf.create(
+        {
+            "fraction": 1.0,
+            ## If positive, overrides fraction
+            "num_clients": 0,
+            "seed": 0,
+            ## Seconds after which a round is aggregated with the results received (0: no deadline).
+            ## Measured from the start of the round where its clients train: serial runs simulate parallel
+            ## clients, so each client has the whole deadline; an MPI rank trains its clients one after
+            ## another, so they share it (clients starting or finishing past it are dropped)
+            "deadline": 0.0,
+        }
+    )
+
+    # Asynchronous aggregation (FedAsync/FedBuff); see appfl/algorithm/server_fed_async.py
+    asynchronous: DictConfig = OmegaConf.create(
+        {
+            "enable": False,
+            ## Number of local updates per global update (1: FedAsync)
+            "buffer_size": 1,
+            ## Staleness function: constant, polynomial, hinge
+            "staleness_fn": "polynomial",
+            "staleness_args": {"a": 0.5},
+            ## Local updates staler than this are dropped
+            "max_staleness": 10,
+            "mixing_rate": 1.0,
+        }
+    )
+
+    # Quantization of model updates sent from clients (bits: 2, 4, or 8)
+    quantization: DictConfig = OmegaConf.create(
+        {"enable": False, "bits": 8, "block_size": 256, "error_feedback": True}
+    )
+
     #
     # gRPC configutations
     #
@@ -77,11 +114,69 @@ class Config:
     # 100 MB for gRPC maximum message size
     max_message_size: int = 104857600
 
-    operator: DictConfig = OmegaConf.create({"id": 1})
+    # Metrics of the gRPC communication (latency, bytes and queue wait per RPC, aggregation time)
+    metrics: DictConfig = OmegaConf.create(
+        {
+            "enable": False,
+            ## Serve /metrics (Prometheus text) and /metrics.json on this port of the server (0: disabled)
+            "http_port": 0,
+            ## Dump the metrics of the server as JSON to this file ("": disabled); clients add "_client_<id>"
+            "json_path": "",
+            "json_interval": 10.0,
+        }
+    )
+
+    operator: DictConfig = OmegaConf.create(
+        {
+            "id": 1,
+            ## Directory of the operator snapshots, from which a restarted gRPC server resumes ("": disabled)
+            "checkpoint_dir": "",
+            ## Snapshot the operator every this many rounds (the results of clients are saved as they arrive)
+            "checkpoint_interval": 1,
+        }
+    )
     server: DictConfig = OmegaConf.create(
-        {"id": 1, "host": "localhost", "port": 50051, "use_tls": False, "api_key": None}
+        {
+            "id": 1,
+            "host": "localhost",
+            "port": 50051,
+            "use_tls": False,
+            "api_key": None,
+            ## Number of threads serving RPCs (long-polling clients each hold one)
+            "max_workers": 10,
+            ## Seconds a client waits in GetJob/GetWeight for its next job (0: poll every 5 seconds)
+            "long_poll_timeout": 30.0,
+            ## Serve RPCs on an asyncio event loop (grpc.aio) instead of a thread pool
+            "use_aio": False,
+            ## Number of threads processing uploaded results with grpc.aio
+            "aio_workers": 1,
+            ## Exchange models through shared memory with clients on the host of the server
+            "use_shared_memory": False,
+            ## Also listen on this Unix domain socket; clients use it if it exists on their host
+            "uds_path": "",
+            ## Learning results are uploaded in chunks of this many bytes, resuming after failures
+            "upload_chunk_size": 1048576,
+            ## Attempts to resume an interrupted upload (0: send results in a single stream)
+            "upload_retries": 5,
+            ## Chunks sent ahead of the acknowledgments of the server (retransmitted at most after a failure)
+            "upload_window": 4,
+            ## Seconds the server keeps a partial upload without receiving a chunk
+            "upload_ttl": 600.0,
+            ## Partial uploads the server keeps per client; a new upload drops the oldest one
+            "upload_max_per_client": 2,
+            ## Partition the model across this many operators by byte size; shard i listens on port + i
+            "num_shards": 1,
+        }
+    )
+    client: DictConfig = OmegaConf.create(
+        {
+            "id": 1,
+            ## Fetch the next job and its global model while saving checkpoints and logging (gRPC)
+            "prefetch_model": True,
+            ## Seconds to wait for the server to come back after losing the connection (gRPC)
+            "reconnect_timeout": 300.0,
+        }
     )
-    client: DictConfig = OmegaConf.create({"id": 1})
 
 @dataclass
 class FuncXClientConfig:
@@ -97,6 +192,38 @@ class FuncXServerConfig:
     device      : str = "cpu"
     output_dir  : str = "./"
     data_dir    : str = "./"
+    ## IDs of the functions registered with funcX, relative to output_dir ("": register every run)
+    function_cache : str = "funcx_functions.json"
+    ## Directory shared with the endpoints where global models are written once per round
+    ## ("": the global model is sent in every task)
+    model_store    : str = ""
+    ## Polling of task results: backoff from min to max interval (seconds) while no result arrives
+    poll_min_interval : float = 0.5
+    poll_max_interval : float = 30.0
+    ## Fold every local update into the global update as soon as it is fetched (FedServer algorithms)
+    ## Set asynchronous.enable to send a finished client the latest global model without waiting for the others
+    streaming_aggregation : bool = False
+    ## Updates returned by the endpoints: "" (local states as they are), or a flat delta against the global model,
+    ## "float32", "float16" or "quantized" (with the bits of cfg.quantization), optionally compressed ("zlib", "zstd")
+    update_encoding    : str = ""
+    update_compression : str = ""
+    ## Write the encoded updates to model_store and return their handles only
+    update_to_store    : bool = False
+    ## Budgets of local steps per client, fitted to the times of its tasks so that every client trains for about
+    ## target_round_time seconds (0: the median time of num_local_epochs epochs); synchronous FedServer epochs only
+    adaptive_local_steps : bool  = False
+    target_round_time    : float = 0.0
+    min_local_steps      : int   = 1
+    max_local_steps      : int   = 0  # 0: no limit
+    ## Poll the status of the endpoints every this many seconds on a background thread (0: disabled); the clients
+    ## of a round on endpoints not online, or above endpoint_max_load pending tasks per worker (0: no limit), are
+    ## replaced by clients on the idlest endpoints, and the tasks on endpoints not online for
+    ## endpoint_offline_timeout seconds are failed (0: waited for)
+    endpoint_status_interval : float = 0.0
+    endpoint_max_load        : float = 0.0
+    endpoint_offline_timeout : float = 60.0
+    ## Asynchronous epochs stop sending tasks to a client after this many consecutive failed tasks (0: never)
+    max_task_failures        : int   = 3
 
 @dataclass
 class ExecutableFunc:
@@ -42,6 +42,8 @@ class Federated:
             ## Clients optimizer
             "optim": "SGD",
             "num_local_epochs": 10,
+            ## Local steps (minibatches) instead of epochs (0: num_local_epochs)
+            "num_local_steps": 0,
             "optim_args": {
                 "lr": 0.001,
             },
@@ -1,3 +1,9 @@
 from .funcx_client import *
 from .funcx_server import *
-from .helpers import *
\ No newline at end of file
+from .helpers import *
+from .registry import *
+from .store import *
+from .local import *
+from .budget import *
+from .monitor import *
+from . import cache
\ No newline at end of file
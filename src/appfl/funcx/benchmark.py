@@ -0,0 +1,187 @@
+import logging
+import resource
+import tempfile
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import torch
+import torch.nn as nn
+from omegaconf import OmegaConf
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from .local import LocalFuncXClient
+
+""" Synthetic funcX run on local endpoints.
+
+    ``run_funcx_server`` drives clients of ``LocalFuncXClient`` endpoints, which train a linear model of a
+    configurable size on synthetic data. The report separates the time of the tasks from the overheads of the
+    funcX path (dispatch, polling, serialization) measured in the server process.
+"""
+
+NUM_CLASSES = 10
+
+
+def synthetic_data(cfg, client_idx):
+    """Two batches of random samples for the linear model of ``cfg.model_args``."""
+    generator = torch.Generator().manual_seed(client_idx)
+    num_samples = 2 * cfg.train_data_batch_size
+    return Dataset(
+        torch.randn(num_samples, cfg.model_args[0], generator=generator),
+        torch.randint(cfg.model_args[1], (num_samples,), generator=generator),
+    )
+
+
+def synthetic_model():
+    return nn.Linear
+
+
+def benchmark_config(num_clients, num_rounds, model_size, server=None):
+    cfg = OmegaConf.structured(FuncXConfig)
+    cfg.get_data = OmegaConf.structured(ExecutableFunc(module=__name__, call="synthetic_data"))
+    cfg.get_model = OmegaConf.structured(ExecutableFunc(module=__name__, call="synthetic_model"))
+    cfg.model_args = [max(model_size // NUM_CLASSES, 1), NUM_CLASSES]
+    cfg.num_epochs = num_rounds
+    cfg.fed.args.num_local_epochs = 1
+    cfg.validation = False
+    cfg.use_tensorboard = False
+    cfg.output_dirname = tempfile.mkdtemp(prefix="appfl_funcx_benchmark_")
+    cfg.server = OmegaConf.structured(FuncXServerConfig(output_dir=cfg.output_dirname))
+    cfg.server.function_cache = ""
+    if server:
+        cfg.server = OmegaConf.merge(cfg.server, server)
+    for i in range(num_clients):
+        cfg.clients.append(
+            OmegaConf.structured(
+                FuncXClientConfig(
+                    data_split=None,
+                    name="client_%d" % i,
+                    endpoint_id="endpoint_%d" % i,
+                    data_dir="",
+                    output_dir=cfg.output_dirname,
+                )
+            )
+        )
+    return cfg
+
+
+def percentile(samples, q):
+    if len(samples) == 0:
+        return float("nan")
+    return float(np.percentile(samples, q))
+
+
+def run_benchmark(
+    num_clients,
+    num_rounds=5,
+    model_size=100000,
+    num_workers=1,
+    latency=0.0,
+    bandwidth=0.0,
+    server=None,
+    config=None,
+):
+    """Run ``num_rounds`` of the funcX server with ``num_clients`` local endpoints and report its overheads.
+
+    Args:
+        num_clients (int): number of clients, each on its own endpoint
+        num_rounds (int): number of rounds
+        model_size (int): approximate number of parameters of the linear model
+        num_workers (int): worker processes per endpoint
+        latency (float or List): one-way latency (seconds) of the endpoints, or of each endpoint
+        bandwidth (float or List): bytes per second of the endpoints, or of each endpoint (0: unlimited)
+        server (Dict): options of the ``server`` configuration (e.g., ``streaming_aggregation``)
+        config (Dict): other options of the configuration (e.g., ``asynchronous``)
+
+    Return:
+        Dict: rounds per second, task durations, traffic and polls, and CPU time and memory of the server
+    """
+    from appfl import run_funcx_server
+
+    cfg = benchmark_config(num_clients, num_rounds, model_size, server)
+    if config:
+        cfg = OmegaConf.merge(cfg, config)
+    latencies = latency if isinstance(latency, (list, tuple)) else [latency] * num_clients
+    bandwidths = bandwidth if isinstance(bandwidth, (list, tuple)) else [bandwidth] * num_clients
+    endpoints = {
+        client_cfg.endpoint_id: dict(
+            num_workers=num_workers, latency=latencies[i], bandwidth=bandwidths[i]
+        )
+        for i, client_cfg in enumerate(cfg.clients)
+    }
+
+    logging.getLogger(run_funcx_server.__name__).setLevel(logging.WARNING)
+    model = synthetic_model()(*cfg.model_args)
+    with LocalFuncXClient(endpoints) as fxc:
+        start = time.time()
+        start_cpu = time.process_time()
+        run_funcx_server.run_server(cfg, model, nn.CrossEntropyLoss(), fxc)
+        elapsed = time.time() - start
+        server_cpu_seconds = time.process_time() - start_cpu
+
+    durations = defaultdict(list)
+    training_start, training_end = float("inf"), 0.0
+    for task in cfg.logging_tasks:
+        if task.success:
+            durations[task.task_name].append(task.end_time - task.start_time)
+            if task.task_name == "client_training":
+                training_start = min(training_start, task.start_time)
+                training_end = max(training_end, task.end_time)
+
+    report = OrderedDict()
+    report["num_clients"] = num_clients
+    report["num_rounds"] = num_rounds
+    report["model_bytes"] = 4 * sum(p.numel() for p in model.parameters())
+    report["elapsed_seconds"] = elapsed
+    report["rounds_per_second"] = num_rounds / max(training_end - training_start, 1e-9)
+    report["tasks"] = OrderedDict(
+        (
+            name,
+            OrderedDict(
+                count=len(samples),
+                p50=percentile(samples, 50),
+                p99=percentile(samples, 99),
+            ),
+        )
+        for name, samples in durations.items()
+    )
+    report["bytes_sent"] = fxc.bytes_sent
+    report["bytes_received"] = fxc.bytes_received
+    report["polls"] = fxc.num_polls
+    report["server_cpu_seconds"] = server_cpu_seconds
+    report["server_cpu_utilization"] = server_cpu_seconds / elapsed
+    report["server_peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return report
+
+
+def format_report(report):
+    lines = [
+        "%d clients, %d rounds, model of %.1f MB: %.3f rounds/s (%.2f s)"
+        % (
+            report["num_clients"],
+            report["num_rounds"],
+            report["model_bytes"] / 1e6,
+            report["rounds_per_second"],
+            report["elapsed_seconds"],
+        ),
+        "%-24s %8s %12s %12s" % ("task", "count", "p50 (ms)", "p99 (ms)"),
+    ]
+    for name, stats in report["tasks"].items():
+        lines.append(
+            "%-24s %8d %12.2f %12.2f"
+            % (name, stats["count"], 1e3 * stats["p50"], 1e3 * stats["p99"])
+        )
+    lines.append(
+        "traffic: %.1f MB to endpoints, %.1f MB from endpoints, %d polls"
+        % (report["bytes_sent"] / 1e6, report["bytes_received"] / 1e6, report["polls"])
+    )
+    lines.append(
+        "server: %.2f CPU seconds (%.0f%% of a core), peak RSS %.1f MB"
+        % (
+            report["server_cpu_seconds"],
+            100 * report["server_cpu_utilization"],
+            report["server_peak_rss_bytes"] / 1e6,
+        )
+    )
+    return "\n".join(lines)
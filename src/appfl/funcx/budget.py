@@ -0,0 +1,89 @@
+from collections import OrderedDict, defaultdict, deque
+
+import numpy as np
+
+
+class LocalStepScheduler:
+    """Budgets of local steps per client, so that heterogeneous endpoints finish their training near a target time.
+
+    The time of a training task on a client is modeled as ``overhead + steps * step_time``, fitted to the times
+    of its recorded tasks (``ClientTask``). A client without records runs ``default_steps`` (e.g., the steps of
+    ``num_local_epochs`` epochs of its data). Without a target time, the target is the median of the times
+    predicted for the default steps, which follows the records (e.g., past the cold start of the endpoints).
+    The updates are normalized by their steps at the server (see ``FedServer``).
+
+    Args:
+        default_steps (Dict): client -> steps of a client without records
+        target_time (float): target time (seconds) of a training task (0: median time of the default steps)
+        min_steps (int): smallest budget
+        max_steps (int): largest budget (0: no limit)
+        history (int): records kept per client
+    """
+
+    def __init__(self, default_steps, target_time=0.0, min_steps=1, max_steps=0, history=5):
+        self.default_steps = OrderedDict(default_steps)
+        self.target_time = target_time
+        self.min_steps = min_steps
+        self.max_steps = max_steps
+        self.records = defaultdict(lambda: deque(maxlen=history))  # client -> (steps, seconds)
+        self.assigned = OrderedDict()
+        self.assigned_target = 0.0  # target time of the assigned budgets
+
+    def fit(self, client_idx):
+        """``(overhead, step_time)`` of a client, or None without records."""
+        records = self.records.get(client_idx)
+        if not records:
+            return None
+        steps = np.array([s for s, _ in records], dtype=np.float64)
+        times = np.array([t for _, t in records], dtype=np.float64)
+        if len(np.unique(steps)) > 1:
+            step_time, overhead = np.polyfit(steps, times, 1)
+            if step_time > 0:
+                return max(overhead, 0.0), step_time
+        ## A single budget does not tell the overhead apart
+        return 0.0, float(np.median(times / steps))
+
+    def target(self):
+        """Target time of a training task (0 before any record)."""
+        if self.target_time > 0:
+            return self.target_time
+        predictions = []
+        for client_idx, steps in self.default_steps.items():
+            fit = self.fit(client_idx)
+            if fit is not None:
+                predictions.append(fit[0] + steps * fit[1])
+        return float(np.median(predictions)) if predictions else 0.0
+
+    def budget(self, client_idx, target):
+        fit = self.fit(client_idx)
+        if fit is None or target <= 0:
+            steps = self.default_steps[client_idx]
+        else:
+            overhead, step_time = fit
+            steps = int(round((target - overhead) / step_time))
+        steps = max(steps, self.min_steps)
+        if self.max_steps > 0:
+            steps = min(steps, self.max_steps)
+        return steps
+
+    def assign(self, clients):
+        """Budgets of the clients of a round."""
+        target = self.target()
+        self.assigned = OrderedDict((c, self.budget(c, target)) for c in clients)
+        self.assigned_target = target
+        return self.assigned
+
+    def observe(self, tasks):
+        """Record the achieved times of the training tasks (``ClientTask``) of the last assigned round.
+
+        Return:
+            Dict: client -> seconds of its task
+        """
+        times = OrderedDict()
+        for task in tasks:
+            if task.success and task.client_idx in self.assigned:
+                times[task.client_idx] = task.end_time - task.start_time
+                self.records[task.client_idx].append(
+                    (self.assigned[task.client_idx], times[task.client_idx])
+                )
+        return times
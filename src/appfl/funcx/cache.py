@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+
+import torch
+from omegaconf import DictConfig, ListConfig, OmegaConf
+from torch.utils.data import DataLoader
+
+from appfl.codec import QuantizationCodec
+from appfl.misc.data import Dataset
+from appfl.misc.utils import get_executable_func
+
+from .registry import function_hash
+
+""" Cache of the funcX endpoint workers.
+
+    A worker process runs the tasks of many rounds, and this module stays imported in between. The datasets,
+    models and data loaders of ``client_training`` are kept here, keyed by the client and by the configuration
+    they are built from, so that only the first round of a worker builds them. At most ``MAX_OBJECTS`` objects
+    are kept; the least recently used ones are dropped first.
+
+    Datasets are also saved under ``<data_dir>/.appfl_cache`` and memory-mapped by the other workers of the
+    endpoint. A saved dataset is keyed by the configuration of the client and by the code of ``get_data``, so a
+    change of either builds the dataset again; a change of the raw data under ``data_dir`` (or of the functions
+    ``get_data`` calls) does not: remove ``.appfl_cache`` after updating the data in place.
+
+    The quantization codecs of the clients are kept here too, with their error-feedback residuals. Error feedback
+    is best-effort on funcX: the residual of a client only carries over to its next task if that task runs on the
+    same worker (and the codec was not dropped meanwhile); otherwise the task starts from a zero residual.
+"""
+
+_objects = OrderedDict()
+
+MAX_OBJECTS = 16
+
+CACHE_DIRNAME = ".appfl_cache"
+
+
+def config_key(*parts) -> str:
+    """Hash of configuration values (e.g., sections of the configuration)."""
+
+    def plain(value):
+        if isinstance(value, (DictConfig, ListConfig)):
+            return OmegaConf.to_container(value, resolve=True)
+        return value
+
+    data = json.dumps([plain(part) for part in parts], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def cached(key, factory):
+    if key in _objects:
+        _objects.move_to_end(key)
+        return _objects[key]
+    value = factory()
+    _objects[key] = value
+    while len(_objects) > MAX_OBJECTS:
+        _objects.popitem(last=False)
+    return value
+
+
+def clear():
+    _objects.clear()
+
+
+def _load(path):
+    try:
+        return torch.load(path, mmap=True)
+    except TypeError:  # torch without memory-mapped loading
+        return torch.load(path)
+
+
+def load_dataset(cfg, client_idx, key):
+    path = ""
+    data_dir = cfg.clients[client_idx].data_dir
+    if data_dir:
+        path = os.path.join(data_dir, CACHE_DIRNAME, key + ".pt")
+        if os.path.exists(path):
+            state = _load(path)
+            return Dataset(state["data_input"], state["data_label"])
+
+    dataset = get_executable_func(cfg.get_data)(cfg, client_idx)
+    if path and isinstance(dataset, Dataset):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".%s.tmp" % uuid.uuid4().hex
+        torch.save(
+            {"data_input": dataset.data_input, "data_label": dataset.data_label},
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+    return dataset
+
+
+def dataset_key(cfg, client_idx) -> str:
+    client_cfg = cfg.clients[client_idx]
+    return config_key(
+        "data",
+        client_idx,
+        cfg.get_data,
+        function_hash(get_executable_func(cfg.get_data)),
+        cfg.dataset,
+        cfg.num_clients,
+        client_cfg.data_dir,
+        client_cfg.data_split,
+    )
+
+
+def get_dataset(cfg, client_idx):
+    """Training data of a client, built by ``cfg.get_data`` once per worker (and once per ``data_dir``)."""
+    key = dataset_key(cfg, client_idx)
+    return cached(key, lambda: load_dataset(cfg, client_idx, key))
+
+
+def get_model(cfg):
+    """Model built by ``cfg.get_model`` once per worker; its state is replaced by the global model every round."""
+    key = config_key("model", cfg.get_model, cfg.model_args, cfg.model_kwargs)
+
+    def build():
+        ModelClass = get_executable_func(cfg.get_model)()
+        return ModelClass(*cfg.model_args, **cfg.model_kwargs)
+
+    return cached(key, build)
+
+
+def get_codec(cfg, client_idx):
+    """Quantization codec of a client (``cfg.quantization``), kept with its error-feedback residuals."""
+    key = config_key("codec", client_idx, cfg.quantization)
+    return cached(
+        key,
+        lambda: QuantizationCodec(
+            bits=cfg.quantization.bits,
+            block_size=cfg.quantization.block_size,
+            error_feedback=cfg.quantization.error_feedback,
+        ),
+    )
+
+
+def get_dataloader(cfg, client_idx):
+    """Data loader of the training data of a client (see ``get_dataset``)."""
+    key = config_key(
+        "loader",
+        dataset_key(cfg, client_idx),
+        cfg.train_data_batch_size,
+        cfg.train_data_shuffle,
+        cfg.num_workers,
+    )
+    return cached(
+        key,
+        lambda: DataLoader(
+            get_dataset(cfg, client_idx),
+            num_workers=cfg.num_workers,
+            batch_size=cfg.train_data_batch_size,
+            shuffle=cfg.train_data_shuffle,
+            pin_memory=True,
+        ),
+    )
@@ -1,10 +1,9 @@
 def client_validate_data(
     cfg, 
     client_idx):
-    from appfl.misc import client_log, get_executable_func
-    get_data  = get_executable_func(cfg.get_data)
-    # Get train data
-    train_data = get_data(cfg, client_idx)
+    from appfl.funcx.cache import get_dataset
+    # Get train data (kept by the worker for the training tasks)
+    train_data = get_dataset(cfg, client_idx)
     return len(train_data)
 
 def client_training(
@@ -12,33 +11,29 @@ def client_training(
     client_idx,
     weights,
     global_state,
-    loss_fn
+    loss_fn,
+    num_local_steps = 0
     ):
     ## Import libaries
     import torch
-    from torch.utils.data import DataLoader
-    from appfl.misc import client_log, get_executable_func
+    from appfl.misc import client_log
     from appfl.algorithm import ClientOptim
+    from appfl.funcx.store import load_global_state
+    from appfl.funcx.cache import get_model, get_dataloader
     
-    get_model = get_executable_func(cfg.get_model)
-    get_data  = get_executable_func(cfg.get_data)
     ## Load client configs
     cfg.device         = cfg.clients[client_idx].device
     cfg.output_dirname = cfg.clients[client_idx].output_dir
-
-    ## Prepare training/testing data
-    train_data = get_data(cfg, client_idx)
+    ## Budget of local steps chosen by the server for this endpoint (0: num_local_epochs)
+    if num_local_steps > 0:
+        cfg.fed.args.num_local_steps = num_local_steps
 
     ## Prepare output directory
     output_filename = cfg.output_filename + "_client_%s" % (client_idx)
     outfile = client_log(cfg.output_dirname, output_filename)
     
-    ## Get training model
-    ModelClass = get_model()
-    model      = ModelClass(*cfg.model_args, **cfg.model_kwargs)
-    
-    ## Configure training at client
-    batch_size = cfg.train_data_batch_size
+    ## Get training model (its state is replaced by the global state below)
+    model      = get_model(cfg)
     
     ## Instantiate training client 
     client= eval(cfg.fed.clientname)(
@@ -46,21 +41,45 @@ def client_training(
             weights,
             model,
             loss_fn,
-            DataLoader(
-                train_data,
-                num_workers = cfg.num_workers,
-                batch_size  = batch_size,
-                shuffle     = cfg.train_data_shuffle,
-                pin_memory  = True,
-            ),
+            get_dataloader(cfg, client_idx), # training data, built by the first task of this worker
             cfg,
             outfile,
             None, #TODO: support validation at client
             **cfg.fed.args,
         )
-    ## Initial state for a client
+    ## Initial state for a client (fetched from the model store if passed by reference)
+    global_state = load_global_state(global_state)
     client.model.load_state_dict(global_state)
 
     ## Perform a client update
     client_state = client.update()
+
+    ## Return a flat (and possibly quantized or stored) delta against the global model
+    if cfg.server.update_encoding:
+        from appfl.codec import encode_compact
+        from appfl.funcx.cache import get_codec
+        from appfl.funcx.store import create_model_store
+        codec = None
+        if cfg.server.update_encoding == "quantized":
+            ## The codec of this worker keeps the error feedback (best-effort, see appfl.funcx.cache)
+            codec = get_codec(cfg, client_idx)
+        client_state["primal"] = encode_compact(
+            client_state["primal"],
+            global_state,
+            [name for name, _ in client.model.named_parameters()],
+            encoding=cfg.server.update_encoding,
+            compression=cfg.server.update_compression,
+            codec=codec,
+            store=create_model_store(cfg) if cfg.server.update_to_store else None,
+        )
+    ## Quantize the update (the codec of this worker keeps the error feedback, see appfl.funcx.cache)
+    elif cfg.quantization.enable:
+        from appfl.codec import encode_local_state
+        from appfl.funcx.cache import get_codec
+        client_state = encode_local_state(
+            get_codec(cfg, client_idx),
+            client_state,
+            global_state,
+            [name for name, _ in client.model.named_parameters()],
+        )
     return client_state
\ No newline at end of file
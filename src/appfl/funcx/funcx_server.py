@@ -1,33 +1,136 @@
 from omegaconf import DictConfig, OmegaConf
 from funcx import FuncXClient
 import torch.nn as nn
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 import logging
+import os.path as osp
 import time
 from appfl.misc import create_custom_logger
+from appfl.misc.participation import supports_partial_participation
 from appfl.config import ClientTask
+from .registry import FunctionRegistry
+from .polling import PollScheduler
+from .monitor import EndpointMonitor
 
 class APPFLFuncTrainingEndpoints:
     def __init__(self, cfg: DictConfig, fxc : FuncXClient, logger):
         self.cfg = cfg
         self.fxc = fxc
         self.executing_tasks = {}
+        self.dispatch_time = 0.0  # seconds taken by the last send_task_to_clients
+        self.poll_count = 0  # polls of funcX for the results of the last round
+        self.poll_scheduler = PollScheduler(
+            min_interval = cfg.server.poll_min_interval,
+            max_interval = cfg.server.poll_max_interval,
+        )
+
+        ## Functions are registered once and reused across rounds (and runs, with a cache file)
+        cache = cfg.server.function_cache
+        self.registry = FunctionRegistry(fxc, osp.join(cfg.server.output_dir, cache) if cache else "")
         
         # Logging
         self.logger = logger
-        
-    def send_task_to_clients(self, exct_func, *args, silent = False, **kwargs):
-        ## Register funcX function and create execution batch 
-        func_uuid = self.fxc.register_function(exct_func)
+
+        ## Status of the endpoints, polled in the background, around which the tasks of rounds are routed
+        self.monitor = None
+        if cfg.server.endpoint_status_interval > 0:
+            ## Synchronous rounds routed around an unavailable endpoint leave its clients out
+            if not cfg.asynchronous.enable and not supports_partial_participation(cfg.fed.servername):
+                raise ValueError(
+                    "Routing rounds around unavailable endpoints (server.endpoint_status_interval) requires "
+                    "partial participation, which %s does not support." % cfg.fed.servername
+                )
+            self.monitor = EndpointMonitor(
+                fxc,
+                [client_cfg.endpoint_id for client_cfg in cfg.clients],
+                interval = cfg.server.endpoint_status_interval,
+                max_load = cfg.server.endpoint_max_load,
+                logger   = logger,
+            )
+            self.monitor.start()
+
+    def close(self):
+        if self.monitor is not None:
+            self.monitor.stop()
+
+    def endpoint_of(self, client_idx):
+        return self.cfg.clients[client_idx].endpoint_id
+
+    def route(self, participants, candidates = None):
+        """Participants of a round whose endpoints are available (see ``EndpointMonitor``; all of them without
+        a monitor). The others are replaced by clients among ``candidates`` (all clients by default) on the idlest
+        available endpoints, counting the tasks already routed to them. Without any available client, the
+        participants are returned as they are.
+        """
+        participants = list(participants)
+        candidates   = list(range(len(self.cfg.clients)) if candidates is None else candidates)
+        routed       = Counter()  # tasks routed to every endpoint in this round
+
+        def available(client_idx):
+            endpoint_id = self.endpoint_of(client_idx)
+            return self.monitor is None or self.monitor.available(endpoint_id, routed[endpoint_id] + 1)
+
+        selected = []
+        for client_idx in participants:
+            if client_idx in candidates and available(client_idx):
+                selected.append(client_idx)
+                routed[self.endpoint_of(client_idx)] += 1
+                continue
+            endpoint_id = self.endpoint_of(client_idx)
+            if client_idx not in candidates:
+                reason = "not a candidate"
+            elif not self.monitor.status(endpoint_id).online:
+                reason = "endpoint %s is %s" % (endpoint_id, self.monitor.status(endpoint_id).status)
+            else:
+                reason = "endpoint %s is saturated" % endpoint_id
+            self.logger.info("%s is skipped: %s." % (self.cfg.clients[client_idx].name, reason))
+
+        ## Replacements on the idlest endpoints
+        spare = [c for c in candidates if c not in participants]
+        while len(selected) < len(participants) and len(spare) > 0:
+            if self.monitor is None:
+                client_idx = spare[0]
+            else:
+                ranked = self.monitor.rank([self.endpoint_of(c) for c in spare], routed)
+                if len(ranked) == 0:
+                    break
+                client_idx = next(c for c in spare if self.endpoint_of(c) == ranked[0])
+            spare.remove(client_idx)
+            selected.append(client_idx)
+            routed[self.endpoint_of(client_idx)] += 1
+            self.logger.info("%s replaces a skipped participant." % self.cfg.clients[client_idx].name)
+
+        if len(selected) == 0:
+            self.logger.warning("No endpoint of the participants is available; sending them their tasks anyway.")
+            return participants
+        return sorted(selected)
+
+    def is_available(self, client_idx):
+        return self.monitor is None or self.monitor.available(self.endpoint_of(client_idx))
+
+    def send_task_to_clients(self, exct_func, *args, silent = False, participants = None, client_kwargs = None, **kwargs):
+        """Run ``exct_func(cfg, client_idx, *args, **kwargs)`` at the endpoints of the participants (all clients by
+        default); ``client_kwargs`` maps a client to keyword arguments of its task only (e.g., its local steps).
+        """
+        ## Register funcX function (unless already registered) and create execution batch 
+        dispatch_start = time.time()
+        func_uuid = self.registry.register(exct_func)
         batch     = self.fxc.create_batch()
 
-        for client_idx, client_cfg in enumerate(self.cfg.clients):
+        ## Clients sampled for this round (all clients by default)
+        if participants is None:
+            participants = range(len(self.cfg.clients))
+        participants = list(participants)
+
+        for client_idx in participants:
+            client_cfg = self.cfg.clients[client_idx]
             # select device
             batch.add(
                 self.cfg,
                 client_idx, # TODO: can work with other datasets
                 *args,
                 **kwargs,
+                **(client_kwargs or {}).get(client_idx, {}),
                 endpoint_id = client_cfg.endpoint_id, 
                 function_id = func_uuid)
         
@@ -36,55 +139,119 @@ class APPFLFuncTrainingEndpoints:
         #TODO: Assuming that all tasks do not have the same start time
         start_time= time.time()  
         task_ids  = self.fxc.batch_run(batch)
+        self.dispatch_time = time.time() - dispatch_start
         
         ## Saving task ids 
         for i, task_id in enumerate(task_ids):
             self.executing_tasks[task_ids[i]] =  OmegaConf.structured(ClientTask(
                     task_id    = task_id,
                     task_name  = exct_func.__name__,
-                    client_idx = i,
+                    client_idx = participants[i],
                     start_time = start_time
                 ))
             
         ## Logging
+        self.logger.debug("Task '%s' dispatched to %d clients in %.3f s." % (
+            exct_func.__name__, len(participants), self.dispatch_time))
         if not silent:
-            for task_id in  self.executing_tasks:
+            for task_id in task_ids:
                 self.logger.info("Task '%s' (id: %s) is assigned to %s." %(
                     exct_func.__name__, task_id, 
                     self.cfg.clients[self.executing_tasks[task_id].client_idx].name))
         return self.executing_tasks
 
-    def receive_sync_endpoints_updates(self):
-        stop_aggregate    = False
-        client_results    = OrderedDict()
-        while (not stop_aggregate):
+    def cancel_pending_tasks(self, reason):
+        """Abandon the executing tasks; their results will be dropped."""
+        for task_id in list(self.executing_tasks):
+            self.logger.warning(
+                "Task %s on %s %s; its result is dropped." % (
+                task_id,
+                self.cfg.clients[self.executing_tasks[task_id].client_idx].name,
+                reason)
+            )
+            self.cfg.logging_tasks.append(self.executing_tasks[task_id])
+            self.executing_tasks.pop(task_id)
+
+    def iter_endpoint_updates(self, deadline = 0.0):
+        """Yield ``(client_idx, result)`` of the executing tasks as they complete (result is None on failure).
+        Results are polled at intervals set by ``poll_scheduler``. Tasks sent while iterating are also awaited.
+        With a positive deadline (seconds), the tasks not completed by then are abandoned and their results dropped.
+        With a monitor, the tasks on endpoints not online for ``endpoint_offline_timeout`` seconds are failed.
+        """
+        start_time        = min([task.start_time for task in self.executing_tasks.values()], default = time.time())
+        self.poll_scheduler.start_round()
+        while len(self.executing_tasks) > 0:
+            elapsed = time.time() - start_time
+            if deadline > 0 and elapsed > deadline:
+                self.cancel_pending_tasks("missed the deadline")
+                break
             results = self.fxc.get_batch_result(list(self.executing_tasks))
-            for task_id in results:
-                if results[task_id]['pending'] == False:
-                    self.executing_tasks[task_id].pending = False
-                    self.executing_tasks[task_id].success = True if results[task_id]["status"] == "success" else False
-                    if task_id in self.executing_tasks:
-                        ## Training at client is succeeded
-                        if results[task_id]['status'] == "success": 
-                            client_results[self.executing_tasks[task_id].client_idx] = results[task_id]['result']
-                            self.executing_tasks[task_id].end_time= float(results[task_id]["completion_t"])                         
-                            self.logger.info(
-                            "Task %s on %s completed successfully." % ( 
-                                task_id, 
-                                self.cfg.clients[self.executing_tasks[task_id].client_idx].name)
-                            )
-
-                        else:
-                            # TODO: handling situations when training has errors
-                            client_results[self.executing_tasks[task_id]] = None
-                            self.logger.warning(
-                            "Task %s on %s is failed with an error." % ( 
-                                task_id, 
-                                self.cfg.clients[self.executing_tasks[task_id].client_idx].name)
-                            )
-                    # Save to log file
-                    self.cfg.logging_tasks.append(self.executing_tasks[task_id])
+            completed = [task_id for task_id in results if results[task_id]['pending'] == False]
+            self.poll_scheduler.polled(len(completed))
+            for task_id in completed:
+                task = self.executing_tasks.pop(task_id)
+                task.pending = False
+                task.success = True if results[task_id]["status"] == "success" else False
+                task.end_time = float(results[task_id]["completion_t"])
+                # Save to log file (a copy of the task is appended, so after its end time is set)
+                self.cfg.logging_tasks.append(task)
+                ## Training at client is succeeded
+                if task.success:
+                    self.poll_scheduler.record(task.task_name, task.client_idx, task.end_time - task.start_time)
+                    if self.monitor is not None:
+                        self.monitor.record(self.endpoint_of(task.client_idx), task.end_time - task.start_time)
+                    self.logger.info(
+                    "Task %s on %s completed successfully." % ( 
+                        task_id, 
+                        self.cfg.clients[task.client_idx].name)
+                    )
+                    yield task.client_idx, results[task_id]['result']
+                else:
+                    # TODO: handling situations when training has errors
+                    self.logger.warning(
+                    "Task %s on %s is failed with an error." % ( 
+                        task_id, 
+                        self.cfg.clients[task.client_idx].name)
+                    )
+                    yield task.client_idx, None
+            ## Rounds do not wait for the tasks of endpoints that went down
+            offline_timeout = self.cfg.server.endpoint_offline_timeout
+            if self.monitor is not None and offline_timeout > 0:
+                for task_id in list(self.executing_tasks):
+                    task = self.executing_tasks.get(task_id)
+                    if task is None:
+                        continue
+                    endpoint_id = self.endpoint_of(task.client_idx)
+                    if self.monitor.down_for(endpoint_id) <= offline_timeout:
+                        continue
                     self.executing_tasks.pop(task_id)
-            if len(self.executing_tasks) == 0:
-                stop_aggregate = True
-        return client_results
\ No newline at end of file
+                    task.pending  = False
+                    task.end_time = time.time()
+                    self.cfg.logging_tasks.append(task)
+                    self.logger.warning(
+                    "Task %s on %s is failed: endpoint %s is %s." % (
+                        task_id,
+                        self.cfg.clients[task.client_idx].name,
+                        endpoint_id,
+                        self.monitor.status(endpoint_id).status)
+                    )
+                    yield task.client_idx, None
+            if len(self.executing_tasks) > 0:
+                now = time.time()
+                pending = [
+                    (task.task_name, task.client_idx, now - task.start_time)
+                    for task in self.executing_tasks.values()
+                ]
+                remaining = deadline - (now - start_time) if deadline > 0 else None
+                time.sleep(self.poll_scheduler.next_interval(pending, remaining))
+        self.poll_count = self.poll_scheduler.polls
+        self.logger.debug("Polled funcX %d times for the results of this round." % self.poll_count)
+
+    def receive_sync_endpoints_updates(self, deadline = 0.0):
+        """Wait for the results of executing tasks.
+        With a positive deadline (seconds), the tasks not completed by then are abandoned and their results dropped.
+        """
+        client_results    = OrderedDict()
+        for client_idx, result in self.iter_endpoint_updates(deadline):
+            client_results[client_idx] = result
+        return client_results
@@ -1,6 +1,7 @@
 import torch.nn as nn
 from datetime import datetime
 import os.path as osp
+from .monitor import parse_endpoint_status
 
 def get_model_size(model: nn.Module):
     param_size = 0
@@ -16,10 +17,10 @@ def get_model_size(model: nn.Module):
 def check_endpoint(fxc, endpoints):
     for endpoint in endpoints:
         print("------ Status of Endpoint %s ------" % endpoint)
-        endpoint_status = fxc.get_endpoint_status(endpoint)
-        print("Status       : %s" % endpoint_status['status'])
-        print("Workers      : %s" % endpoint_status['logs'][0]['info']['total_workers'])
-        print("Pending tasks: %s" % endpoint_status['logs'][0]['info']['pending_tasks'])
+        endpoint_status = parse_endpoint_status(endpoint, fxc.get_endpoint_status(endpoint))
+        print("Status       : %s" % endpoint_status.status)
+        print("Workers      : %s" % endpoint_status.total_workers)
+        print("Pending tasks: %s" % endpoint_status.pending_tasks)
 
 def appfl_funcx_save_log(cfg, logger):
     logger.info("-" * 50 + "\n")
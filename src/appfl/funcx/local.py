@@ -0,0 +1,231 @@
+import multiprocessing
+import pickle
+import time
+import traceback
+import uuid
+from concurrent import futures
+
+""" Local stand-in for ``FuncXClient``.
+
+    Endpoints are process pools of this machine: tasks are serialized, delayed by the simulated latency and
+    bandwidth of their endpoint, and run by worker processes that stay alive across tasks (like the workers of
+    a funcX endpoint, so that ``appfl.funcx.cache`` behaves the same). The funcX path of APPFL can then be run,
+    profiled and tested without the funcX service. Functions are serialized by reference, so they must be
+    importable by the workers (e.g., ``client_training``).
+"""
+
+
+def transfer_time(nbytes, latency, bandwidth):
+    """Seconds to send ``nbytes`` over a link of ``latency`` seconds and ``bandwidth`` bytes per second."""
+    return latency + (nbytes / bandwidth if bandwidth > 0 else 0.0)
+
+
+def execute_task(payload, latency, bandwidth):
+    """Run a serialized task in an endpoint worker; the transfers of the task and its result are simulated."""
+    time.sleep(transfer_time(len(payload), latency, bandwidth))
+    try:
+        function, args, kwargs = pickle.loads(payload)
+        result = pickle.dumps(function(*args, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        status = "success"
+    except Exception:
+        result = traceback.format_exc()
+        status = "failed"
+    if status == "success":
+        time.sleep(transfer_time(len(result), latency, bandwidth))
+    return status, result, time.time()
+
+
+def copy_outcome(source, target):
+    """Resolve the future ``target`` like ``source`` once it is done."""
+
+    def copy(source):
+        if source.cancelled():
+            target.cancel()
+        elif source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+
+    source.add_done_callback(copy)
+
+
+class LocalEndpoint:
+    """Process pool standing in for a funcX endpoint.
+
+    Args:
+        num_workers (int): worker processes of the endpoint
+        latency (float): one-way latency (seconds) between the service and the endpoint
+        bandwidth (float): bytes per second between the service and the endpoint (0: unlimited)
+        mp_context (str): start method of the workers
+        online (bool): whether the endpoint runs tasks; the tasks sent to an offline endpoint wait for it
+    """
+
+    def __init__(self, num_workers=1, latency=0.0, bandwidth=0.0, mp_context="spawn", online=True):
+        self.num_workers = num_workers
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.mp_context = mp_context
+        self.executor = None
+        self.futures = set()
+        self.online = online
+        self.queued = []
+
+    def submit(self, payload):
+        if not self.online:
+            future = futures.Future()
+            self.queued.append((future, payload))
+            self.futures.add(future)
+            future.add_done_callback(self.futures.discard)
+            return future
+        if self.executor is None:
+            self.executor = futures.ProcessPoolExecutor(
+                self.num_workers, mp_context=multiprocessing.get_context(self.mp_context)
+            )
+        future = self.executor.submit(execute_task, payload, self.latency, self.bandwidth)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+        return future
+
+    def set_online(self, online):
+        """Take the endpoint offline or back online, where the tasks sent meanwhile start running."""
+        self.online = online
+        while self.online and self.queued:
+            future, payload = self.queued.pop(0)
+            self.futures.discard(future)
+            copy_outcome(self.submit(payload), future)
+
+    def status(self):
+        return {
+            "status": "online" if self.online else "offline",
+            "logs": [
+                {
+                    "info": {
+                        "total_workers": self.num_workers if self.online else 0,
+                        "pending_tasks": len(self.futures),
+                    }
+                }
+            ],
+        }
+
+    def shutdown(self):
+        for future, _ in self.queued:
+            future.cancel()
+        self.queued = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+class LocalBatch:
+    def __init__(self):
+        self.tasks = []
+
+    def add(self, *args, endpoint_id=None, function_id=None, **kwargs):
+        self.tasks.append((endpoint_id, function_id, args, kwargs))
+
+
+class LocalFuncXClient:
+    """Drop-in replacement of ``FuncXClient`` running the tasks in local process pools.
+
+    Args:
+        endpoints (Dict): ``LocalEndpoint`` (or its keyword arguments) by endpoint ID; other endpoint IDs get
+            an endpoint with the defaults below
+        num_workers (int): default worker processes per endpoint
+        latency (float): default one-way latency (seconds)
+        bandwidth (float): default bytes per second (0: unlimited)
+        mp_context (str): start method of the workers
+    """
+
+    def __init__(
+        self, endpoints=None, num_workers=1, latency=0.0, bandwidth=0.0, mp_context="spawn"
+    ):
+        self.defaults = dict(
+            num_workers=num_workers,
+            latency=latency,
+            bandwidth=bandwidth,
+            mp_context=mp_context,
+        )
+        self.endpoints = {}
+        for endpoint_id, endpoint in (endpoints or {}).items():
+            if isinstance(endpoint, dict):
+                endpoint = LocalEndpoint(**{**self.defaults, **endpoint})
+            self.endpoints[endpoint_id] = endpoint
+        ## Functions only exist in this client, so registrations cached by other clients are not valid here
+        self.funcx_service_address = "local://%s" % uuid.uuid4()
+        self.functions = {}
+        self.tasks = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.num_polls = 0
+        self.num_status_polls = 0
+
+    def endpoint(self, endpoint_id):
+        if endpoint_id not in self.endpoints:
+            self.endpoints[endpoint_id] = LocalEndpoint(**self.defaults)
+        return self.endpoints[endpoint_id]
+
+    def register_function(self, function, *args, **kwargs):
+        function_id = str(uuid.uuid4())
+        self.functions[function_id] = function
+        return function_id
+
+    def create_batch(self):
+        return LocalBatch()
+
+    def batch_run(self, batch):
+        task_ids = []
+        for endpoint_id, function_id, args, kwargs in batch.tasks:
+            payload = pickle.dumps(
+                (self.functions[function_id], args, kwargs),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            self.bytes_sent += len(payload)
+            task_id = str(uuid.uuid4())
+            self.tasks[task_id] = self.endpoint(endpoint_id).submit(payload)
+            task_ids.append(task_id)
+        return task_ids
+
+    def get_batch_result(self, task_ids):
+        self.num_polls += 1
+        results = {}
+        for task_id in task_ids:
+            if not self.tasks[task_id].done():
+                results[task_id] = {"pending": True, "status": "running"}
+            else:
+                ## Like the funcX service, a result is dropped once it is fetched
+                results[task_id] = self.task_result(self.tasks.pop(task_id))
+        return results
+
+    def task_result(self, future):
+        try:
+            status, result, completion_t = future.result()
+        except Exception:  # e.g., a worker was killed
+            status, result, completion_t = "failed", traceback.format_exc(), time.time()
+        if status == "success":
+            self.bytes_received += len(result)
+            return {
+                "pending": False,
+                "status": "success",
+                "result": pickle.loads(result),
+                "completion_t": str(completion_t),
+            }
+        return {
+            "pending": False,
+            "status": "failed",
+            "exception": result,
+            "completion_t": str(completion_t),
+        }
+
+    def get_endpoint_status(self, endpoint_id):
+        self.num_status_polls += 1
+        return self.endpoint(endpoint_id).status()
+
+    def close(self):
+        for endpoint in self.endpoints.values():
+            endpoint.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class EndpointStatus:
+    endpoint_id: str
+    status: str = "unknown"  # "online", "offline", ..., or "unreachable" if the status could not be polled
+    total_workers: int = 0
+    pending_tasks: int = 0
+    updated: float = 0.0  # time of the poll
+    down_since: float = 0.0  # time since which the endpoint is not online (0: online)
+
+    @property
+    def online(self) -> bool:
+        return self.status == "online"
+
+
+def parse_endpoint_status(endpoint_id, response, updated=None) -> EndpointStatus:
+    """``EndpointStatus`` of a response of ``FuncXClient.get_endpoint_status``; its first log is the latest."""
+    logs = response.get("logs") or [{}]
+    info = logs[0].get("info") or {}
+    return EndpointStatus(
+        endpoint_id,
+        status=response.get("status", "unknown"),
+        total_workers=int(info.get("total_workers") or 0),
+        pending_tasks=int(info.get("pending_tasks") or 0),
+        updated=time.time() if updated is None else updated,
+    )
+
+
+class EndpointMonitor:
+    """Cached status of funcX endpoints, polled on a background thread, for the dispatch of tasks.
+
+    A status is a round trip to the funcX service, so the endpoints are polled every ``interval`` seconds by a
+    daemon thread (``start``) and the dispatch only reads the last status of every endpoint. An endpoint is
+    available if it is online and can take another task with at most ``max_load`` pending tasks per worker
+    (endpoints may scale their workers down to zero while idle, so an idle endpoint counts one worker). The
+    durations of the tasks completed on every endpoint are recorded too, and the available endpoints are ranked by
+    load, then by the median duration of their tasks (``rank``).
+
+    Args:
+        fxc (FuncXClient): funcX client
+        endpoints (List): IDs of the endpoints polled in the background
+        interval (float): seconds between polls
+        max_load (float): pending tasks per worker above which an endpoint is saturated (0: no limit)
+        history (int): task durations kept per endpoint
+        logger (logging.Logger): logger of the changes of status
+    """
+
+    def __init__(self, fxc, endpoints, interval=30.0, max_load=0.0, history=5, logger=None):
+        self.fxc = fxc
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.interval = interval
+        self.max_load = max_load
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        ## Statuses are replaced, never changed in place, so that they can be read while the thread polls
+        self.statuses = {}
+        self.durations = defaultdict(lambda: deque(maxlen=history))
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def poll(self, endpoint_id) -> EndpointStatus:
+        """Poll the status of an endpoint and cache it."""
+        try:
+            status = parse_endpoint_status(endpoint_id, self.fxc.get_endpoint_status(endpoint_id))
+        except Exception as e:
+            self.logger.debug("Status of endpoint %s could not be polled: %s" % (endpoint_id, e))
+            status = EndpointStatus(endpoint_id, status="unreachable", updated=time.time())
+        previous = self.statuses.get(endpoint_id)
+        if not status.online:
+            status.down_since = (
+                previous.down_since if previous is not None and not previous.online else status.updated
+            )
+        if previous is None or previous.status != status.status:
+            log = self.logger.info if status.online else self.logger.warning
+            log("Endpoint %s is %s (%d workers, %d pending tasks)." % (
+                endpoint_id, status.status, status.total_workers, status.pending_tasks))
+        self.statuses[endpoint_id] = status
+        return status
+
+    def refresh(self):
+        for endpoint_id in self.endpoints:
+            self.poll(endpoint_id)
+
+    def start(self):
+        """Poll the endpoints now, then every ``interval`` seconds on a daemon thread."""
+        self.refresh()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name="appfl-endpoint-monitor", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.refresh()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def status(self, endpoint_id) -> EndpointStatus:
+        """Last status of an endpoint (polled now if it never was)."""
+        status = self.statuses.get(endpoint_id)
+        return status if status is not None else self.poll(endpoint_id)
+
+    def load(self, endpoint_id, extra_tasks=0) -> float:
+        """Pending tasks per worker of an endpoint, with ``extra_tasks`` more tasks."""
+        status = self.status(endpoint_id)
+        return (status.pending_tasks + extra_tasks) / max(status.total_workers, 1)
+
+    def saturated(self, endpoint_id, extra_tasks=0) -> bool:
+        return self.max_load > 0 and self.load(endpoint_id, extra_tasks) > self.max_load
+
+    def available(self, endpoint_id, extra_tasks=1) -> bool:
+        """Whether an endpoint is online and can take ``extra_tasks`` more tasks without being saturated."""
+        return self.status(endpoint_id).online and not self.saturated(endpoint_id, extra_tasks)
+
+    def down_for(self, endpoint_id, now=None) -> float:
+        """Seconds for which an endpoint has been reported not online (0 if online)."""
+        status = self.status(endpoint_id)
+        if status.online:
+            return 0.0
+        return (time.time() if now is None else now) - status.down_since
+
+    def record(self, endpoint_id, duration):
+        self.durations[endpoint_id].append(duration)
+
+    def latency(self, endpoint_id):
+        """Median duration of the recent tasks of an endpoint, or None without records."""
+        durations = self.durations.get(endpoint_id)
+        if not durations:
+            return None
+        return float(np.median(durations))
+
+    def rank(self, endpoint_ids, routed=None):
+        """Endpoints among ``endpoint_ids`` that can take one more task, idlest first.
+
+        Args:
+            endpoint_ids (List): endpoint IDs
+            routed (Dict): tasks already routed to the endpoints, counted on top of their pending tasks
+        """
+        routed = routed or {}
+        available = [e for e in dict.fromkeys(endpoint_ids) if self.available(e, routed.get(e, 0) + 1)]
+        ## Without records, a task is assumed to take no time
+        return sorted(
+            available, key=lambda e: (self.load(e, routed.get(e, 0)), self.latency(e) or 0.0)
+        )
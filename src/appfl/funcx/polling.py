@@ -0,0 +1,77 @@
+import random
+from collections import defaultdict, deque
+
+import numpy as np
+
+
+class PollScheduler:
+    """Intervals between polls of the results of funcX tasks.
+
+    While a task is predicted to run for a while (by the median duration of its last runs on the same client),
+    the next poll waits for its predicted completion. Past the prediction, or without history, polls start at
+    ``min_interval`` and back off exponentially until a result arrives. Every interval is randomized by
+    ``jitter`` so that servers do not poll in lockstep.
+
+    Args:
+        min_interval (float): first interval (seconds) after a result or a predicted completion
+        max_interval (float): longest interval (seconds)
+        backoff (float): factor of the interval after a poll without results
+        jitter (float): relative randomization of the intervals
+        history (int): durations kept per task name and client
+    """
+
+    def __init__(
+        self, min_interval=0.5, max_interval=30.0, backoff=2.0, jitter=0.1, history=5
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.durations = defaultdict(lambda: deque(maxlen=history))
+        self.interval = min_interval
+        self.polls = 0
+
+    def start_round(self):
+        self.interval = self.min_interval
+        self.polls = 0
+
+    def record(self, task_name, client_idx, duration):
+        self.durations[(task_name, client_idx)].append(duration)
+
+    def predict(self, task_name, client_idx):
+        """Predicted duration of a task on a client, or None without history."""
+        durations = self.durations.get((task_name, client_idx))
+        if not durations:
+            return None
+        return float(np.median(durations))
+
+    def polled(self, num_completed):
+        """Account for a poll that returned ``num_completed`` results."""
+        self.polls += 1
+        if num_completed > 0:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def next_interval(self, pending, remaining=None):
+        """Seconds to wait before the next poll.
+
+        Args:
+            pending (List): ``(task_name, client_idx, elapsed)`` of the tasks not completed yet, with the
+                seconds since each task started
+            remaining (float): seconds left until the deadline, if any
+        """
+        interval = self.interval
+        predictions = [
+            self.predict(task_name, client_idx) for task_name, client_idx, _ in pending
+        ]
+        if len(predictions) > 0 and all(p is not None for p in predictions):
+            interval = max(
+                interval,
+                min(p - elapsed for p, (_, _, elapsed) in zip(predictions, pending)),
+            )
+        interval = min(interval, self.max_interval)
+        interval *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        if remaining is not None:
+            interval = min(interval, remaining)
+        return max(interval, 0.0)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import types
+
+
+def _hash_value(digest, value):
+    if isinstance(value, types.CodeType):
+        _hash_code(digest, value)
+    elif isinstance(value, types.FunctionType):
+        digest.update(function_hash(value).encode())
+    elif isinstance(value, (set, frozenset)):
+        _hash_value(digest, sorted(value, key=repr))
+    elif isinstance(value, (tuple, list)):
+        digest.update(b"(")
+        for item in value:
+            _hash_value(digest, item)
+        digest.update(b")")
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            digest.update(repr(value).encode())
+
+
+def _hash_code(digest, code):
+    digest.update(code.co_name.encode())
+    digest.update(code.co_code)
+    for names in (code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars):
+        digest.update(repr(names).encode())
+    _hash_value(digest, code.co_consts)
+
+
+def function_hash(func) -> str:
+    """Hash of the code of ``func``, including nested functions, default arguments and closure variables."""
+    digest = hashlib.sha256()
+    digest.update(("%s.%s" % (func.__module__, func.__qualname__)).encode())
+    _hash_code(digest, func.__code__)
+    _hash_value(digest, func.__defaults__)
+    _hash_value(digest, sorted((func.__kwdefaults__ or {}).items()))
+    for cell in func.__closure__ or ():
+        try:
+            _hash_value(digest, cell.cell_contents)
+        except ValueError:  # empty cell
+            digest.update(b"<empty>")
+    return digest.hexdigest()
+
+
+class FunctionRegistry:
+    """Register functions with funcX once per deployment.
+
+    The funcX function IDs are kept in a JSON file by hash of the function code, so that a function is
+    registered (and its body uploaded) again only when its code changes, not every round or every run.
+
+    Args:
+        fxc (FuncXClient): client of the funcX service
+        path (str): JSON file of the registrations ("": kept in memory only)
+    """
+
+    def __init__(self, fxc, path=""):
+        self.fxc = fxc
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        ## Functions registered with another funcX service are not valid here.
+        self.service = getattr(fxc, "funcx_service_address", "") or ""
+        self.function_ids = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.function_ids = json.load(f)
+
+    def key(self, func):
+        return self.service + "#" + function_hash(func)
+
+    def register(self, func) -> str:
+        """Return the funcX function ID of ``func``, registering it if its code is new."""
+        key = self.key(func)
+        with self.lock:
+            if key in self.function_ids:
+                return self.function_ids[key]
+            function_id = self.fxc.register_function(func)
+            self.function_ids[key] = function_id
+            self.save()
+        self.logger.info("Registered function '%s' (id: %s)." % (func.__name__, function_id))
+        return function_id
+
+    def forget(self, func):
+        """Drop the registration of ``func`` (e.g., deleted from the service), so that it is registered again."""
+        with self.lock:
+            if self.function_ids.pop(self.key(func), None) is not None:
+                self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.function_ids, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import os
+import uuid
+from collections import OrderedDict
+
+import torch
+
+""" Content-addressed store of global models.
+
+    The server writes the global model of a round once, and the funcX tasks carry a ``ModelHandle`` (the store
+    and the hash of the model) instead of the model itself. Endpoints fetch the model and verify its hash.
+    Endpoints can also return their (encoded) updates through the store as blobs.
+"""
+
+
+class ModelHandle:
+    """Reference to a model in a store, passed to funcX tasks instead of the model.
+
+    Args:
+        store (ModelStore): store holding the model
+        key (str): SHA-256 of the serialized model
+        nbytes (int): size of the serialized model
+    """
+
+    def __init__(self, store, key, nbytes):
+        self.store = store
+        self.key = key
+        self.nbytes = nbytes
+
+    def load(self):
+        return self.store.get(self)
+
+    def load_bytes(self):
+        return self.store.get_blob(self)
+
+    def __repr__(self):
+        return "ModelHandle(%s, %s, %d bytes)" % (self.store, self.key, self.nbytes)
+
+
+class ModelStore:
+    """Base class of the stores; subclasses implement ``put_bytes``, ``get_bytes``, ``exists`` and ``remove``.
+
+    The instances are serialized with the handles, so they should only hold what endpoints need to reach the
+    store (e.g., a path or a bucket name).
+    """
+
+    def put_bytes(self, key, data):
+        raise NotImplementedError
+
+    def get_bytes(self, key):
+        raise NotImplementedError
+
+    def exists(self, key) -> bool:
+        raise NotImplementedError
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def put_blob(self, data) -> ModelHandle:
+        """Write ``data`` (unless identical bytes are stored) and return its handle."""
+        key = hashlib.sha256(data).hexdigest()
+        if not self.exists(key):
+            self.put_bytes(key, data)
+        return ModelHandle(self, key, len(data))
+
+    def get_blob(self, handle) -> bytes:
+        data = self.get_bytes(handle.key)
+        if hashlib.sha256(data).hexdigest() != handle.key:
+            raise ValueError("Model %s is corrupted in %s" % (handle.key, self))
+        return data
+
+    def put(self, state) -> ModelHandle:
+        """Write ``state`` (unless an identical one is stored) and return its handle."""
+        buffer = io.BytesIO()
+        torch.save(OrderedDict((k, v.cpu()) for k, v in state.items()), buffer)
+        return self.put_blob(buffer.getvalue())
+
+    def get(self, handle):
+        return torch.load(io.BytesIO(self.get_blob(handle)))
+
+
+class LocalDirectoryStore(ModelStore):
+    """Store of models as files of a directory, shared with the endpoints (e.g., on a shared filesystem).
+
+    Args:
+        root (str): directory of the models
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key + ".pt")
+
+    def put_bytes(self, key, data):
+        tmp_path = self.path(key) + ".%s.tmp" % uuid.uuid4().hex
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(key))
+
+    def get_bytes(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key) -> bool:
+        return os.path.exists(self.path(key))
+
+    def remove(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return "LocalDirectoryStore(%s)" % self.root
+
+
+def create_model_store(cfg):
+    """Store of the global models of a funcX run, or None to send the models in the tasks."""
+    if not cfg.server.model_store:
+        return None
+    return LocalDirectoryStore(cfg.server.model_store)
+
+
+def load_global_state(global_state):
+    """Global model passed to a task, fetched from its store if given by a handle."""
+    if isinstance(global_state, ModelHandle):
+        return global_state.load()
+    return global_state
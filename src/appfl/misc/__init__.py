@@ -1,2 +1,4 @@
 from .data import *
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .participation import *
+from .pipeline import *
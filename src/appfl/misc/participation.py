@@ -0,0 +1,83 @@
+import copy
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ClientSampler:
+    """Seeded per-round sampling of the clients participating in a round.
+
+    The participants of a round depend only on ``seed`` and the round number,
+    so that every process (e.g., MPI ranks) draws the same participants without communication.
+
+    Args:
+        num_clients (int): the number of clients
+        fraction (float): fraction of clients participating in each round
+        count (int): the number of clients participating in each round; overrides ``fraction`` if positive
+        seed (int): random seed
+    """
+
+    def __init__(self, num_clients: int, fraction: float = 1.0, count: int = 0, seed: int = 0):
+        self.num_clients = num_clients
+        self.seed = seed
+        if count <= 0:
+            count = int(round(fraction * num_clients))
+        self.count = min(max(count, 1), num_clients)
+
+    def sample(self, round_number: int):
+        if self.count == self.num_clients:
+            return list(range(self.num_clients))
+        rng = np.random.default_rng([self.seed, round_number])
+        return sorted(
+            rng.choice(self.num_clients, size=self.count, replace=False).tolist()
+        )
+
+
+def create_client_sampler(cfg, num_clients: int) -> ClientSampler:
+    return ClientSampler(
+        num_clients,
+        fraction=cfg.participation.fraction,
+        count=cfg.participation.num_clients,
+        seed=cfg.participation.seed,
+    )
+
+
+def check_partial_participation(server):
+    """Partial participation renormalizes the aggregation weights, which only FedServer-based algorithms use."""
+    from appfl.algorithm import FedServer
+
+    if not isinstance(server, FedServer):
+        raise NotImplementedError(
+            "Partial participation is not supported by %s" % type(server).__name__
+        )
+
+
+def supports_partial_participation(servername: str) -> bool:
+    """Whether the algorithm named ``servername`` (e.g., ``cfg.fed.servername``) supports partial participation."""
+    from appfl import algorithm
+
+    server_class = getattr(algorithm, servername, None)
+    return isinstance(server_class, type) and issubclass(server_class, algorithm.FedServer)
+
+
+def renormalize_weights(weights, participants):
+    """Aggregation weights renormalized over the participants; zero for the others."""
+    total = sum(weights[c] for c in participants)
+    return OrderedDict(
+        (c, weights[c] / total if c in participants else 0.0) for c in weights
+    )
+
+
+def absent_states(global_state, participants, num_clients: int):
+    """Local states of the clients absent from a round.
+
+    Absent clients hand back the global model; with zero weight they do not move the global model.
+    """
+    states = OrderedDict()
+    for c in range(num_clients):
+        if c not in participants:
+            states[c] = OrderedDict()
+            states[c]["primal"] = copy.deepcopy(global_state)
+            states[c]["dual"] = OrderedDict()
+            states[c]["penalty"] = OrderedDict({c: 0.0})
+    return states
@@ -0,0 +1,104 @@
+import copy
+import time
+from concurrent import futures
+
+from omegaconf import DictConfig
+
+from .utils import validation, save_model_iteration
+
+
+def server_snapshot(server):
+    """Copy of ``server`` for the end of a round: its own model, and the statistics the next round changes in place."""
+    snapshot = copy.copy(server)
+    snapshot.model = copy.deepcopy(server.model)
+    snapshot.penalty = copy.copy(server.penalty)
+    return snapshot
+
+
+class RoundFinisher:
+    """Validation, tensorboard, logging and checkpointing at the end of the rounds of a server.
+
+    With ``cfg.pipeline_validation``, a round is finished on a background thread against a snapshot of the
+    server (and of ``cfg.logginginfo``), so that the next round is dispatched while the global model of the
+    last one is validated. A round waits for the previous one to be finished before it is queued, so that a
+    single snapshot is kept. The results of the last finished round are written to ``cfg.logginginfo``
+    by ``close``.
+
+    Args:
+        cfg (DictConfig): configuration of the run
+        logger (logging.Logger): logger of the server
+        test_dataloader (DataLoader): validation data, if ``cfg.validation``
+        writer (SummaryWriter): tensorboard writer, if ``cfg.use_tensorboard``
+        start_time (float): start of the training, for ``Elapsed_time``
+    """
+
+    def __init__(self, cfg: DictConfig, logger, test_dataloader=None, writer=None, start_time=None):
+        self.cfg = cfg
+        self.logger = logger
+        self.test_dataloader = test_dataloader
+        self.writer = writer
+        self.start_time = time.time() if start_time is None else start_time
+        self.test_loss = 0.0
+        self.test_accuracy = 0.0
+        self.best_accuracy = 0.0
+        self.logginginfo = None
+        self.executor = None
+        self.future = None
+        if cfg.pipeline_validation:
+            self.executor = futures.ThreadPoolExecutor(1, thread_name_prefix="appfl-finish")
+
+    def finish(self, t, server, per_iter_start):
+        """Finish round ``t`` (0-based) of ``server``, started at ``per_iter_start``."""
+        if self.executor is None:
+            self.run(t, server, self.cfg, per_iter_start)
+            return
+        self.wait()
+        ## The next round changes the model and the timings of the configuration
+        cfg = copy.copy(self.cfg)
+        cfg["logginginfo"] = copy.deepcopy(self.cfg["logginginfo"])
+        self.future = self.executor.submit(
+            self.run, t, server_snapshot(server), cfg, per_iter_start
+        )
+
+    def run(self, t, server, cfg, per_iter_start):
+        validation_start = time.time()
+        if cfg.validation == True:
+            self.test_loss, self.test_accuracy = validation(server, self.test_dataloader)
+
+            if cfg.use_tensorboard:
+                # Add them to tensorboard
+                self.writer.add_scalar("server_test_accuracy", self.test_accuracy, t)
+                self.writer.add_scalar("server_test_loss", self.test_loss, t)
+
+            if self.test_accuracy > self.best_accuracy:
+                self.best_accuracy = self.test_accuracy
+
+        cfg["logginginfo"]["Validation_time"] = time.time() - validation_start
+        cfg["logginginfo"]["PerIter_time"] = time.time() - per_iter_start
+        cfg["logginginfo"]["Elapsed_time"] = time.time() - self.start_time
+        cfg["logginginfo"]["test_loss"] = self.test_loss
+        cfg["logginginfo"]["test_accuracy"] = self.test_accuracy
+        cfg["logginginfo"]["BestAccuracy"] = self.best_accuracy
+        self.logginginfo = cfg["logginginfo"]
+
+        server.logging_iteration(cfg, self.logger, t)
+
+        """ Saving model """
+        if (t + 1) % cfg.checkpoints_interval == 0 or t + 1 == cfg.num_epochs:
+            if cfg.save_model == True:
+                save_model_iteration(t + 1, server.model, cfg)
+
+    def wait(self):
+        """Wait until the queued round is finished (raising its error, if any)."""
+        if self.future is not None:
+            future, self.future = self.future, None
+            future.result()
+
+    def close(self):
+        self.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            if self.logginginfo is not None:
+                for key, value in self.logginginfo.items():
+                    self.cfg["logginginfo"][key] = value
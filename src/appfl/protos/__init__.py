@@ -3,5 +3,7 @@ This module provides communication protocols.
 """
 from .operator import *
 from .server import *
+from .aio_server import *
 from .client import *
 from .utils import *
+from .schema import *
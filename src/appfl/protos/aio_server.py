@@ -0,0 +1,323 @@
+import asyncio
+from concurrent import futures
+import logging
+import time
+
+import grpc
+from .federated_learning_pb2 import Header
+from .federated_learning_pb2 import MessageStatus
+from .federated_learning_pb2 import JobResponse
+from .federated_learning_pb2 import WeightResponse
+from .federated_learning_pb2 import LearningResults
+from .federated_learning_pb2 import Acknowledgment
+from .federated_learning_pb2 import SegmentHandle
+from .federated_learning_pb2 import UploadAck
+from .upload import UploadError
+from .operator import InvalidResults
+from . import utils
+from . import federated_learning_pb2_grpc
+
+
+class AioFLServicer(federated_learning_pb2_grpc.FederatedLearningServicer):
+    """Servicer for ``grpc.aio`` serving every RPC on a single event loop.
+
+    Waiting clients (long-polling ``GetJob``/``GetWeight``) and incoming ``SendLearningResults`` streams
+    cost no thread, so the number of concurrent clients is not bounded by a thread pool.
+    Parsing uploads and the aggregation triggered by the last upload of a round run in a bounded executor
+    so that the event loop never blocks on torch work.
+
+    Args:
+        servicer_id (int): servicer ID
+        port (str): port number to listen to
+        operator (FLOperator): operator holding the federated learning state
+        max_workers (int): number of threads processing uploaded results
+    """
+
+    def __init__(self, servicer_id, port, operator, max_workers=1):
+        self.servicer_id = servicer_id
+        self.port = port
+        self.operator = operator
+        self.logger = logging.getLogger(__name__)
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.loop = None
+        self.job_event = None
+        self.operator.add_job_listener(self.on_job_change)
+
+    def attach(self, loop):
+        self.loop = loop
+        self.job_event = asyncio.Event()
+
+    """
+    Called by the operator (from any thread) whenever the job of clients may have changed.
+    """
+
+    def on_job_change(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wake_up_waiters)
+
+    def wake_up_waiters(self):
+        self.job_event.set()
+        self.job_event = asyncio.Event()
+
+    async def wait_for(self, predicate, timeout):
+        """Wait until ``predicate()`` holds or ``timeout`` seconds pass; returns the last value of the predicate."""
+        deadline = self.loop.time() + timeout
+        while not predicate():
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self.job_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return predicate()
+        return True
+
+    async def GetJob(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received JobRequest from client %d job_done %d",
+            request.header.client_id,
+            request.job_done,
+        )
+        timed_out = False
+        if request.wait_timeout > 0:
+            timed_out = not await self.wait_for(
+                lambda: self.operator.has_new_job(
+                    request.round_number, request.header.client_id
+                ),
+                request.wait_timeout,
+            )
+        round_number, job_todo = self.operator.current_job(
+            request.header.client_id, timed_out
+        )
+        return JobResponse(
+            header=request.header,
+            round_number=round_number,
+            job_todo=job_todo,
+            results_missing=self.operator.results_missing(
+                request.header.client_id, request.round_number
+            ),
+        )
+
+    async def GetTensorRecord(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received TensorRequest from (client,name,round)=(%d,%s,%d)",
+            request.header.client_id,
+            request.name,
+            request.round_number,
+        )
+        # Tensors are copied and serialized off the event loop.
+        return await self.run_in_executor(
+            self.tensor_record, request.name, request.round_number
+        )
+
+    def tensor_record(self, name, round_number):
+        nparray = self.operator.get_tensor(name, round_number)
+        return utils.construct_tensor_record(name, nparray)
+
+    async def GetWeight(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received WeightRequest from (client,size)=(%d,%d)",
+            request.header.client_id,
+            request.size,
+        )
+        # The operator takes its (blocking) lock, and may compute the weights, off the event loop.
+        weight = await self.run_in_executor(
+            self.operator.get_weight, request.header.client_id, request.size
+        )
+        if weight < 0.0 and request.wait_timeout > 0:
+            await self.wait_for(
+                self.operator.all_weights_received, request.wait_timeout
+            )
+            weight = self.operator.client_weights.get(request.header.client_id, -1.0)
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] get_weight returns %e", weight
+        )
+        return WeightResponse(header=request.header, weight=weight)
+
+    async def SendLearningResults(self, request_iterator, context):
+        chunks = []
+        async for request in request_iterator:
+            chunks.append(request.data_bytes)
+        bytes_received = b"".join(chunks)
+
+        status = MessageStatus.EMPTY
+        header = Header()
+        if len(bytes_received) > 0:
+            status = MessageStatus.OK
+            try:
+                header = await self.run_in_executor(
+                    self.receive_learning_results, bytes_received
+                )
+            except InvalidResults as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return Acknowledgment(header=header, status=status)
+
+    async def run_in_executor(self, function, *args):
+        submitted = time.perf_counter()
+
+        def run():
+            self.operator.metrics.observe(
+                "executor_wait_seconds", time.perf_counter() - submitted
+            )
+            return function(*args)
+
+        return await self.loop.run_in_executor(self.executor, run)
+
+    def receive_learning_results(self, bytes_received):
+        proto = LearningResults()
+        proto.ParseFromString(bytes_received)
+        self.operator.send_learning_results(
+            proto.header.client_id,
+            proto.round_number,
+            proto.penalty,
+            proto.primal,
+            proto.dual,
+            proto.primal_quantized,
+            proto.schema_hash,
+            proto.primal_bytes,
+            proto.dual_bytes,
+            proto.primal_segment,
+            proto.dual_segment,
+        )
+        return proto.header
+
+    """
+    Resumable uploads: every chunk is acknowledged with the offset committed so far.
+    """
+
+    async def UploadLearningResults(self, request_iterator, context):
+        async for chunk in request_iterator:
+            # The first chunk of an upload allocates its buffer: keep it off the event loop.
+            try:
+                committed, bytes_received = await self.run_in_executor(
+                    self.operator.uploads.write,
+                    chunk.header.client_id,
+                    chunk.upload_id,
+                    chunk.offset,
+                    chunk.total_size,
+                    chunk.data_bytes,
+                )
+            except UploadError as e:
+                await context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+            if bytes_received is not None:
+                await self.receive_upload(chunk, bytes_received, context)
+            yield UploadAck(
+                header=chunk.header,
+                upload_id=chunk.upload_id,
+                committed_offset=committed,
+                complete=committed == chunk.total_size,
+                status=MessageStatus.OK,
+            )
+
+    """
+    Process a completed upload. If its results cannot be processed, the upload is discarded, so that the
+    client sends it again from the start, and the client is told why.
+    """
+
+    async def receive_upload(self, chunk, bytes_received, context):
+        try:
+            await self.run_in_executor(self.receive_learning_results, bytes_received)
+            return
+        except InvalidResults as e:
+            code, error = grpc.StatusCode.INVALID_ARGUMENT, e
+        except Exception as e:
+            self.logger.exception(
+                f"[Servicer ID: {self.servicer_id: 03}] Failed to process upload %s of client %d",
+                chunk.upload_id,
+                chunk.header.client_id,
+            )
+            code, error = grpc.StatusCode.INTERNAL, e
+        self.operator.uploads.discard(chunk.header.client_id, chunk.upload_id)
+        await context.abort(code, "Upload %s: %s" % (chunk.upload_id, error))
+
+    async def ResumeUpload(self, request, context):
+        committed, complete = self.operator.uploads.status(
+            request.header.client_id, request.upload_id
+        )
+        return UploadAck(
+            header=request.header,
+            upload_id=request.upload_id,
+            committed_offset=committed,
+            complete=complete,
+            status=MessageStatus.OK,
+        )
+
+    async def GetSchema(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received SchemaRequest from client %d",
+            request.header.client_id,
+        )
+        proto = self.operator.schema.to_proto(request.header)
+        proto.shared_memory = self.operator.accepts_shared_memory(request.hostname)
+        return proto
+
+    async def GetModelSegment(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received ModelRequest (shared memory) from (client,round)=(%d,%d)",
+            request.header.client_id,
+            request.round_number,
+        )
+        if not self.operator.use_shared_memory:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION, "Shared memory is disabled"
+            )
+        return SegmentHandle(
+            header=request.header,
+            name=self.operator.get_model_segment(request.round_number),
+            size=self.operator.schema.total_bytes,
+            round_number=request.round_number,
+            schema_hash=self.operator.schema.hash,
+        )
+
+    async def GetModel(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received ModelRequest from (client,round)=(%d,%d)",
+            request.header.client_id,
+            request.round_number,
+        )
+        if request.schema_hash != self.operator.schema.hash:
+            await context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION, "Model schema does not match"
+            )
+        data_bytes = self.operator.get_model_bytes(request.round_number)
+        for chunk in utils.bytes_to_databuffer(data_bytes):
+            yield chunk
+
+
+async def start_async_server(
+    servicer, max_message_size=2 * 1024 * 1024, uds_path="", interceptors=()
+):
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        options=[
+            ("grpc.max_send_message_length", max_message_size),
+            ("grpc.max_receive_message_length", max_message_size),
+        ],
+    )
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        servicer, server
+    )
+    server.add_insecure_port("[::]:" + servicer.port)
+    if uds_path:
+        server.add_insecure_port("unix:" + uds_path)
+    servicer.attach(asyncio.get_running_loop())
+    await server.start()
+    return server
+
+
+def serve_async(
+    servicer, max_message_size=2 * 1024 * 1024, uds_path="", interceptors=()
+):
+    async def _serve():
+        server = await start_async_server(
+            servicer, max_message_size, uds_path, interceptors
+        )
+        await server.wait_for_termination()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        logger = logging.getLogger(__name__)
+        logger.info("Terminating the server ...")
+        return
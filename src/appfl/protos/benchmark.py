@@ -0,0 +1,386 @@
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import torch
+import torch.nn as nn
+from omegaconf import OmegaConf
+
+from appfl.config import Config
+from .client import FLClient
+from .federated_learning_pb2 import Job
+
+""" Synthetic load on a local gRPC server.
+
+    Fake clients follow the protocol of ``run_grpc_client`` (GetWeight, GetJob, download, upload) without
+    training, and upload synthetic tensors of a configurable model size. The server runs in its own process,
+    so that its CPU time and memory are measured apart from the clients. The server of a benchmark never
+    restarts, so clients give up on a lost connection after ``client.reconnect_timeout`` seconds (10 by default).
+"""
+
+
+class SyntheticModel(nn.Module):
+    """Model of ``model_size`` float32 parameters split into ``num_tensors`` tensors."""
+
+    def __init__(self, model_size, num_tensors=1):
+        super(SyntheticModel, self).__init__()
+        sizes = np.array_split(np.arange(model_size), num_tensors)
+        self.tensors = nn.ParameterList(
+            [nn.Parameter(torch.zeros(len(size))) for size in sizes]
+        )
+
+
+def benchmark_config(num_clients, num_rounds, port, server=None, config=None):
+    cfg = OmegaConf.structured(Config)
+    cfg.num_clients = num_clients
+    cfg.num_epochs = num_rounds
+    cfg.validation = False
+    cfg.output_dirname = tempfile.mkdtemp(prefix="appfl_benchmark_")
+    cfg.server.port = port
+    cfg.client.reconnect_timeout = 10.0
+    if config:
+        cfg = OmegaConf.merge(cfg, config)
+    if server:
+        cfg.server = OmegaConf.merge(cfg.server, server)
+    return cfg
+
+
+def serve(cfg_container, model_size, num_tensors, num_clients):
+    """Run the server of the benchmark (target of the server process)."""
+    from appfl import run_grpc_server
+
+    logging.basicConfig(level=logging.WARNING)
+    cfg = OmegaConf.merge(OmegaConf.structured(Config), cfg_container)
+    run_grpc_server.run_server(
+        cfg, SyntheticModel(model_size, num_tensors), nn.CrossEntropyLoss(), num_clients
+    )
+
+
+class FakeClient:
+    """Client following the gRPC protocol with synthetic results instead of training.
+
+    Args:
+        client_id (int): client ID
+        uri (str): URI of the server
+        cfg (DictConfig): configuration of the benchmark
+        state (Dict): synthetic results uploaded every round
+    """
+
+    def __init__(self, client_id, uri, cfg, state):
+        self.client_id = client_id
+        self.uri = uri
+        self.cfg = cfg
+        self.state = state
+        self.latency = defaultdict(list)  # RPC name -> seconds
+        self.first_round_time = None
+        self.quit_time = None
+        self.rounds = 0
+        self.waits = 0  # rounds the client was not sampled for
+        self.error = None
+
+    def timed(self, name, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.latency[name].append(time.perf_counter() - start)
+        return result
+
+    def run(self):
+        cfg = self.cfg
+        comm = None
+        try:
+            comm = FLClient(
+                self.client_id,
+                self.uri,
+                False,
+                max_message_size=cfg.max_message_size,
+                long_poll_timeout=cfg.server.long_poll_timeout,
+                upload_chunk_size=cfg.server.upload_chunk_size,
+                upload_retries=cfg.server.upload_retries,
+                upload_window=cfg.server.upload_window,
+                reconnect_timeout=cfg.client.reconnect_timeout,
+            )
+            self.run_rounds(comm)
+        except Exception as e:
+            logging.getLogger(__name__).error("Client %d failed: %r", self.client_id, e)
+            self.error = repr(e)
+        finally:
+            if comm is not None:
+                comm.close()
+
+    def run_rounds(self, comm):
+        while self.timed("GetWeight", comm.get_weight, 1) < 0.0:
+            if comm.long_poll_timeout == 0:
+                time.sleep(0.1)
+        self.timed("GetSchema", comm.get_schema)
+
+        prev_round_number = 0
+        round_number, job_todo = self.timed("GetJob", comm.get_job, Job.INIT)
+        while job_todo != Job.QUIT:
+            if job_todo == Job.TRAIN and round_number != prev_round_number:
+                if self.first_round_time is None:
+                    self.first_round_time = time.time()
+                if comm.schema is not None:
+                    self.timed("GetModel", comm.get_model, round_number)
+                else:
+                    for name in self.state:
+                        self.timed(
+                            "GetTensorRecord", comm.get_tensor_record, name, round_number
+                        )
+                self.timed(
+                    "SendLearningResults",
+                    comm.send_learning_results,
+                    {self.client_id: 0.0},
+                    self.state,
+                    {},
+                    round_number,
+                )
+                prev_round_number = round_number
+                self.rounds += 1
+            elif job_todo == Job.WAIT:
+                ## Not sampled for this round: wait for a round this client trains
+                if round_number != prev_round_number:
+                    prev_round_number = round_number
+                    self.waits += 1
+                if comm.long_poll_timeout == 0:
+                    time.sleep(0.05)
+            elif comm.long_poll_timeout == 0:
+                time.sleep(0.05)
+            round_number, job_todo = self.timed(
+                "GetJob", comm.get_job, job_todo, prev_round_number
+            )
+        self.quit_time = time.time()
+
+    def result(self):
+        return {
+            "latency": dict(self.latency),
+            "first_round_time": self.first_round_time,
+            "quit_time": self.quit_time,
+            "rounds": self.rounds,
+            "waits": self.waits,
+            "error": self.error,
+        }
+
+
+def run_clients(
+    client_ids, uri, cfg_container, model_size, num_tensors, queue=None, timeout=None
+):
+    """Run fake clients in threads of this process; results are put in ``queue`` if given.
+
+    Clients still running after ``timeout`` seconds are reported with an error.
+    """
+    logging.basicConfig(level=logging.WARNING)
+    cfg = OmegaConf.merge(OmegaConf.structured(Config), cfg_container)
+    model = SyntheticModel(model_size, num_tensors)
+    state = OrderedDict(
+        (name, torch.randn(tensor.shape)) for name, tensor in model.state_dict().items()
+    )
+    clients = [FakeClient(cid, uri, cfg, state) for cid in client_ids]
+    threads = [threading.Thread(target=client.run, daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    deadline = None if timeout is None else time.time() + timeout
+    for thread in threads:
+        thread.join(None if deadline is None else max(deadline - time.time(), 0.0))
+    results = [client.result() for client in clients]
+    for thread, result in zip(threads, results):
+        if thread.is_alive():
+            result["error"] = "did not finish within %s seconds" % timeout
+    if queue is not None:
+        queue.put(results)
+    return results
+
+
+def process_usage(pid):
+    """CPU seconds, resident and peak resident memory (bytes) of a process, read from ``/proc``."""
+    try:
+        with open("/proc/%d/stat" % pid) as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        memory = {}
+        with open("/proc/%d/status" % pid) as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    memory[key] = int(value.split()[0]) * 1024
+        return cpu_seconds, memory.get("VmRSS", 0), memory.get("VmHWM", 0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def wait_for_server(process, port, timeout):
+    """Whether the server process accepts connections on ``port`` within ``timeout`` seconds."""
+    deadline = time.time() + timeout
+    while process.is_alive() and time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("localhost", port)) == 0:
+                return True
+        time.sleep(0.05)
+    return False
+
+
+def percentile(samples, q):
+    if len(samples) == 0:
+        return float("nan")
+    return float(np.percentile(samples, q))
+
+
+def run_benchmark(
+    num_clients,
+    num_rounds=5,
+    model_size=1000000,
+    num_tensors=10,
+    client_processes=0,
+    port=50061,
+    server=None,
+    config=None,
+    timeout=600.0,
+):
+    """Run ``num_clients`` fake clients against a server in a child process and report throughput.
+
+    Args:
+        num_clients (int): number of fake clients
+        num_rounds (int): number of rounds
+        model_size (int): number of float32 parameters of the synthetic model
+        num_tensors (int): number of tensors the parameters are split into
+        client_processes (int): processes running the clients (0: threads of this process)
+        port (int): port of the server
+        server (Dict): options of the ``server`` configuration (e.g., ``use_aio``)
+        config (Dict): other options of the configuration (e.g., ``participation``)
+        timeout (float): seconds after which the clients are stopped and the benchmark fails
+
+    Return:
+        Dict: rounds per second, RPC latency percentiles, and CPU time and memory of the server
+    """
+    cfg = benchmark_config(num_clients, num_rounds, port, server, config)
+    cfg_container = OmegaConf.to_container(cfg)
+    uri = "localhost:%d" % port
+    context = multiprocessing.get_context("spawn")
+    server_process = context.Process(
+        target=serve,
+        args=(cfg_container, model_size, num_tensors, num_clients),
+        daemon=True,
+    )
+    server_process.start()
+    start_usage = None
+    while start_usage is None and server_process.is_alive():
+        start_usage = process_usage(server_process.pid)
+        if start_usage is None:
+            time.sleep(0.01)
+    if not wait_for_server(server_process, port, timeout):
+        server_process.terminate()
+        server_process.join()
+        raise RuntimeError(
+            "Benchmark server did not start (exit code %s)" % server_process.exitcode
+        )
+
+    start = time.time()
+    results = []
+    if client_processes > 0:
+        results_queue = context.Queue()
+        processes = [
+            context.Process(
+                target=run_clients,
+                args=(
+                    list(ids), uri, cfg_container, model_size, num_tensors, results_queue, timeout
+                ),
+                daemon=True,
+            )
+            for ids in np.array_split(range(num_clients), client_processes)
+            if len(ids) > 0
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for _ in processes:
+                ## Clients report their own timeouts; this one covers a client process that died.
+                results += results_queue.get(timeout=max(start + timeout + 10.0 - time.time(), 0.0))
+        except queue.Empty:
+            results.append({"error": "a client process did not report within %s seconds" % timeout})
+        for process in processes:
+            process.terminate()
+            process.join()
+    else:
+        results = run_clients(
+            range(num_clients), uri, cfg_container, model_size, num_tensors, timeout=timeout
+        )
+    elapsed = time.time() - start
+
+    end_usage = process_usage(server_process.pid)
+    server_exitcode = server_process.exitcode
+    server_process.terminate()
+    server_process.join()
+    errors = [r["error"] for r in results if r["error"] is not None]
+    if errors:
+        raise RuntimeError(
+            "Benchmark failed (server exit code %s): %s" % (server_exitcode, errors[0])
+        )
+
+    first_round_time = min(
+        r["first_round_time"] for r in results if r["first_round_time"] is not None
+    )
+    quit_time = max(r["quit_time"] for r in results)
+    latency = defaultdict(list)
+    for r in results:
+        for name, samples in r["latency"].items():
+            latency[name] += samples
+    report = OrderedDict()
+    report["num_clients"] = num_clients
+    report["num_rounds"] = num_rounds
+    report["model_bytes"] = 4 * model_size
+    report["elapsed_seconds"] = elapsed
+    report["rounds_per_second"] = num_rounds / (quit_time - first_round_time)
+    report["waits"] = sum(r["waits"] for r in results)
+    report["latency"] = OrderedDict(
+        (
+            name,
+            OrderedDict(
+                count=len(samples),
+                p50=percentile(samples, 50),
+                p99=percentile(samples, 99),
+            ),
+        )
+        for name, samples in latency.items()
+    )
+    if start_usage is not None and end_usage is not None:
+        report["server_cpu_seconds"] = end_usage[0] - start_usage[0]
+        report["server_cpu_utilization"] = report["server_cpu_seconds"] / elapsed
+        report["server_rss_bytes"] = end_usage[1]
+        report["server_peak_rss_bytes"] = end_usage[2]
+    return report
+
+
+def format_report(report):
+    lines = [
+        "%d clients, %d rounds, model of %.1f MB: %.3f rounds/s (%.2f s)"
+        % (
+            report["num_clients"],
+            report["num_rounds"],
+            report["model_bytes"] / 1e6,
+            report["rounds_per_second"],
+            report["elapsed_seconds"],
+        ),
+        "%-20s %8s %12s %12s" % ("RPC", "count", "p50 (ms)", "p99 (ms)"),
+    ]
+    for name, stats in report["latency"].items():
+        lines.append(
+            "%-20s %8d %12.2f %12.2f"
+            % (name, stats["count"], 1e3 * stats["p50"], 1e3 * stats["p99"])
+        )
+    if "server_cpu_seconds" in report:
+        lines.append(
+            "server: %.2f CPU seconds (%.0f%% of a core), RSS %.1f MB (peak %.1f MB)"
+            % (
+                report["server_cpu_seconds"],
+                100 * report["server_cpu_utilization"],
+                report["server_rss_bytes"] / 1e6,
+                report["server_peak_rss_bytes"] / 1e6,
+            )
+        )
+    return "\n".join(lines)
@@ -0,0 +1,62 @@
+import os
+import logging
+import threading
+from concurrent import futures
+
+import torch
+
+""" Snapshots of the operator state, from which a restarted gRPC server resumes the current round.
+"""
+
+
+class CheckpointWriter:
+    """Write named snapshots with ``torch.save`` in a background thread.
+
+    A snapshot replaces its file atomically (written to a temporary file, then renamed), so that a crash
+    leaves the previous version intact. A snapshot waiting to be written is superseded by a newer one
+    of the same name.
+
+    Args:
+        dirname (str): directory of the snapshots
+    """
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        os.makedirs(dirname, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.executor = futures.ThreadPoolExecutor(max_workers=1)
+
+    def path(self, name):
+        return os.path.join(self.dirname, name + ".pt")
+
+    def submit(self, name, state):
+        with self.lock:
+            queued = name in self.pending
+            self.pending[name] = state
+        if not queued:
+            self.executor.submit(self.write, name)
+
+    def write(self, name):
+        with self.lock:
+            state = self.pending.pop(name)
+        path = self.path(name)
+        try:
+            torch.save(state, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        except Exception:
+            self.logger.exception("Failed to write the snapshot %s", path)
+
+    def load(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return None
+        return torch.load(path)
+
+    def flush(self):
+        """Wait until the snapshots submitted so far are written."""
+        self.executor.submit(lambda: None).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -1,17 +1,29 @@
 import logging
+import threading
 import time
+import uuid
+from concurrent import futures
 import numpy as np
+import torch
 
 import grpc
 
 from .federated_learning_pb2 import Header, WeightRequest
 from .federated_learning_pb2 import DataBuffer
+from .federated_learning_pb2 import Job
 from .federated_learning_pb2 import JobRequest
+from .federated_learning_pb2 import ModelRequest
+from .federated_learning_pb2 import SchemaRequest
 from .federated_learning_pb2 import LearningResults
 from .federated_learning_pb2 import TensorRequest
 from .federated_learning_pb2 import TensorRecord
 from .federated_learning_pb2 import WeightRequest
+from .federated_learning_pb2 import UploadChunk
+from .federated_learning_pb2 import UploadQuery
 from .federated_learning_pb2_grpc import FederatedLearningStub
+from .schema import ModelSchema
+from .shared_memory import SegmentWriter, read_segment, hostname, client_segment_prefix
+from .metrics import MetricsClientInterceptor
 from . import utils
 
 
@@ -23,9 +35,21 @@ class FLClient:
         use_tls,
         max_message_size=2 * 1024 * 1024,
         api_key=None,
+        codec=None,
+        long_poll_timeout=0.0,
+        use_shared_memory=False,
+        upload_chunk_size=1024 * 1024,
+        upload_retries=5,
+        upload_window=4,
+        reconnect_timeout=300.0,
+        metrics=None,
     ):
         self.logger = logging.getLogger(__name__)
         self.client_id = client_id
+        self.codec = codec
+        self.long_poll_timeout = long_poll_timeout
+        self.reconnect_timeout = reconnect_timeout
+        self.results_missing = False  # set when a restarted server lost the last results of this client
         self.max_message_size = max_message_size
         channel_options = [
             ("grpc.max_send_message_length", max_message_size),
@@ -39,8 +63,22 @@ class FLClient:
             self.channel = grpc.insecure_channel(server_uri, options=channel_options)
 
         grpc.channel_ready_future(self.channel).result(timeout=60)
+        self.metrics = metrics
+        if metrics is not None:
+            self.channel = grpc.intercept_channel(
+                self.channel, MetricsClientInterceptor(metrics)
+            )
         self.stub = FederatedLearningStub(self.channel)
         self.header = Header(server_id=1, client_id=self.client_id)
+        self.schema = None
+        self.use_shared_memory = use_shared_memory
+        self.shared_memory = False  # granted by the server to clients on its host
+        self.segment_writers = {}
+        self.upload_chunk_size = min(upload_chunk_size, max_message_size // 2)
+        self.upload_retries = upload_retries
+        self.upload_window = upload_window
+        self.bytes_uploaded = 0  # bytes of learning results, including the retransmitted ones
+        self.bytes_retransmitted = 0
         self.time_get_job = 0.0
         self.time_get_tensor = 0.0
         self.time_send_results = 0.0
@@ -48,12 +86,37 @@ class FLClient:
         if api_key:
             self.metadata.append(("x-api-key", api_key))
 
-    def get_job(self, job_done):
-        request = JobRequest(header=self.header, job_done=job_done)
+    def get_job(self, job_done, round_number=0):
+        request = JobRequest(
+            header=self.header,
+            job_done=job_done,
+            round_number=round_number,
+            wait_timeout=self.long_poll_timeout,
+        )
         start = time.time()
-        response = self.stub.GetJob(request, metadata=self.metadata)
+        while True:
+            try:
+                response = self.stub.GetJob(
+                    request,
+                    metadata=self.metadata,
+                    wait_for_ready=True,
+                    timeout=self.long_poll_timeout + self.reconnect_timeout,
+                )
+                break
+            except grpc.RpcError as e:
+                # The server may be restarting from its last snapshot; wait for it to come back.
+                if (
+                    e.code() != grpc.StatusCode.UNAVAILABLE
+                    or time.time() - start > self.reconnect_timeout
+                ):
+                    raise
+                self.logger.warning(
+                    f"[Client ID: {self.client_id: 03}] Lost the connection to the server; reconnecting"
+                )
+                time.sleep(1)
         end = time.time()
         self.time_get_job += end - start
+        self.results_missing = response.results_missing
         self.logger.info(
             f"[Client ID: {self.client_id: 03}] Received JobReponse with (server,round,job)=(%d,%d,%d)",
             response.header.server_id,
@@ -81,24 +144,122 @@ class FLClient:
         )
         if round_number > 1:
             self.time_get_tensor += end - start
-        shape = tuple(response.data_shape)
-        flat = np.frombuffer(response.data_bytes, dtype=eval(response.data_dtype))
-        nparray = np.reshape(flat, newshape=shape, order="C")
 
-        return nparray
+        return utils.tensor_from_record(response)
+
+    """
+    Retrieve the model schema of this session. Afterwards, the global model and the learning results
+    travel as contiguous buffers. Returns None if the server does not support it.
+    """
+
+    def get_schema(self):
+        request = SchemaRequest(header=self.header)
+        if self.use_shared_memory:
+            request.hostname = hostname()
+        try:
+            response = self.stub.GetSchema(request, metadata=self.metadata)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise
+            self.logger.info(
+                f"[Client ID: {self.client_id: 03}] Server does not publish a model schema"
+            )
+            return None
+        self.schema = ModelSchema.from_proto(response)
+        self.shared_memory = response.shared_memory
+        self.logger.debug(
+            f"[Client ID: {self.client_id: 03}] Received model schema %s (shared memory: %s)",
+            self.schema.hash,
+            self.shared_memory,
+        )
+        return self.schema
+
+    def get_model(self, round_number):
+        buffer = bytearray(self.schema.total_bytes)
+        self.get_model_into(round_number, buffer)
+        return self.schema.unpack(buffer)
+
+    """
+    Receive the global model laid out by the schema into a writable buffer of ``schema.total_bytes`` bytes.
+    """
+
+    def get_model_into(self, round_number, buffer):
+        request = ModelRequest(
+            header=self.header,
+            round_number=round_number,
+            schema_hash=self.schema.hash,
+        )
+        start = time.time()
+        received = False
+        if self.shared_memory:
+            handle = self.stub.GetModelSegment(request, metadata=self.metadata)
+            try:
+                read_segment(handle.name, handle.size, out=buffer)
+                received = True
+            except FileNotFoundError:
+                # The segment has been replaced by a newer version; fall back to streaming.
+                pass
+        if not received:
+            view = memoryview(buffer).cast("B")
+            offset = 0
+            for response in self.stub.GetModel(request, metadata=self.metadata):
+                view[offset : offset + len(response.data_bytes)] = response.data_bytes
+                offset += len(response.data_bytes)
+        end = time.time()
+        if round_number > 1:
+            self.time_get_tensor += end - start
+
+        return buffer
 
     def get_weight(self, training_size):
-        request = WeightRequest(header=self.header, size=training_size)
+        request = WeightRequest(
+            header=self.header,
+            size=training_size,
+            wait_timeout=self.long_poll_timeout,
+        )
         response = self.stub.GetWeight(request, metadata=self.metadata)
         self.logger.debug(
             f"[Client ID: {self.client_id: 03}] Received weight = %e", response.weight
         )
         return response.weight
 
-    def send_learning_results(self, penalty, primal, dual, round_number):
+    def send_learning_results(
+        self, penalty, primal, dual, round_number, global_state=None
+    ):
+        # With a codec, send the quantized difference from the global model of this round.
+        quantized_tensors = []
+        if self.codec is not None and global_state is not None:
+            primal = self.codec.encode_update(
+                primal, global_state, names=global_state.keys()
+            )
+            quantized_tensors = [
+                utils.construct_quantized_tensor_record(k, v)
+                for k, v in primal.items()
+                if isinstance(v, utils.QuantizedTensor)
+            ]
+        # States laid out by the model schema are sent as contiguous buffers.
+        # On the host of the server, the buffers are written into shared memory segments instead.
+        primal_bytes = b""
+        dual_bytes = b""
+        primal_segment = ""
+        dual_segment = ""
+        if self.schema is not None and not quantized_tensors:
+            if self.schema.matches(primal):
+                if self.shared_memory:
+                    primal_segment = self.write_segment("primal", primal)
+                else:
+                    primal_bytes = self.schema.pack(primal)
+                primal = {}
+            if len(dual) > 0 and self.schema.matches(dual):
+                if self.shared_memory:
+                    dual_segment = self.write_segment("dual", dual)
+                else:
+                    dual_bytes = self.schema.pack(dual)
+                dual = {}
         primal_tensors = [
             utils.construct_tensor_record(k, np.array(v.cpu()))
             for k, v in primal.items()
+            if not isinstance(v, utils.QuantizedTensor)
         ]
         dual_tensors = [
             utils.construct_tensor_record(k, np.array(v.cpu())) for k, v in dual.items()
@@ -109,17 +270,246 @@ class FLClient:
             penalty=penalty[self.client_id],
             primal=primal_tensors,
             dual=dual_tensors,
+            primal_quantized=quantized_tensors,
+            schema_hash=self.schema.hash if self.schema is not None else "",
+            primal_bytes=primal_bytes,
+            dual_bytes=dual_bytes,
+            primal_segment=primal_segment,
+            dual_segment=dual_segment,
         )
 
-        databuffer = []
-        databuffer += utils.proto_to_databuffer(
-            proto, max_message_size=self.max_message_size
-        )
         start = time.time()
-        self.stub.SendLearningResults(iter(databuffer), metadata=self.metadata)
+        if self.upload_retries > 0:
+            self.upload(proto.SerializeToString())
+        else:
+            databuffer = []
+            databuffer += utils.proto_to_databuffer(
+                proto, max_message_size=self.max_message_size
+            )
+            self.stub.SendLearningResults(iter(databuffer), metadata=self.metadata)
         end = time.time()
         if round_number > 1:
             self.time_send_results += end - start
 
+    """
+    Upload serialized learning results in chunks. At most ``upload_window`` chunks are sent ahead of the
+    acknowledgments, so that a failure only costs those. If the stream fails, ask the server for the last
+    acknowledged offset and continue from there.
+    """
+
+    def upload(self, data_bytes):
+        upload_id = uuid.uuid4().hex
+        total_size = len(data_bytes)
+        progress = UploadProgress()
+        attempt = 0
+        while True:
+            try:
+                for ack in self.stub.UploadLearningResults(
+                    self.upload_chunks(upload_id, data_bytes, progress),
+                    metadata=self.metadata,
+                ):
+                    progress.acknowledge(ack.committed_offset)
+                if progress.committed == total_size:
+                    break
+            except grpc.RpcError as e:
+                if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                    self.logger.info(
+                        f"[Client ID: {self.client_id: 03}] Server does not support resumable uploads"
+                    )
+                    self.upload_retries = 0
+                    self.stub.SendLearningResults(
+                        utils.bytes_to_databuffer(data_bytes, self.upload_chunk_size),
+                        metadata=self.metadata,
+                    )
+                    self.bytes_uploaded += total_size
+                    return
+                ## Results the server cannot read are not sent again
+                if (
+                    attempt >= self.upload_retries
+                    or e.code() == grpc.StatusCode.INVALID_ARGUMENT
+                ):
+                    raise
+                self.logger.warning(
+                    f"[Client ID: {self.client_id: 03}] Upload %s interrupted at offset %d (%s); resuming",
+                    upload_id,
+                    progress.committed,
+                    e.code(),
+                )
+            finally:
+                progress.stop()
+            attempt += 1
+            if attempt > self.upload_retries:
+                raise RuntimeError("Upload %s did not complete" % upload_id)
+            time.sleep(min(2 ** (attempt - 1), 30) * 0.1)
+            try:
+                ack = self.stub.ResumeUpload(
+                    UploadQuery(header=self.header, upload_id=upload_id),
+                    metadata=self.metadata,
+                    wait_for_ready=True,
+                    timeout=self.reconnect_timeout,
+                )
+            except grpc.RpcError:
+                continue
+            progress.restart(ack.committed_offset)
+            if ack.complete:
+                break
+        self.bytes_uploaded += progress.bytes_sent
+        self.bytes_retransmitted += max(progress.bytes_sent - total_size, 0)
+
+    def upload_chunks(self, upload_id, data_bytes, progress):
+        view = memoryview(data_bytes)
+        window = self.upload_window * self.upload_chunk_size
+        for i in range(progress.committed, len(data_bytes), self.upload_chunk_size):
+            if not progress.wait_for(i - window):
+                return
+            chunk = view[i : i + self.upload_chunk_size]
+            progress.bytes_sent += len(chunk)
+            yield UploadChunk(
+                header=self.header,
+                upload_id=upload_id,
+                offset=i,
+                total_size=len(data_bytes),
+                data_bytes=chunk.tobytes(),
+            )
+
+    def write_segment(self, key, state):
+        if key not in self.segment_writers:
+            self.segment_writers[key] = SegmentWriter(
+                self.schema.total_bytes, prefix=client_segment_prefix(self.client_id)
+            )
+        writer = self.segment_writers[key]
+        self.schema.pack_into(state, writer.segment.buf)
+        return writer.name
+
+    def close(self):
+        for writer in self.segment_writers.values():
+            writer.close()
+        self.segment_writers = {}
+        self.channel.close()
+
     def get_comm_time(self):
         return self.time_get_job + self.time_get_tensor + self.time_send_results
+
+
+class UploadProgress:
+    """Offset of an upload acknowledged by the server, shared by the sending and the acknowledging threads."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.committed = 0
+        self.bytes_sent = 0
+        self.stopped = False
+
+    def acknowledge(self, committed):
+        with self.condition:
+            self.committed = committed
+            self.condition.notify_all()
+
+    def wait_for(self, offset) -> bool:
+        """Wait until ``offset`` is acknowledged; False once the attempt has stopped."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.stopped or self.committed >= offset)
+            return not self.stopped
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def restart(self, committed):
+        with self.condition:
+            self.committed = committed
+            self.stopped = False
+
+
+class ModelDownloader:
+    """Download global models into one reusable buffer and copy them into a model in place.
+
+    Each tensor of the model is copied once from a view of the buffer. For CUDA models the buffer is pinned,
+    so that the copies to the device do not stage through pageable memory. With ``prefetch``, the next job
+    and its global model are fetched in a background thread while the client saves checkpoints and writes logs.
+
+    Args:
+        comm (FLClient): client communicating with the server
+        device (str): device of the model
+        prefetch (bool): fetch the next job and its global model in the background
+    """
+
+    def __init__(self, comm, device="cpu", prefetch=True):
+        self.comm = comm
+        self.device = device
+        self.buffer = None
+        self.buffer_round = None  # round number of the global model in the buffer
+        self.executor = None
+        if prefetch:
+            self.executor = futures.ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+
+    def allocate(self):
+        if self.buffer is None:
+            self.buffer = torch.empty(self.comm.schema.total_bytes, dtype=torch.uint8)
+            if str(self.device).startswith("cuda") and torch.cuda.is_available():
+                self.buffer = self.buffer.pin_memory()
+        return self.buffer
+
+    def download(self, round_number):
+        self.comm.get_model_into(round_number, self.allocate().numpy())
+        self.buffer_round = round_number
+
+    def load(self, model, round_number):
+        """Copy the global model of ``round_number`` into the parameters and buffers of ``model``."""
+        if self.pending is not None:
+            self.get_job(Job.TRAIN, round_number)
+
+        if self.comm.schema is None:
+            new_state = {}
+            for name in model.state_dict():
+                nparray = self.comm.get_tensor_record(name, round_number)
+                new_state[name] = torch.tensor(nparray)
+            model.load_state_dict(new_state)
+            return
+
+        if self.buffer_round != round_number:
+            self.download(round_number)
+        schema = self.comm.schema
+        state = model.state_dict()
+        with torch.no_grad():
+            for name in schema.names:
+                tensor = state[name]
+                offset = schema.offsets[name]
+                source = (
+                    self.buffer[offset : offset + schema.nbytes[name]]
+                    .view(tensor.dtype)
+                    .view(tensor.shape)
+                )
+                tensor.copy_(source, non_blocking=True)
+        if self.buffer.is_pinned():
+            torch.cuda.synchronize()
+        self.buffer_round = None
+
+    def prefetch_next_job(self, job_done, round_number):
+        """Wait for the job after ``round_number`` and download its global model in the background."""
+        if self.executor is None:
+            return
+
+        def fetch():
+            next_round, job_todo = self.comm.get_job(job_done, round_number)
+            if (
+                job_todo == Job.TRAIN
+                and next_round != round_number
+                and self.comm.schema is not None
+            ):
+                self.download(next_round)
+            return next_round, job_todo
+
+        self.pending = self.executor.submit(fetch)
+
+    def get_job(self, job_done, round_number):
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            return pending.result()
+        return self.comm.get_job(job_done, round_number)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -20,7 +20,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\x18\x66\x65\x64\x65rated_learning.proto\".\n\x06Header\x12\x11\n\tserver_id\x18\x01 \x01(\r\x12\x11\n\tclient_id\x18\x02 \x01(\r\".\n\nDataBuffer\x12\x0c\n\x04size\x18\x01 \x01(\r\x12\x12\n\ndata_bytes\x18\x02 \x01(\x0c\"I\n\x0e\x41\x63knowledgment\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x1e\n\x06status\x18\x02 \x01(\x0e\x32\x0e.MessageStatus\"=\n\nJobRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x16\n\x08job_done\x18\x03 \x01(\x0e\x32\x04.Job\"T\n\x0bJobResponse\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x14\n\x0cround_number\x18\x02 \x01(\r\x12\x16\n\x08job_todo\x18\x03 \x01(\x0e\x32\x04.Job\"\x8d\x01\n\x0fLearningResults\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x14\n\x0cround_number\x18\x02 \x01(\r\x12\x0f\n\x07penalty\x18\x03 \x01(\x02\x12\x1d\n\x06primal\x18\x04 \x03(\x0b\x32\r.TensorRecord\x12\x1b\n\x04\x64ual\x18\x05 \x03(\x0b\x32\r.TensorRecord\"L\n\rTensorRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x14\n\x0cround_number\x18\x03 \x01(\r\"X\n\x0cTensorRecord\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_shape\x18\x02 \x03(\x05\x12\x12\n\ndata_bytes\x18\x03 \x01(\x0c\x12\x12\n\ndata_dtype\x18\x04 \x01(\t\"6\n\rWeightRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0c\n\x04size\x18\x02 \x01(\r\"9\n\x0eWeightResponse\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0e\n\x06weight\x18\x02 \x01(\x02*0\n\x03Job\x12\x08\n\x04INIT\x10\x00\x12\n\n\x06WEIGHT\x10\x01\x12\t\n\x05TRAIN\x10\x02\x12\x08\n\x04QUIT\x10\x03*\"\n\rMessageStatus\x12\x06\n\x02OK\x10\x00\x12\t\n\x05\x45MPTY\x10\x01\x32\xd7\x01\n\x11\x46\x65\x64\x65ratedLearning\x12%\n\x06GetJob\x12\x0b.JobRequest\x1a\x0c.JobResponse\"\x00\x12\x32\n\x0fGetTensorRecord\x12\x0e.TensorRequest\x1a\r.TensorRecord\"\x00\x12.\n\tGetWeight\x12\x0e.WeightRequest\x1a\x0f.WeightResponse\"\x00\x12\x37\n\x13SendLearningResults\x12\x0b.DataBuffer\x1a\x0f.Acknowledgment\"\x00(\x01\x62\x06proto3'
+  serialized_pb=b'\n\x18\x66\x65\x64\x65rated_learning.proto\".\n\x06Header\x12\x11\n\tserver_id\x18\x01 \x01(\r\x12\x11\n\tclient_id\x18\x02 \x01(\r\".\n\nDataBuffer\x12\x0c\n\x04size\x18\x01 \x01(\r\x12\x12\n\ndata_bytes\x18\x02 \x01(\x0c\"I\n\x0e\x41\x63knowledgment\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x1e\n\x06status\x18\x02 \x01(\x0e\x32\x0e.MessageStatus\"i\n\nJobRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x16\n\x08job_done\x18\x03 \x01(\x0e\x32\x04.Job\x12\x14\n\x0cround_number\x18\x04 \x01(\r\x12\x14\n\x0cwait_timeout\x18\x05 \x01(\x02\"m\n\x0bJobResponse\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x14\n\x0cround_number\x18\x02 \x01(\r\x12\x16\n\x08job_todo\x18\x03 \x01(\x0e\x32\x04.Job\x12\x17\n\x0fresults_missing\x18\x04 \x01(\x08\"\xac\x02\n\x0fLearningResults\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x14\n\x0cround_number\x18\x02 \x01(\r\x12\x0f\n\x07penalty\x18\x03 \x01(\x02\x12\x1d\n\x06primal\x18\x04 \x03(\x0b\x32\r.TensorRecord\x12\x1b\n\x04\x64ual\x18\x05 \x03(\x0b\x32\r.TensorRecord\x12\x30\n\x10primal_quantized\x18\x06 \x03(\x0b\x32\x16.QuantizedTensorRecord\x12\x13\n\x0bschema_hash\x18\x07 \x01(\t\x12\x14\n\x0cprimal_bytes\x18\x08 \x01(\x0c\x12\x12\n\ndual_bytes\x18\t \x01(\x0c\x12\x16\n\x0eprimal_segment\x18\n \x01(\t\x12\x14\n\x0c\x64ual_segment\x18\x0b \x01(\t\"L\n\rTensorRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x14\n\x0cround_number\x18\x03 \x01(\r\"X\n\x0cTensorRecord\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_shape\x18\x02 \x03(\x05\x12\x12\n\ndata_bytes\x18\x03 \x01(\x0c\x12\x12\n\ndata_dtype\x18\x04 \x01(\t\"\x7f\n\x15QuantizedTensorRecord\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_shape\x18\x02 \x03(\x05\x12\x0c\n\x04\x62its\x18\x03 \x01(\r\x12\x12\n\nblock_size\x18\x04 \x01(\r\x12\x12\n\ndata_bytes\x18\x05 \x01(\x0c\x12\x0e\n\x06scales\x18\x06 \x01(\x0c\"b\n\nTensorSpec\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_shape\x18\x02 \x03(\x05\x12\x12\n\ndata_dtype\x18\x03 \x01(\t\x12\x0e\n\x06offset\x18\x04 \x01(\x04\x12\x0e\n\x06nbytes\x18\x05 \x01(\x04\":\n\rSchemaRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x10\n\x08hostname\x18\x02 \x01(\t\"\x85\x01\n\x0bModelSchema\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x13\n\x0bschema_hash\x18\x02 \x01(\t\x12\x1c\n\x07tensors\x18\x03 \x03(\x0b\x32\x0b.TensorSpec\x12\x13\n\x0btotal_bytes\x18\x04 \x01(\x04\x12\x15\n\rshared_memory\x18\x05 \x01(\x08\"o\n\rSegmentHandle\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0c\n\x04size\x18\x03 \x01(\x04\x12\x14\n\x0cround_number\x18\x04 \x01(\r\x12\x13\n\x0bschema_hash\x18\x05 \x01(\t\"R\n\x0cModelRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x14\n\x0cround_number\x18\x02 \x01(\r\x12\x13\n\x0bschema_hash\x18\x03 \x01(\t\"q\n\x0bUploadChunk\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x11\n\tupload_id\x18\x02 \x01(\t\x12\x0e\n\x06offset\x18\x03 \x01(\x04\x12\x12\n\ntotal_size\x18\x04 \x01(\x04\x12\x12\n\ndata_bytes\x18\x05 \x01(\x0c\"\x83\x01\n\tUploadAck\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x11\n\tupload_id\x18\x02 \x01(\t\x12\x18\n\x10\x63ommitted_offset\x18\x03 \x01(\x04\x12\x10\n\x08\x63omplete\x18\x04 \x01(\x08\x12\x1e\n\x06status\x18\x05 \x01(\x0e\x32\x0e.MessageStatus\"9\n\x0bUploadQuery\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x11\n\tupload_id\x18\x02 \x01(\t\"L\n\rWeightRequest\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0c\n\x04size\x18\x02 \x01(\r\x12\x14\n\x0cwait_timeout\x18\x03 \x01(\x02\"9\n\x0eWeightResponse\x12\x17\n\x06header\x18\x01 \x01(\x0b\x32\x07.Header\x12\x0e\n\x06weight\x18\x02 \x01(\x02*:\n\x03Job\x12\x08\n\x04INIT\x10\x00\x12\n\n\x06WEIGHT\x10\x01\x12\t\n\x05TRAIN\x10\x02\x12\x08\n\x04QUIT\x10\x03\x12\x08\n\x04WAIT\x10\x04*\"\n\rMessageStatus\x12\x06\n\x02OK\x10\x00\x12\t\n\x05\x45MPTY\x10\x01\x32\xc9\x03\n\x11\x46\x65\x64\x65ratedLearning\x12%\n\x06GetJob\x12\x0b.JobRequest\x1a\x0c.JobResponse\"\x00\x12\x32\n\x0fGetTensorRecord\x12\x0e.TensorRequest\x1a\r.TensorRecord\"\x00\x12.\n\tGetWeight\x12\x0e.WeightRequest\x1a\x0f.WeightResponse\"\x00\x12\x37\n\x13SendLearningResults\x12\x0b.DataBuffer\x1a\x0f.Acknowledgment\"\x00(\x01\x12+\n\tGetSchema\x12\x0e.SchemaRequest\x1a\x0c.ModelSchema\"\x00\x12*\n\x08GetModel\x12\r.ModelRequest\x1a\x0b.DataBuffer\"\x00\x30\x01\x12\x32\n\x0fGetModelSegment\x12\r.ModelRequest\x1a\x0e.SegmentHandle\"\x00\x12\x37\n\x15UploadLearningResults\x12\x0c.UploadChunk\x1a\n.UploadAck\"\x00(\x01\x30\x01\x12*\n\x0cResumeUpload\x12\x0c.UploadQuery\x1a\n.UploadAck\"\x00\x62\x06proto3'
 )
 
 _JOB = _descriptor.EnumDescriptor(
@@ -50,11 +50,16 @@ _JOB = _descriptor.EnumDescriptor(
       serialized_options=None,
       type=None,
       create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='WAIT', index=4, number=4,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=775,
-  serialized_end=823,
+  serialized_start=1955,
+  serialized_end=2013,
 )
 _sym_db.RegisterEnumDescriptor(_JOB)
 
@@ -79,8 +84,8 @@ _MESSAGESTATUS = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=825,
-  serialized_end=859,
+  serialized_start=2015,
+  serialized_end=2049,
 )
 _sym_db.RegisterEnumDescriptor(_MESSAGESTATUS)
 
@@ -89,6 +94,7 @@ INIT = 0
 WEIGHT = 1
 TRAIN = 2
 QUIT = 3
+WAIT = 4
 OK = 0
 EMPTY = 1
 
@@ -233,6 +239,20 @@ _JOBREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='round_number', full_name='JobRequest.round_number', index=2,
+      number=4, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='wait_timeout', full_name='JobRequest.wait_timeout', index=3,
+      number=5, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -246,7 +266,7 @@ _JOBREQUEST = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=199,
-  serialized_end=260,
+  serialized_end=304,
 )
 
 
@@ -279,6 +299,13 @@ _JOBRESPONSE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='results_missing', full_name='JobResponse.results_missing', index=3,
+      number=4, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -291,8 +318,8 @@ _JOBRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=262,
-  serialized_end=346,
+  serialized_start=306,
+  serialized_end=415,
 )
 
 
@@ -339,6 +366,48 @@ _LEARNINGRESULTS = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='primal_quantized', full_name='LearningResults.primal_quantized', index=5,
+      number=6, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='schema_hash', full_name='LearningResults.schema_hash', index=6,
+      number=7, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='primal_bytes', full_name='LearningResults.primal_bytes', index=7,
+      number=8, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dual_bytes', full_name='LearningResults.dual_bytes', index=8,
+      number=9, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='primal_segment', full_name='LearningResults.primal_segment', index=9,
+      number=10, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dual_segment', full_name='LearningResults.dual_segment', index=10,
+      number=11, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -351,8 +420,8 @@ _LEARNINGRESULTS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=349,
-  serialized_end=490,
+  serialized_start=418,
+  serialized_end=718,
 )
 
 
@@ -397,8 +466,8 @@ _TENSORREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=492,
-  serialized_end=568,
+  serialized_start=720,
+  serialized_end=796,
 )
 
 
@@ -450,8 +519,499 @@ _TENSORRECORD = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=570,
-  serialized_end=658,
+  serialized_start=798,
+  serialized_end=886,
+)
+
+
+_QUANTIZEDTENSORRECORD = _descriptor.Descriptor(
+  name='QuantizedTensorRecord',
+  full_name='QuantizedTensorRecord',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='QuantizedTensorRecord.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_shape', full_name='QuantizedTensorRecord.data_shape', index=1,
+      number=2, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='bits', full_name='QuantizedTensorRecord.bits', index=2,
+      number=3, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='block_size', full_name='QuantizedTensorRecord.block_size', index=3,
+      number=4, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_bytes', full_name='QuantizedTensorRecord.data_bytes', index=4,
+      number=5, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='scales', full_name='QuantizedTensorRecord.scales', index=5,
+      number=6, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=888,
+  serialized_end=1015,
+)
+
+
+_TENSORSPEC = _descriptor.Descriptor(
+  name='TensorSpec',
+  full_name='TensorSpec',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='TensorSpec.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_shape', full_name='TensorSpec.data_shape', index=1,
+      number=2, type=5, cpp_type=1, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_dtype', full_name='TensorSpec.data_dtype', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='offset', full_name='TensorSpec.offset', index=3,
+      number=4, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='nbytes', full_name='TensorSpec.nbytes', index=4,
+      number=5, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1017,
+  serialized_end=1115,
+)
+
+
+_SCHEMAREQUEST = _descriptor.Descriptor(
+  name='SchemaRequest',
+  full_name='SchemaRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='SchemaRequest.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='hostname', full_name='SchemaRequest.hostname', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1117,
+  serialized_end=1175,
+)
+
+
+_MODELSCHEMA = _descriptor.Descriptor(
+  name='ModelSchema',
+  full_name='ModelSchema',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='ModelSchema.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='schema_hash', full_name='ModelSchema.schema_hash', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='tensors', full_name='ModelSchema.tensors', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='total_bytes', full_name='ModelSchema.total_bytes', index=3,
+      number=4, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='shared_memory', full_name='ModelSchema.shared_memory', index=4,
+      number=5, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1178,
+  serialized_end=1311,
+)
+
+
+_SEGMENTHANDLE = _descriptor.Descriptor(
+  name='SegmentHandle',
+  full_name='SegmentHandle',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='SegmentHandle.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='SegmentHandle.name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='size', full_name='SegmentHandle.size', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='round_number', full_name='SegmentHandle.round_number', index=3,
+      number=4, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='schema_hash', full_name='SegmentHandle.schema_hash', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1313,
+  serialized_end=1424,
+)
+
+
+_MODELREQUEST = _descriptor.Descriptor(
+  name='ModelRequest',
+  full_name='ModelRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='ModelRequest.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='round_number', full_name='ModelRequest.round_number', index=1,
+      number=2, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='schema_hash', full_name='ModelRequest.schema_hash', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1426,
+  serialized_end=1508,
+)
+
+
+_UPLOADCHUNK = _descriptor.Descriptor(
+  name='UploadChunk',
+  full_name='UploadChunk',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='UploadChunk.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='UploadChunk.upload_id', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='offset', full_name='UploadChunk.offset', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='total_size', full_name='UploadChunk.total_size', index=3,
+      number=4, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_bytes', full_name='UploadChunk.data_bytes', index=4,
+      number=5, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1510,
+  serialized_end=1623,
+)
+
+
+_UPLOADACK = _descriptor.Descriptor(
+  name='UploadAck',
+  full_name='UploadAck',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='UploadAck.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='UploadAck.upload_id', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='committed_offset', full_name='UploadAck.committed_offset', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='complete', full_name='UploadAck.complete', index=3,
+      number=4, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='status', full_name='UploadAck.status', index=4,
+      number=5, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1626,
+  serialized_end=1757,
+)
+
+
+_UPLOADQUERY = _descriptor.Descriptor(
+  name='UploadQuery',
+  full_name='UploadQuery',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='header', full_name='UploadQuery.header', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='UploadQuery.upload_id', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1759,
+  serialized_end=1816,
 )
 
 
@@ -477,6 +1037,13 @@ _WEIGHTREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='wait_timeout', full_name='WeightRequest.wait_timeout', index=2,
+      number=3, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -489,8 +1056,8 @@ _WEIGHTREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=660,
-  serialized_end=714,
+  serialized_start=1818,
+  serialized_end=1894,
 )
 
 
@@ -528,8 +1095,8 @@ _WEIGHTRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=716,
-  serialized_end=773,
+  serialized_start=1896,
+  serialized_end=1953,
 )
 
 _ACKNOWLEDGMENT.fields_by_name['header'].message_type = _HEADER
@@ -541,7 +1108,17 @@ _JOBRESPONSE.fields_by_name['job_todo'].enum_type = _JOB
 _LEARNINGRESULTS.fields_by_name['header'].message_type = _HEADER
 _LEARNINGRESULTS.fields_by_name['primal'].message_type = _TENSORRECORD
 _LEARNINGRESULTS.fields_by_name['dual'].message_type = _TENSORRECORD
+_LEARNINGRESULTS.fields_by_name['primal_quantized'].message_type = _QUANTIZEDTENSORRECORD
 _TENSORREQUEST.fields_by_name['header'].message_type = _HEADER
+_SCHEMAREQUEST.fields_by_name['header'].message_type = _HEADER
+_MODELSCHEMA.fields_by_name['header'].message_type = _HEADER
+_MODELSCHEMA.fields_by_name['tensors'].message_type = _TENSORSPEC
+_SEGMENTHANDLE.fields_by_name['header'].message_type = _HEADER
+_MODELREQUEST.fields_by_name['header'].message_type = _HEADER
+_UPLOADCHUNK.fields_by_name['header'].message_type = _HEADER
+_UPLOADACK.fields_by_name['header'].message_type = _HEADER
+_UPLOADACK.fields_by_name['status'].enum_type = _MESSAGESTATUS
+_UPLOADQUERY.fields_by_name['header'].message_type = _HEADER
 _WEIGHTREQUEST.fields_by_name['header'].message_type = _HEADER
 _WEIGHTRESPONSE.fields_by_name['header'].message_type = _HEADER
 DESCRIPTOR.message_types_by_name['Header'] = _HEADER
@@ -552,6 +1129,15 @@ DESCRIPTOR.message_types_by_name['JobResponse'] = _JOBRESPONSE
 DESCRIPTOR.message_types_by_name['LearningResults'] = _LEARNINGRESULTS
 DESCRIPTOR.message_types_by_name['TensorRequest'] = _TENSORREQUEST
 DESCRIPTOR.message_types_by_name['TensorRecord'] = _TENSORRECORD
+DESCRIPTOR.message_types_by_name['QuantizedTensorRecord'] = _QUANTIZEDTENSORRECORD
+DESCRIPTOR.message_types_by_name['TensorSpec'] = _TENSORSPEC
+DESCRIPTOR.message_types_by_name['SchemaRequest'] = _SCHEMAREQUEST
+DESCRIPTOR.message_types_by_name['ModelSchema'] = _MODELSCHEMA
+DESCRIPTOR.message_types_by_name['SegmentHandle'] = _SEGMENTHANDLE
+DESCRIPTOR.message_types_by_name['ModelRequest'] = _MODELREQUEST
+DESCRIPTOR.message_types_by_name['UploadChunk'] = _UPLOADCHUNK
+DESCRIPTOR.message_types_by_name['UploadAck'] = _UPLOADACK
+DESCRIPTOR.message_types_by_name['UploadQuery'] = _UPLOADQUERY
 DESCRIPTOR.message_types_by_name['WeightRequest'] = _WEIGHTREQUEST
 DESCRIPTOR.message_types_by_name['WeightResponse'] = _WEIGHTRESPONSE
 DESCRIPTOR.enum_types_by_name['Job'] = _JOB
@@ -614,6 +1200,69 @@ TensorRecord = _reflection.GeneratedProtocolMessageType('TensorRecord', (_messag
   })
 _sym_db.RegisterMessage(TensorRecord)
 
+QuantizedTensorRecord = _reflection.GeneratedProtocolMessageType('QuantizedTensorRecord', (_message.Message,), {
+  'DESCRIPTOR' : _QUANTIZEDTENSORRECORD,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:QuantizedTensorRecord)
+  })
+_sym_db.RegisterMessage(QuantizedTensorRecord)
+
+TensorSpec = _reflection.GeneratedProtocolMessageType('TensorSpec', (_message.Message,), {
+  'DESCRIPTOR' : _TENSORSPEC,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:TensorSpec)
+  })
+_sym_db.RegisterMessage(TensorSpec)
+
+SchemaRequest = _reflection.GeneratedProtocolMessageType('SchemaRequest', (_message.Message,), {
+  'DESCRIPTOR' : _SCHEMAREQUEST,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:SchemaRequest)
+  })
+_sym_db.RegisterMessage(SchemaRequest)
+
+ModelSchema = _reflection.GeneratedProtocolMessageType('ModelSchema', (_message.Message,), {
+  'DESCRIPTOR' : _MODELSCHEMA,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:ModelSchema)
+  })
+_sym_db.RegisterMessage(ModelSchema)
+
+SegmentHandle = _reflection.GeneratedProtocolMessageType('SegmentHandle', (_message.Message,), {
+  'DESCRIPTOR' : _SEGMENTHANDLE,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:SegmentHandle)
+  })
+_sym_db.RegisterMessage(SegmentHandle)
+
+ModelRequest = _reflection.GeneratedProtocolMessageType('ModelRequest', (_message.Message,), {
+  'DESCRIPTOR' : _MODELREQUEST,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:ModelRequest)
+  })
+_sym_db.RegisterMessage(ModelRequest)
+
+UploadChunk = _reflection.GeneratedProtocolMessageType('UploadChunk', (_message.Message,), {
+  'DESCRIPTOR' : _UPLOADCHUNK,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:UploadChunk)
+  })
+_sym_db.RegisterMessage(UploadChunk)
+
+UploadAck = _reflection.GeneratedProtocolMessageType('UploadAck', (_message.Message,), {
+  'DESCRIPTOR' : _UPLOADACK,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:UploadAck)
+  })
+_sym_db.RegisterMessage(UploadAck)
+
+UploadQuery = _reflection.GeneratedProtocolMessageType('UploadQuery', (_message.Message,), {
+  'DESCRIPTOR' : _UPLOADQUERY,
+  '__module__' : 'federated_learning_pb2'
+  # @@protoc_insertion_point(class_scope:UploadQuery)
+  })
+_sym_db.RegisterMessage(UploadQuery)
+
 WeightRequest = _reflection.GeneratedProtocolMessageType('WeightRequest', (_message.Message,), {
   'DESCRIPTOR' : _WEIGHTREQUEST,
   '__module__' : 'federated_learning_pb2'
@@ -637,8 +1286,8 @@ _FEDERATEDLEARNING = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=862,
-  serialized_end=1077,
+  serialized_start=2052,
+  serialized_end=2509,
   methods=[
   _descriptor.MethodDescriptor(
     name='GetJob',
@@ -680,6 +1329,56 @@ _FEDERATEDLEARNING = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='GetSchema',
+    full_name='FederatedLearning.GetSchema',
+    index=4,
+    containing_service=None,
+    input_type=_SCHEMAREQUEST,
+    output_type=_MODELSCHEMA,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetModel',
+    full_name='FederatedLearning.GetModel',
+    index=5,
+    containing_service=None,
+    input_type=_MODELREQUEST,
+    output_type=_DATABUFFER,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetModelSegment',
+    full_name='FederatedLearning.GetModelSegment',
+    index=6,
+    containing_service=None,
+    input_type=_MODELREQUEST,
+    output_type=_SEGMENTHANDLE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='UploadLearningResults',
+    full_name='FederatedLearning.UploadLearningResults',
+    index=7,
+    containing_service=None,
+    input_type=_UPLOADCHUNK,
+    output_type=_UPLOADACK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='ResumeUpload',
+    full_name='FederatedLearning.ResumeUpload',
+    index=8,
+    containing_service=None,
+    input_type=_UPLOADQUERY,
+    output_type=_UPLOADACK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_FEDERATEDLEARNING)
 
@@ -34,6 +34,31 @@ class FederatedLearningStub(object):
                 request_serializer=federated__learning__pb2.DataBuffer.SerializeToString,
                 response_deserializer=federated__learning__pb2.Acknowledgment.FromString,
                 )
+        self.GetSchema = channel.unary_unary(
+                '/FederatedLearning/GetSchema',
+                request_serializer=federated__learning__pb2.SchemaRequest.SerializeToString,
+                response_deserializer=federated__learning__pb2.ModelSchema.FromString,
+                )
+        self.GetModel = channel.unary_stream(
+                '/FederatedLearning/GetModel',
+                request_serializer=federated__learning__pb2.ModelRequest.SerializeToString,
+                response_deserializer=federated__learning__pb2.DataBuffer.FromString,
+                )
+        self.GetModelSegment = channel.unary_unary(
+                '/FederatedLearning/GetModelSegment',
+                request_serializer=federated__learning__pb2.ModelRequest.SerializeToString,
+                response_deserializer=federated__learning__pb2.SegmentHandle.FromString,
+                )
+        self.UploadLearningResults = channel.stream_stream(
+                '/FederatedLearning/UploadLearningResults',
+                request_serializer=federated__learning__pb2.UploadChunk.SerializeToString,
+                response_deserializer=federated__learning__pb2.UploadAck.FromString,
+                )
+        self.ResumeUpload = channel.unary_unary(
+                '/FederatedLearning/ResumeUpload',
+                request_serializer=federated__learning__pb2.UploadQuery.SerializeToString,
+                response_deserializer=federated__learning__pb2.UploadAck.FromString,
+                )
 
 
 class FederatedLearningServicer(object):
@@ -63,6 +88,36 @@ class FederatedLearningServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetSchema(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetModel(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetModelSegment(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UploadLearningResults(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ResumeUpload(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_FederatedLearningServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -86,6 +141,31 @@ def add_FederatedLearningServicer_to_server(servicer, server):
                     request_deserializer=federated__learning__pb2.DataBuffer.FromString,
                     response_serializer=federated__learning__pb2.Acknowledgment.SerializeToString,
             ),
+            'GetSchema': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSchema,
+                    request_deserializer=federated__learning__pb2.SchemaRequest.FromString,
+                    response_serializer=federated__learning__pb2.ModelSchema.SerializeToString,
+            ),
+            'GetModel': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetModel,
+                    request_deserializer=federated__learning__pb2.ModelRequest.FromString,
+                    response_serializer=federated__learning__pb2.DataBuffer.SerializeToString,
+            ),
+            'GetModelSegment': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetModelSegment,
+                    request_deserializer=federated__learning__pb2.ModelRequest.FromString,
+                    response_serializer=federated__learning__pb2.SegmentHandle.SerializeToString,
+            ),
+            'UploadLearningResults': grpc.stream_stream_rpc_method_handler(
+                    servicer.UploadLearningResults,
+                    request_deserializer=federated__learning__pb2.UploadChunk.FromString,
+                    response_serializer=federated__learning__pb2.UploadAck.SerializeToString,
+            ),
+            'ResumeUpload': grpc.unary_unary_rpc_method_handler(
+                    servicer.ResumeUpload,
+                    request_deserializer=federated__learning__pb2.UploadQuery.FromString,
+                    response_serializer=federated__learning__pb2.UploadAck.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'FederatedLearning', rpc_method_handlers)
@@ -163,3 +243,88 @@ class FederatedLearning(object):
             federated__learning__pb2.Acknowledgment.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetSchema(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/FederatedLearning/GetSchema',
+            federated__learning__pb2.SchemaRequest.SerializeToString,
+            federated__learning__pb2.ModelSchema.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetModel(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/FederatedLearning/GetModel',
+            federated__learning__pb2.ModelRequest.SerializeToString,
+            federated__learning__pb2.DataBuffer.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetModelSegment(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/FederatedLearning/GetModelSegment',
+            federated__learning__pb2.ModelRequest.SerializeToString,
+            federated__learning__pb2.SegmentHandle.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def UploadLearningResults(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/FederatedLearning/UploadLearningResults',
+            federated__learning__pb2.UploadChunk.SerializeToString,
+            federated__learning__pb2.UploadAck.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ResumeUpload(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/FederatedLearning/ResumeUpload',
+            federated__learning__pb2.UploadQuery.SerializeToString,
+            federated__learning__pb2.UploadAck.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
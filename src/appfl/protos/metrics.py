@@ -0,0 +1,482 @@
+import bisect
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+
+""" Metrics of the gRPC communication: per-method latency, bytes, concurrent calls and queue wait time.
+
+    Interceptors record them into a ``MetricsRegistry``, which is exported in the Prometheus text format
+    over HTTP or dumped periodically as JSON.
+"""
+
+## Upper bounds of the buckets of time histograms, in seconds
+TIME_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one counts values above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms indexed by name and labels.
+
+    Args:
+        prefix (str): prefix of every metric name
+    """
+
+    def __init__(self, prefix="appfl_"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = OrderedDict()
+        self.gauges = OrderedDict()
+        self.histograms = OrderedDict()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add(self, name, value, **labels):
+        """Add ``value`` (possibly negative) to a gauge."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def to_prometheus(self) -> str:
+        def labels_text(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{%s}" % ",".join('%s="%s"' % (k, v) for k, v in items)
+
+        lines = []
+        typed = set()
+        with self.lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for (name, labels), value in metrics.items():
+                    if name not in typed:
+                        lines.append("# TYPE %s%s %s" % (self.prefix, name, kind))
+                        typed.add(name)
+                    lines.append(
+                        "%s%s%s %s" % (self.prefix, name, labels_text(labels), repr(value))
+                    )
+            for (name, labels), histogram in self.histograms.items():
+                if name not in typed:
+                    lines.append("# TYPE %s%s histogram" % (self.prefix, name))
+                    typed.add(name)
+                bounds = [repr(float(b)) for b in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(
+                        "%s%s_bucket%s %d"
+                        % (self.prefix, name, labels_text(labels, [("le", bound)]), count)
+                    )
+                lines.append(
+                    "%s%s_sum%s %r" % (self.prefix, name, labels_text(labels), histogram.sum)
+                )
+                lines.append(
+                    "%s%s_count%s %d"
+                    % (self.prefix, name, labels_text(labels), histogram.count)
+                )
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        def entry(name, labels, **values):
+            return dict(name=self.prefix + name, labels=dict(labels), **values)
+
+        with self.lock:
+            return {
+                "time": time.time(),
+                "counters": [
+                    entry(name, labels, value=value)
+                    for (name, labels), value in self.counters.items()
+                ],
+                "gauges": [
+                    entry(name, labels, value=value)
+                    for (name, labels), value in self.gauges.items()
+                ],
+                "histograms": [
+                    entry(
+                        name,
+                        labels,
+                        buckets=list(h.buckets),
+                        counts=list(h.counts),
+                        sum=h.sum,
+                        count=h.count,
+                    )
+                    for (name, labels), h in self.histograms.items()
+                ],
+            }
+
+    def dump_json(self, path):
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.to_json(), f)
+        os.replace(path + ".tmp", path)
+
+
+"""
+Record the wire size of messages by wrapping the serializers of a method handler.
+"""
+
+
+def _count_sent(serializer, registry, method):
+    def wrapped(message):
+        data = serializer(message) if serializer is not None else message
+        registry.inc("rpc_sent_bytes_total", len(data), method=method)
+        return data
+
+    return wrapped
+
+
+def _count_received(deserializer, registry, method):
+    def wrapped(data):
+        registry.inc("rpc_received_bytes_total", len(data), method=method)
+        return deserializer(data) if deserializer is not None else data
+
+    return wrapped
+
+
+def _status_name(error, context=None):
+    """Name of the status code of a failed call (e.g., "UNAVAILABLE"), the error label on both ends.
+
+    On the server, the code is the one the handler aborted with; other exceptions reach the client as UNKNOWN.
+    """
+    code = error.code() if isinstance(error, grpc.RpcError) else None
+    if code is None and context is not None:
+        code = context.code()
+    if isinstance(code, int):
+        code = next((c for c in grpc.StatusCode if c.value[0] == code), None)
+    return code.name if isinstance(code, grpc.StatusCode) else grpc.StatusCode.UNKNOWN.name
+
+
+class _CallMetrics:
+    """Metrics of one server call, from its arrival to the end of its response."""
+
+    def __init__(self, registry, method):
+        self.registry = registry
+        self.method = method
+        self.arrival = time.perf_counter()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.registry.observe(
+            "rpc_queue_wait_seconds", self.started - self.arrival, method=self.method
+        )
+        self.registry.add("rpc_active", 1, method=self.method)
+
+    def finish(self, error=None, context=None):
+        self.registry.add("rpc_active", -1, method=self.method)
+        self.registry.observe(
+            "rpc_duration_seconds", time.perf_counter() - self.started, method=self.method
+        )
+        self.registry.inc("rpc_total", method=self.method)
+        if error is not None:
+            self.registry.inc(
+                "rpc_errors_total", method=self.method, error=_status_name(error, context)
+            )
+
+
+def _wrap_handler(handler, registry, method, wrap_unary, wrap_stream):
+    handler = handler._replace(
+        request_deserializer=_count_received(
+            handler.request_deserializer, registry, method
+        ),
+        response_serializer=_count_sent(handler.response_serializer, registry, method),
+    )
+    if handler.unary_unary is not None:
+        return handler._replace(unary_unary=wrap_unary(handler.unary_unary))
+    if handler.stream_unary is not None:
+        return handler._replace(stream_unary=wrap_unary(handler.stream_unary))
+    if handler.unary_stream is not None:
+        return handler._replace(unary_stream=wrap_stream(handler.unary_stream))
+    return handler._replace(stream_stream=wrap_stream(handler.stream_stream))
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Server interceptor recording the metrics of every RPC.
+
+    The queue wait time is measured from the arrival of a call until a worker thread starts serving it.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        call = _CallMetrics(self.registry, method)
+
+        def wrap_unary(behavior):
+            def wrapped(request, context):
+                call.start()
+                error = None
+                try:
+                    return behavior(request, context)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(error, context)
+
+            return wrapped
+
+        def wrap_stream(behavior):
+            def wrapped(request, context):
+                call.start()
+                error = None
+                try:
+                    yield from behavior(request, context)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(error, context)
+
+            return wrapped
+
+        return _wrap_handler(handler, self.registry, method, wrap_unary, wrap_stream)
+
+
+class AioMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Server interceptor of ``grpc.aio`` recording the metrics of every RPC."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        call = _CallMetrics(self.registry, method)
+
+        def wrap_unary(behavior):
+            async def wrapped(request, context):
+                call.start()
+                error = None
+                try:
+                    response = behavior(request, context)
+                    if inspect.isawaitable(response):
+                        response = await response
+                    return response
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(error, context)
+
+            return wrapped
+
+        def wrap_stream(behavior):
+            async def wrapped(request, context):
+                call.start()
+                error = None
+                try:
+                    responses = behavior(request, context)
+                    if hasattr(responses, "__aiter__"):
+                        async for response in responses:
+                            yield response
+                    else:
+                        for response in responses:
+                            yield response
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(error, context)
+
+            return wrapped
+
+        return _wrap_handler(handler, self.registry, method, wrap_unary, wrap_stream)
+
+
+class _MeteredStream:
+    """Response iterator of a client call counting the bytes received; other attributes go to the call."""
+
+    def __init__(self, call, registry, method, start):
+        self._call = call
+        self._registry = registry
+        self._method = method
+        self._start = start
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._call)
+        except StopIteration:
+            self._registry.observe(
+                "rpc_duration_seconds", time.perf_counter() - self._start, method=self._method
+            )
+            raise
+        except grpc.RpcError as e:
+            self._registry.inc("rpc_errors_total", method=self._method, error=_status_name(e))
+            raise
+        self._registry.inc(
+            "rpc_received_bytes_total", response.ByteSize(), method=self._method
+        )
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+
+class MetricsClientInterceptor(
+    grpc.UnaryUnaryClientInterceptor,
+    grpc.UnaryStreamClientInterceptor,
+    grpc.StreamUnaryClientInterceptor,
+    grpc.StreamStreamClientInterceptor,
+):
+    """Client interceptor recording the latency and the bytes of every RPC."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def count_requests(self, request_iterator, method):
+        for request in request_iterator:
+            self.registry.inc("rpc_sent_bytes_total", request.ByteSize(), method=method)
+            yield request
+
+    def finish_unary(self, outcome, method, start):
+        self.registry.observe(
+            "rpc_duration_seconds", time.perf_counter() - start, method=method
+        )
+        self.registry.inc("rpc_total", method=method)
+        exception = outcome.exception()
+        if exception is None:
+            self.registry.inc(
+                "rpc_received_bytes_total", outcome.result().ByteSize(), method=method
+            )
+        elif isinstance(exception, grpc.RpcError):
+            self.registry.inc(
+                "rpc_errors_total", method=method, error=_status_name(exception)
+            )
+        return outcome
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        method = client_call_details.method.rsplit("/", 1)[-1]
+        self.registry.inc("rpc_sent_bytes_total", request.ByteSize(), method=method)
+        start = time.perf_counter()
+        return self.finish_unary(
+            continuation(client_call_details, request), method, start
+        )
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        method = client_call_details.method.rsplit("/", 1)[-1]
+        start = time.perf_counter()
+        outcome = continuation(
+            client_call_details, self.count_requests(request_iterator, method)
+        )
+        return self.finish_unary(outcome, method, start)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        method = client_call_details.method.rsplit("/", 1)[-1]
+        self.registry.inc("rpc_sent_bytes_total", request.ByteSize(), method=method)
+        self.registry.inc("rpc_total", method=method)
+        start = time.perf_counter()
+        call = continuation(client_call_details, request)
+        return _MeteredStream(call, self.registry, method, start)
+
+    def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
+        method = client_call_details.method.rsplit("/", 1)[-1]
+        self.registry.inc("rpc_total", method=method)
+        start = time.perf_counter()
+        call = continuation(
+            client_call_details, self.count_requests(request_iterator, method)
+        )
+        return _MeteredStream(call, self.registry, method, start)
+
+
+"""
+Exporters
+"""
+
+
+def start_http_exporter(registry, port, host="0.0.0.0"):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` in a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body = json.dumps(registry.to_json()).encode()
+                content_type = "application/json"
+            elif self.path.startswith("/metrics"):
+                body = registry.to_prometheus().encode()
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+class JSONDumper:
+    """Dump the metrics to ``path`` every ``interval`` seconds, and once more when stopped."""
+
+    def __init__(self, registry, path, interval=10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            self.registry.dump_json(self.path)
+        except OSError:
+            logging.getLogger(__name__).exception("Failed to dump metrics to %s", self.path)
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.dump()
@@ -1,4 +1,8 @@
 import logging
+import threading
+import time
+from concurrent import futures
+from contextlib import ExitStack
 from collections import OrderedDict
 
 import torch
@@ -8,9 +12,22 @@ import numpy as np
 import copy
 
 from appfl.misc.utils import *
+from appfl.misc.participation import *
+from appfl.misc.pipeline import server_snapshot
 from appfl.algorithm import *
+from appfl.codec import dequantize
 
 from .federated_learning_pb2 import Job
+from .schema import ModelSchema
+from .shared_memory import SegmentPublisher, read_segment, hostname, is_client_segment
+from .upload import UploadManager
+from .checkpoint import CheckpointWriter
+from .metrics import MetricsRegistry
+from . import utils
+
+
+class InvalidResults(Exception):
+    """Learning results that cannot be read with the model schema (e.g., a segment of the wrong size)."""
 
 
 class FLOperator:
@@ -42,6 +59,20 @@ class FLOperator:
         self.client_learning_status = OrderedDict()
         self.servicer = None  # Takes care of communication via gRPC
 
+        # Each client writes its results into its own slot guarded by its own lock.
+        self.client_locks = [threading.Lock() for _ in range(num_clients)]
+        # Long-polling clients wait on this condition until their next job is available.
+        # It also guards the round transition so that a round is aggregated exactly once.
+        self.job_condition = threading.Condition()
+        self.aggregated_round = 0
+        self.weights_round = 0  # round in which the weights of all clients were last computed
+        self.job_listeners = []  # callbacks invoked on every job change (e.g., by asyncio servicers)
+        # Timings of the server, also filled by the interceptors of the servicer when metrics are enabled.
+        self.metrics = MetricsRegistry()
+        # Rounds are aggregated and validated one at a time in this executor, off the threads serving RPCs.
+        self.aggregation_executor = futures.ThreadPoolExecutor(max_workers=1)
+        self.aggregation_future = None  # completion of the last aggregation submitted
+
         self.dataloader = None
         if self.cfg.validation == True and len(test_dataset) > 0:
             self.dataloader = DataLoader(
@@ -61,148 +92,626 @@ class FLOperator:
             self.device,
             **self.cfg.fed.args,
         )
+        # Layout of the global model published to clients once per session.
+        self.schema = ModelSchema.from_state(self.fed_server.model.state_dict())
+
+        # Asynchronous mode: every buffer_size uploads are aggregated into a new global model (version),
+        # and clients train on the latest version without waiting for each other.
+        self.asynchronous = cfg.asynchronous.enable
+        if self.asynchronous:
+            self.async_lock = threading.Lock()
+            self.async_aggregator = FedAsyncAggregator(
+                self.fed_server.model,
+                buffer_size=cfg.asynchronous.buffer_size,
+                staleness_fn=cfg.asynchronous.staleness_fn,
+                staleness_args=cfg.asynchronous.staleness_args,
+                max_staleness=cfg.asynchronous.max_staleness,
+                mixing_rate=cfg.asynchronous.mixing_rate,
+            )
+            self.global_state_history = OrderedDict()  # round number -> packed global model
+            self.global_state_segment_history = OrderedDict()
+
+        # Partial participation: clients sampled for each round, and a deadline after which
+        # the round is aggregated with the results received.
+        self.sampler = create_client_sampler(cfg, num_clients)
+        self.deadline = cfg.participation.deadline
+        self.deadline_timer = None
+        self.round_participants = self.sampler.sample(self.round_number)
+        if not self.asynchronous and (
+            self.sampler.count < num_clients or self.deadline > 0
+        ):
+            check_partial_participation(self.fed_server)
+
+        # Clients on this host exchange models through shared memory segments.
+        self.use_shared_memory = cfg.server.use_shared_memory
+        if self.use_shared_memory:
+            max_segments = 2
+            if self.asynchronous:
+                max_segments = cfg.asynchronous.max_staleness + 2
+            self.segment_publisher = SegmentPublisher(max_segments)
+
+        # Partial uploads of learning results, from which interrupted clients resume.
+        # Results carry at most a primal and a dual state, with the names and shapes of their tensors.
+        self.uploads = UploadManager(
+            cfg.server.upload_ttl,
+            max_size=2 * self.schema.total_bytes + 1024 * (len(self.schema.names) + 1),
+            max_uploads_per_client=cfg.server.upload_max_per_client,
+        )
+
+        # Snapshots of the operator, from which a restarted server resumes the current round.
+        self.checkpoint = None
+        self.checkpoint_interval = cfg.operator.checkpoint_interval
+        self.restored_round = 0
+        if cfg.operator.checkpoint_dir:
+            self.checkpoint = CheckpointWriter(cfg.operator.checkpoint_dir)
+            self.restore()
+
+        self.publish_global_state()
+        if self.restored_round > 0 and self.is_round_finished():
+            self.aggregated_round = self.round_number
+            self.update_model_weights(self.round_participants)
 
     """
-    Return the tensor record of a global model requested by its name.
+    Publish an immutable copy of the global model, from which clients read during aggregation.
+    """
+
+    def publish_global_state(self):
+        self.global_state_bytes = self.schema.pack(self.fed_server.model.state_dict())
+        self.global_state_snapshot = self.schema.unpack(self.global_state_bytes)
+        if self.use_shared_memory:
+            self.global_state_segment = self.segment_publisher.publish(
+                self.global_state_bytes
+            )
+
+        if self.asynchronous:
+            # Keep the versions that clients may still train on, to compute their updates.
+            self.global_state_history[self.round_number] = self.global_state_bytes
+            if self.use_shared_memory:
+                self.global_state_segment_history[
+                    self.round_number
+                ] = self.global_state_segment
+            while (
+                next(iter(self.global_state_history))
+                < self.round_number - self.cfg.asynchronous.max_staleness
+            ):
+                round_number, _ = self.global_state_history.popitem(last=False)
+                self.global_state_segment_history.pop(round_number, None)
+
+    def get_global_state(self, round_number):
+        if self.asynchronous:
+            if round_number not in self.global_state_history:
+                return None
+            return self.schema.unpack(self.global_state_history[round_number])
+        return self.global_state_snapshot
+
+    """
+    Return the global model packed by the schema. In asynchronous mode, the version of ``round_number``
+    is returned if it is still kept.
     """
 
-    def get_tensor(self, name):
+    def get_model_bytes(self, round_number=0):
+        if self.asynchronous and round_number in self.global_state_history:
+            return self.global_state_history[round_number]
+        return self.global_state_bytes
+
+    """
+    Return the name of the shared memory segment holding the global model of ``get_model_bytes``.
+    """
+
+    def get_model_segment(self, round_number=0):
+        if self.asynchronous and round_number in self.global_state_segment_history:
+            return self.global_state_segment_history[round_number]
+        return self.global_state_segment
+
+    def accepts_shared_memory(self, client_hostname):
+        return self.use_shared_memory and client_hostname == hostname()
+
+    def close(self):
+        self.wait_for_aggregation()
+        self.aggregation_executor.shutdown(wait=True)
+        if self.use_shared_memory:
+            self.segment_publisher.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+
+    """
+    Snapshot the state carried across rounds; the results received in a round are saved per client.
+    Called with ``job_condition`` held, between rounds.
+    """
+
+    def save_checkpoint(self):
+        state = OrderedDict()
+        state["round_number"] = self.round_number
+        state["best_accuracy"] = self.best_accuracy
+        state["client_training_size"] = copy.deepcopy(self.client_training_size)
+        state["fed_server"] = self.fed_server.state_dict()
+        if self.asynchronous:
+            state["global_state_history"] = OrderedDict(self.global_state_history)
+        self.checkpoint.submit("operator", state)
+
+    def save_client_results(self, client_id, round_number):
+        state = OrderedDict()
+        state["round_number"] = round_number
+        state["results"] = OrderedDict(
+            primal=self.client_states[client_id]["primal"],
+            dual=self.client_states[client_id]["dual"],
+            penalty=OrderedDict({client_id: self.client_states[client_id]["penalty"][client_id]}),
+        )
+        self.checkpoint.submit("client_%d" % client_id, state)
+
+    def restore(self):
+        state = self.checkpoint.load("operator")
+        if state is None:
+            return
+        self.round_number = state["round_number"]
+        self.aggregated_round = self.round_number - 1
+        self.best_accuracy = state["best_accuracy"]
+        for client_id, training_size in state["client_training_size"].items():
+            self.client_training_size[client_id] = training_size
+            self.client_training_size_received[client_id] = True
+        self.fed_server.load_state_dict(state["fed_server"])
+        if self.asynchronous:
+            self.global_state_history.update(state["global_state_history"])
+        if self.all_weights_received():
+            self.compute_weights()
+            self.weights_round = self.round_number
+        self.round_participants = self.sampler.sample(self.round_number)
+
+        received = []
+        for client_id in self.round_participants:
+            client_state = self.checkpoint.load("client_%d" % client_id)
+            if client_state is None or client_state["round_number"] != self.round_number:
+                continue
+            self.client_states[client_id] = client_state["results"]
+            self.client_learning_status[(client_id, self.round_number)] = True
+            received.append(client_id)
+        self.restored_round = self.round_number
+        if self.all_weights_received():
+            self.open_round()
+        self.logger.info(
+            f"[Round: {self.round_number: 04}] Restored from {self.checkpoint.dirname} with the results of clients {received}."
+        )
+
+    """
+    Check if the results of a client for the current round were lost by a restart of the server,
+    i.e., the client reports having handled the round but the restored state has no results from it.
+    """
+
+    def results_missing(self, client_id, round_number) -> bool:
         return (
-            np.array(self.fed_server.model.state_dict()[name])
-            if name in self.fed_server.model.state_dict()
-            else None
+            not self.asynchronous
+            and round_number == self.round_number == self.restored_round
+            and client_id in self.round_participants
+            and (client_id, round_number) not in self.client_learning_status
         )
 
+    """
+    Return the tensor record of a global model requested by its name.
+    In asynchronous mode, the version of ``round_number`` is returned if it is still kept.
+    """
+
+    def get_tensor(self, name, round_number=0):
+        global_state = self.global_state_snapshot
+        if self.asynchronous and round_number in self.global_state_history:
+            global_state = self.get_global_state(round_number)
+        return global_state.get(name)
+
     """
     Return the job status indicating the next job a client is supposed to do.
+    With a positive timeout, wait until there is a job newer than ``round_number``,
+    i.e., the last round handled by the client.
+    Clients not sampled for the current round, or with no newer job by the timeout, are told to wait.
     """
 
-    def get_job(self):
+    def get_job(self, round_number=0, timeout=0.0, client_id=None):
+        with self.job_condition:
+            timed_out = False
+            if timeout > 0:
+                timed_out = not self.job_condition.wait_for(
+                    lambda: self.has_new_job(round_number, client_id), timeout=timeout
+                )
+            return self.current_job(client_id, timed_out)
+
+    def current_job(self, client_id=None, timed_out=False):
         job_todo = Job.WEIGHT
         self.logger.debug(
             f"[Round: {self.round_number: 04}] client_training_size_received: {self.client_training_size_received}"
         )
-        if all(
-            c in self.client_training_size_received for c in range(self.num_clients)
-        ):
+        if self.all_weights_received():
             job_todo = Job.TRAIN
         if self.round_number > self.num_epochs:
             job_todo = Job.QUIT
+        if (
+            job_todo == Job.TRAIN
+            and not self.asynchronous
+            and client_id is not None
+            and client_id not in self.round_participants
+        ):
+            job_todo = Job.WAIT
+        if job_todo == Job.TRAIN and timed_out:
+            job_todo = Job.WAIT
         return min(self.round_number, self.num_epochs), job_todo
 
+    def has_new_job(self, round_number, client_id=None):
+        _, job_todo = self.current_job(client_id)
+        if self.asynchronous:
+            return job_todo in (Job.TRAIN, Job.QUIT)
+        return job_todo == Job.QUIT or (
+            job_todo == Job.TRAIN
+            and (
+                self.round_number > round_number
+                or self.results_missing(client_id, round_number)
+            )
+        )
+
+    def all_weights_received(self):
+        return all(
+            c in self.client_training_size_received for c in range(self.num_clients)
+        )
+
+    """
+    Wake up the clients waiting for their next job.
+    """
+
+    def notify_job_change(self):
+        with self.job_condition:
+            self.job_condition.notify_all()
+        for callback in self.job_listeners:
+            callback()
+
+    def add_job_listener(self, callback):
+        self.job_listeners.append(callback)
+
     """
     Compute weights of clients based on their training data size.
+    The weights are computed (and the round opened) once per round, by the last client to report;
+    clients retrying or reconnecting in the same round get the weights computed then.
     """
 
-    def get_weight(self, client_id, training_size) -> float:
-        self.client_training_size[client_id] = training_size
-        self.client_training_size_received[client_id] = True
+    def get_weight(self, client_id, training_size, timeout=0.0) -> float:
+        with self.job_condition:
+            self.client_training_size[client_id] = training_size
+            self.client_training_size_received[client_id] = True
+            self.logger.debug(
+                f"[Round: {self.round_number: 04}] client_training_size_received: {self.client_training_size_received}"
+            )
+
+            if self.all_weights_received():
+                if self.weights_round != self.round_number:
+                    self.weights_round = self.round_number
+                    self.compute_weights()
+                    self.open_round()
+                    if self.checkpoint is not None:
+                        self.save_checkpoint()
+                    self.notify_job_change()
+            elif timeout > 0:
+                self.job_condition.wait_for(self.all_weights_received, timeout=timeout)
+
+            return self.client_weights.get(client_id, -1.0)
+
+    def compute_weights(self):
+        total_training_size = sum(
+            self.client_training_size[c] for c in range(self.num_clients)
+        )
+        for c in range(self.num_clients):
+            self.client_weights[c] = self.client_training_size[c] / total_training_size
+
+        self.fed_server.set_weights(self.client_weights)
         self.logger.debug(
-            f"[Round: {self.round_number: 04}] client_training_size_received: {self.client_training_size_received}"
+            f"[Round: {self.round_number: 04}] self.client_weights: {self.client_weights}"
+        )
+        self.logger.debug(
+            f"[Round: {self.round_number: 04}] self.client_training_size: {self.client_training_size}"
+        )
+        self.logger.debug(
+            f"[Round: {self.round_number: 04}] self.fed_server.weights: {self.fed_server.weights}"
         )
 
-        # If we have received training size from all clients
-        if all(
-            c in self.client_training_size_received for c in range(self.num_clients)
-        ):
-            # Instantiate a fed_server if not instantiated yet.
-            total_training_size = sum(
-                self.client_training_size[c] for c in range(self.num_clients)
+    """
+    Start the deadline of the current round, if any. Called with ``job_condition`` held.
+    """
+
+    def open_round(self):
+        if self.deadline_timer is not None:
+            self.deadline_timer.cancel()
+            self.deadline_timer = None
+        if self.deadline > 0 and not self.asynchronous and self.round_number <= self.num_epochs:
+            self.deadline_timer = threading.Timer(
+                self.deadline, self.on_deadline, args=(self.round_number,)
             )
-            for c in range(self.num_clients):
-                self.client_weights[c] = (
-                    self.client_training_size[c] / total_training_size
+            self.deadline_timer.daemon = True
+            self.deadline_timer.start()
+
+    """
+    Aggregate the results received by the deadline; results arriving later are dropped.
+    """
+
+    def on_deadline(self, round_number):
+        with self.job_condition:
+            if round_number != self.round_number or self.aggregated_round >= round_number:
+                return
+            participants = self.received_participants()
+            if len(participants) == 0:
+                self.logger.warning(
+                    f"[Round: {self.round_number: 04}] No results by the deadline; extending it."
                 )
+                self.open_round()
+                return
+            self.aggregated_round = self.round_number
 
-            self.fed_server.set_weights(self.client_weights)
-            self.logger.debug(
-                f"[Round: {self.round_number: 04}] self.client_weights: {self.client_weights}"
+        self.logger.info(
+            f"[Round: {self.round_number: 04}] Deadline; aggregating the results of clients {participants}."
+        )
+        self.submit_aggregation(participants)
+
+    """
+    Aggregate the round in the aggregation executor, so that the upload completing the round is
+    acknowledged without waiting for the aggregation and the validation.
+    """
+
+    def submit_aggregation(self, participants):
+        def aggregate():
+            try:
+                self.update_model_weights(participants)
+            except Exception:
+                self.logger.exception(
+                    f"[Round: {self.round_number: 04}] Failed to update model weights"
+                )
+                raise
+
+        self.aggregation_future = self.aggregation_executor.submit(aggregate)
+        return self.aggregation_future
+
+    def wait_for_aggregation(self, timeout=None):
+        """Wait until the rounds submitted for aggregation are aggregated and validated."""
+        future = self.aggregation_future
+        if future is not None:
+            futures.wait([future], timeout=timeout)
+
+    """
+    Update model weights of a global model. After updating, we increment the round number.
+    Clients absent from ``participants`` have zero weight.
+    """
+
+    def update_model_weights(self, participants=None):
+        if participants is None:
+            participants = list(range(self.num_clients))
+        self.logger.info(f"[Round: {self.round_number: 04}] Updating model weights")
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for lock in self.client_locks:
+                stack.enter_context(lock)
+            self.client_states.update(
+                absent_states(
+                    self.fed_server.model.state_dict(), participants, self.num_clients
+                )
             )
-            self.logger.debug(
-                f"[Round: {self.round_number: 04}] self.client_training_size: {self.client_training_size}"
+            self.fed_server.set_weights(
+                renormalize_weights(self.client_weights, participants)
             )
             self.logger.debug(
                 f"[Round: {self.round_number: 04}] self.fed_server.weights: {self.fed_server.weights}"
             )
-            return self.client_weights[client_id]
-        else:
-            return -1.0
+            self.fed_server.update([self.client_states])
+            self.publish_global_state()
+        self.metrics.observe("aggregation_seconds", time.perf_counter() - start)
+        self.metrics.inc("aggregated_updates_total", len(participants))
+
+        self.finish_round()
 
     """
-    Update model weights of a global model. After updating, we increment the round number.
+    Increment the round number, then validate and save the global model of the finished round.
+    Clients start the next round while the global model is validated; the operator is checkpointed
+    after the validation, so that the checkpoint carries its best accuracy.
     """
 
-    def update_model_weights(self):
-        self.logger.info(f"[Round: {self.round_number: 04}] Updating model weights")
-        self.logger.debug(
-            f"[Round: {self.round_number: 04}] self.fed_server.weights: {self.fed_server.weights}"
-        )
-        self.fed_server.update([self.client_states])
+    def finish_round(self):
+        round_number = self.advance_round()
+        self.complete_round(round_number, self.fed_server)
+
+    def complete_round(self, round_number, server):
+        self.validate_round(round_number, server)
+        if self.checkpoint is not None and round_number % self.checkpoint_interval == 0:
+            ## In asynchronous mode, uploads are aggregated during the validation: snapshot the latest version
+            with ExitStack() as stack:
+                if self.asynchronous:
+                    stack.enter_context(self.async_lock)
+                stack.enter_context(self.job_condition)
+                self.save_checkpoint()
 
+    def advance_round(self):
+        """Open the next round (publishing the global model in asynchronous mode); return the finished one."""
+        round_number = self.round_number
+        with self.job_condition:
+            self.round_number += 1
+            self.round_participants = self.sampler.sample(self.round_number)
+            self.open_round()
+            if self.asynchronous:
+                self.publish_global_state()
+        self.notify_job_change()
+        return round_number
+
+    def validate_round(self, round_number, server):
+        """Validate and save the global model of ``server`` at the end of ``round_number``."""
         if self.cfg.validation == True:
-            test_loss, accuracy = validation(self.fed_server, self.dataloader)
+            start = time.perf_counter()
+            test_loss, accuracy = validation(server, self.dataloader)
+            self.metrics.observe("validation_seconds", time.perf_counter() - start)
 
             if accuracy > self.best_accuracy:
                 self.best_accuracy = accuracy
 
             self.logger.info(
-                f"[Round: {self.round_number: 04}] Test set: Average loss: {test_loss:.4f}, Accuracy: {accuracy:.2f}%, Best Accuracy: {self.best_accuracy:.2f}%"
+                f"[Round: {round_number: 04}] Test set: Average loss: {test_loss:.4f}, Accuracy: {accuracy:.2f}%, Best Accuracy: {self.best_accuracy:.2f}%"
             )
 
         if (
-            self.round_number % self.cfg.checkpoints_interval == 0
-            or self.round_number == self.cfg.num_epochs
+            round_number % self.cfg.checkpoints_interval == 0
+            or round_number == self.cfg.num_epochs
         ):
             """Saving model"""
             if self.cfg.save_model == True:
-                save_model_iteration(self.round_number, self.model, self.cfg)
-
-        self.round_number += 1
+                save_model_iteration(round_number, server.model, self.cfg)
 
     """
-    Check if we have received model weights from all clients for this round.
+    Check if we have received model weights from all clients sampled for this round.
     """
 
     def is_round_finished(self):
         return all(
             (c, self.round_number) in self.client_learning_status
-            for c in range(0, self.num_clients)
+            for c in self.round_participants
         )
 
+    def received_participants(self):
+        return [
+            c
+            for c in self.round_participants
+            if (c, self.round_number) in self.client_learning_status
+        ]
+
     """
     Receive model weights from a client. When we have received weights from all clients,
     it will trigger a global model update.
     """
 
-    def send_learning_results(self, client_id, round_number, penalty, primal, dual):
+    def send_learning_results(
+        self,
+        client_id,
+        round_number,
+        penalty,
+        primal,
+        dual,
+        primal_quantized=(),
+        schema_hash="",
+        primal_bytes=b"",
+        dual_bytes=b"",
+        primal_segment="",
+        dual_segment="",
+    ):
         self.logger.debug(
             f"[Round: {self.round_number: 04}] self.fed_server.weights: {self.fed_server.weights}"
         )
+        # Co-located clients leave their results in shared memory segments, named after the client.
+        for segment in (primal_segment, dual_segment):
+            if segment and not is_client_segment(segment, client_id):
+                self.logger.warning(
+                    f"[Round: {self.round_number: 04}] Dropped results of client {client_id} in segment {segment!r}."
+                )
+                return
+        try:
+            if self.use_shared_memory and primal_segment:
+                primal_bytes = read_segment(primal_segment, self.schema.total_bytes)
+            if self.use_shared_memory and dual_segment:
+                dual_bytes = read_segment(dual_segment, self.schema.total_bytes)
+        except FileNotFoundError as e:
+            raise InvalidResults("Results of client %d: %s" % (client_id, e))
+        if (primal_bytes or dual_bytes) and schema_hash != self.schema.hash:
+            self.logger.warning(
+                f"[Round: {self.round_number: 04}] Dropped results of client {client_id} with an unknown schema."
+            )
+            return
+        for data in (primal_bytes, dual_bytes):
+            if data and len(data) != self.schema.total_bytes:
+                raise InvalidResults(
+                    "Results of client %d have %d bytes; the model schema has %d"
+                    % (client_id, len(data), self.schema.total_bytes)
+                )
+        # Received arrays are read-only views of the messages; the tensors aggregated in place are copies.
         primal_tensors = OrderedDict()
         dual_tensors = OrderedDict()
+        if primal_bytes:
+            for name, nparray in self.schema.unpack(primal_bytes).items():
+                primal_tensors[name] = torch.tensor(nparray)
+        if dual_bytes:
+            for name, nparray in self.schema.unpack(dual_bytes).items():
+                dual_tensors[name] = torch.tensor(nparray)
         for tensor in primal:
-            name = tensor.name
-            shape = tuple(tensor.data_shape)
-            flat = np.frombuffer(tensor.data_bytes, dtype=eval(tensor.data_dtype))
-            nparray = np.reshape(flat, newshape=shape, order="C")
-            primal_tensors[name] = torch.from_numpy(nparray)
+            primal_tensors[tensor.name] = torch.tensor(utils.tensor_from_record(tensor))
+        # Quantized updates are relative to the global model the client has trained on.
+        global_state = self.get_global_state(round_number)
+        if global_state is None:
+            self.logger.warning(
+                f"[Round: {self.round_number: 04}] Dropped results of client {client_id} for round {round_number}."
+            )
+            return
+        for record in primal_quantized:
+            primal_tensors[record.name] = torch.from_numpy(
+                global_state[record.name].astype(np.float32)
+                + dequantize(utils.quantized_tensor_from_record(record))
+            )
         for tensor in dual:
-            name = tensor.name
-            shape = tuple(tensor.data_shape)
-            flat = np.frombuffer(tensor.data_bytes, dtype=eval(tensor.data_dtype))
-            nparray = np.reshape(flat, newshape=shape, order="C")
-            dual_tensors[name] = torch.from_numpy(nparray)
-        self.client_states[client_id]["primal"] = primal_tensors
-        self.client_states[client_id]["dual"] = dual_tensors
-        self.client_states[client_id]["penalty"][client_id] = penalty
-        self.client_learning_status[(client_id, round_number)] = True
-        self.logger.debug(
-            f"[Round: {self.round_number: 04}] self.fed_server.weights: {self.fed_server.weights}"
-        )
+            dual_tensors[tensor.name] = torch.tensor(utils.tensor_from_record(tensor))
+
+        if self.asynchronous:
+            self.receive_async_results(client_id, round_number, primal_tensors)
+            return
+
+        with self.client_locks[client_id]:
+            if (
+                round_number != self.round_number
+                or client_id not in self.round_participants
+            ):
+                self.logger.warning(
+                    f"[Round: {self.round_number: 04}] Dropped results of client {client_id} for round {round_number}."
+                )
+                return
+            self.client_states[client_id]["primal"] = primal_tensors
+            self.client_states[client_id]["dual"] = dual_tensors
+            self.client_states[client_id]["penalty"][client_id] = penalty
+            if self.checkpoint is not None:
+                self.save_client_results(client_id, round_number)
 
         # Round is finished when we have received model weights from all clients.
-        if self.is_round_finished():
+        # Only the upload completing the round triggers the global model update.
+        with self.job_condition:
+            self.client_learning_status[(client_id, round_number)] = True
+            start_update = (
+                self.is_round_finished() and self.aggregated_round < self.round_number
+            )
+            if start_update:
+                self.aggregated_round = self.round_number
+
+        if start_update:
             self.logger.info(
                 f"[Round: {self.round_number: 04}] Finished; all clients have sent their results."
             )
-            self.update_model_weights()
+            self.submit_aggregation(self.round_participants)
+
+    """
+    Buffer the results of a client in asynchronous mode. A new version of the global model is published
+    as soon as the buffer is full.
+    """
+
+    def receive_async_results(self, client_id, round_number, primal_tensors):
+        with self.async_lock:
+            base_state = self.get_global_state(round_number)
+            if base_state is None or self.round_number > self.num_epochs:
+                self.logger.warning(
+                    f"[Round: {self.round_number: 04}] Dropped results of client {client_id} for round {round_number}."
+                )
+                return
+            buffer_full = self.async_aggregator.add(
+                client_id,
+                self.client_weights[client_id],
+                primal_tensors,
+                base_state,
+                self.round_number - round_number,
+            )
+            if buffer_full:
+                self.logger.info(
+                    f"[Round: {self.round_number: 04}] Updating model weights asynchronously"
+                )
+                start = time.perf_counter()
+                num_updates = self.async_aggregator.num_buffered
+                self.async_aggregator.aggregate()
+                self.metrics.observe("aggregation_seconds", time.perf_counter() - start)
+                self.metrics.inc("aggregated_updates_total", num_updates)
+                round_number = self.advance_round()
+                # Uploads keep being buffered and aggregated while a copy of the new version is validated.
+                server = self.fed_server
+                if self.cfg.validation == True or self.cfg.save_model == True:
+                    server = server_snapshot(self.fed_server)
+                self.aggregation_future = self.aggregation_executor.submit(
+                    self.complete_round, round_number, server
+                )
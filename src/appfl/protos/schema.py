@@ -0,0 +1,154 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from .federated_learning_pb2 import TensorSpec
+from .federated_learning_pb2 import ModelSchema as ModelSchemaProto
+
+## Offsets of tensors in a contiguous buffer are aligned to this many bytes.
+ALIGNMENT = 64
+
+_DTYPES = {
+    name: np.dtype(name)
+    for name in (
+        "float16",
+        "float32",
+        "float64",
+        "int8",
+        "int16",
+        "int32",
+        "int64",
+        "uint8",
+        "bool",
+    )
+}
+
+
+def parse_dtype(dtype_string):
+    """Return the numpy dtype named by ``dtype_string`` (e.g., ``float32`` or ``np.float32``) without ``eval``."""
+    name = dtype_string[3:] if dtype_string.startswith("np.") else dtype_string
+    if name not in _DTYPES:
+        raise ValueError("Unsupported dtype: %s" % dtype_string)
+    return _DTYPES[name]
+
+
+def _to_numpy(value):
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    return np.asarray(value)
+
+
+class ModelSchema:
+    """Manifest of the tensors of a model laid out in one contiguous buffer.
+
+    The server publishes the schema once per session; afterwards, a model (or a model update) travels as
+    one raw buffer tagged with the schema hash, and is decoded as zero-copy views of the buffer.
+
+    Args:
+        specs (List): ``(name, shape, dtype)`` of each tensor, in the order of the buffer
+    """
+
+    def __init__(self, specs):
+        self.names = []
+        self.shapes = OrderedDict()
+        self.dtypes = OrderedDict()
+        self.offsets = OrderedDict()
+        self.nbytes = OrderedDict()
+        offset = 0
+        for name, shape, dtype in specs:
+            dtype = np.dtype(dtype)
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            self.names.append(name)
+            self.shapes[name] = tuple(int(s) for s in shape)
+            self.dtypes[name] = dtype
+            self.offsets[name] = offset
+            self.nbytes[name] = int(np.prod(self.shapes[name], dtype=np.int64)) * dtype.itemsize
+            offset += self.nbytes[name]
+        self.total_bytes = offset
+
+        manifest = [
+            (name, self.shapes[name], self.dtypes[name].name, self.offsets[name])
+            for name in self.names
+        ]
+        self.hash = hashlib.sha256(json.dumps(manifest).encode()).hexdigest()
+
+    @classmethod
+    def from_state(cls, state):
+        specs = []
+        for name, value in state.items():
+            value = _to_numpy(value)
+            specs.append((name, value.shape, value.dtype))
+        return cls(specs)
+
+    @classmethod
+    def from_proto(cls, proto):
+        schema = cls(
+            [
+                (spec.name, tuple(spec.data_shape), parse_dtype(spec.data_dtype))
+                for spec in proto.tensors
+            ]
+        )
+        if schema.hash != proto.schema_hash or schema.total_bytes != proto.total_bytes:
+            raise ValueError("Model schema does not match its hash")
+        return schema
+
+    def to_proto(self, header=None):
+        return ModelSchemaProto(
+            header=header,
+            schema_hash=self.hash,
+            total_bytes=self.total_bytes,
+            tensors=[
+                TensorSpec(
+                    name=name,
+                    data_shape=list(self.shapes[name]),
+                    data_dtype=self.dtypes[name].name,
+                    offset=self.offsets[name],
+                    nbytes=self.nbytes[name],
+                )
+                for name in self.names
+            ],
+        )
+
+    def matches(self, state) -> bool:
+        """Check if ``state`` has exactly the tensors of this schema."""
+        if len(state) != len(self.names):
+            return False
+        for name in self.names:
+            if name not in state or tuple(state[name].shape) != self.shapes[name]:
+                return False
+        return True
+
+    def pack(self, state) -> bytes:
+        buffer = bytearray(self.total_bytes)
+        self.pack_into(state, buffer)
+        return bytes(buffer)
+
+    def pack_into(self, state, buffer):
+        """Write ``state`` into a writable buffer (e.g., a shared memory segment) of at least ``total_bytes``."""
+        for name in self.names:
+            view = np.frombuffer(
+                buffer,
+                dtype=self.dtypes[name],
+                count=self.nbytes[name] // self.dtypes[name].itemsize,
+                offset=self.offsets[name],
+            )
+            view[...] = _to_numpy(state[name]).reshape(-1)
+
+    def unpack(self, data) -> OrderedDict:
+        """Zero-copy views of the tensors in ``data``; read-only if ``data`` is ``bytes``."""
+        if len(data) != self.total_bytes:
+            raise ValueError(
+                "Buffer of %d bytes does not match the schema (%d bytes)"
+                % (len(data), self.total_bytes)
+            )
+        state = OrderedDict()
+        for name in self.names:
+            state[name] = np.frombuffer(
+                data,
+                dtype=self.dtypes[name],
+                count=self.nbytes[name] // self.dtypes[name].itemsize,
+                offset=self.offsets[name],
+            ).reshape(self.shapes[name])
+        return state
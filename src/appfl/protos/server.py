@@ -8,6 +8,10 @@ from .federated_learning_pb2 import JobResponse
 from .federated_learning_pb2 import WeightResponse
 from .federated_learning_pb2 import LearningResults
 from .federated_learning_pb2 import Acknowledgment
+from .federated_learning_pb2 import SegmentHandle
+from .federated_learning_pb2 import UploadAck
+from .upload import UploadError
+from .operator import InvalidResults
 from . import utils
 from . import federated_learning_pb2_grpc
 
@@ -25,9 +29,16 @@ class FLServicer(federated_learning_pb2_grpc.FederatedLearningServicer):
             request.header.client_id,
             request.job_done,
         )
-        round_number, job_todo = self.operator.get_job()
+        round_number, job_todo = self.operator.get_job(
+            request.round_number, request.wait_timeout, request.header.client_id
+        )
         return JobResponse(
-            header=request.header, round_number=round_number, job_todo=job_todo
+            header=request.header,
+            round_number=round_number,
+            job_todo=job_todo,
+            results_missing=self.operator.results_missing(
+                request.header.client_id, request.round_number
+            ),
         )
 
     def GetTensorRecord(self, request, context):
@@ -37,7 +48,7 @@ class FLServicer(federated_learning_pb2_grpc.FederatedLearningServicer):
             request.name,
             request.round_number,
         )
-        nparray = self.operator.get_tensor(request.name)
+        nparray = self.operator.get_tensor(request.name, request.round_number)
         return utils.construct_tensor_record(request.name, nparray)
 
     def GetWeight(self, request, context):
@@ -46,7 +57,9 @@ class FLServicer(federated_learning_pb2_grpc.FederatedLearningServicer):
             request.header.client_id,
             request.size,
         )
-        weight = self.operator.get_weight(request.header.client_id, request.size)
+        weight = self.operator.get_weight(
+            request.header.client_id, request.size, request.wait_timeout
+        )
         self.logger.debug(
             f"[Servicer ID: {self.servicer_id: 03}] get_weight returns %e", weight
         )
@@ -57,34 +70,164 @@ class FLServicer(federated_learning_pb2_grpc.FederatedLearningServicer):
             f"[Servicer ID: {self.servicer_id: 03}] self.operator.fed_server.weights: {self.operator.fed_server.weights}"
         )
         # Restore LearningResults protocol buffer.
-        proto = LearningResults()
-        bytes_received = b""
-        for request in request_iterator:
-            bytes_received += request.data_bytes
+        bytes_received = b"".join(request.data_bytes for request in request_iterator)
 
         self.logger.debug(
             f"[Servicer ID: {self.servicer_id: 03}] self.operator.fed_server.weights: {self.operator.fed_server.weights}"
         )
 
         status = MessageStatus.EMPTY
+        header = None
         if len(bytes_received) > 0:
             status = MessageStatus.OK
-            proto.ParseFromString(bytes_received)
-            self.operator.send_learning_results(
-                proto.header.client_id,
-                proto.round_number,
-                proto.penalty,
-                proto.primal,
-                proto.dual,
-            )
+            try:
+                header = self.receive_learning_results(bytes_received)
+            except InvalidResults as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
 
-        ack = Acknowledgment(header=proto.header, status=status)
+        ack = Acknowledgment(header=header, status=status)
         return ack
 
+    def receive_learning_results(self, bytes_received):
+        proto = LearningResults()
+        proto.ParseFromString(bytes_received)
+        self.operator.send_learning_results(
+            proto.header.client_id,
+            proto.round_number,
+            proto.penalty,
+            proto.primal,
+            proto.dual,
+            proto.primal_quantized,
+            proto.schema_hash,
+            proto.primal_bytes,
+            proto.dual_bytes,
+            proto.primal_segment,
+            proto.dual_segment,
+        )
+        return proto.header
+
+    """
+    Resumable uploads: every chunk is acknowledged with the offset committed so far.
+    """
+
+    def UploadLearningResults(self, request_iterator, context):
+        for chunk in request_iterator:
+            try:
+                committed, bytes_received = self.operator.uploads.write(
+                    chunk.header.client_id,
+                    chunk.upload_id,
+                    chunk.offset,
+                    chunk.total_size,
+                    chunk.data_bytes,
+                )
+            except UploadError as e:
+                context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+            if bytes_received is not None:
+                self.logger.debug(
+                    f"[Servicer ID: {self.servicer_id: 03}] Received upload %s (%d bytes) from client %d",
+                    chunk.upload_id,
+                    committed,
+                    chunk.header.client_id,
+                )
+                self.receive_upload(chunk, bytes_received, context)
+            yield UploadAck(
+                header=chunk.header,
+                upload_id=chunk.upload_id,
+                committed_offset=committed,
+                complete=committed == chunk.total_size,
+                status=MessageStatus.OK,
+            )
+
+    """
+    Process a completed upload. If its results cannot be processed, the upload is discarded, so that the
+    client sends it again from the start, and the client is told why.
+    """
+
+    def receive_upload(self, chunk, bytes_received, context):
+        try:
+            self.receive_learning_results(bytes_received)
+            return
+        except InvalidResults as e:
+            code, error = grpc.StatusCode.INVALID_ARGUMENT, e
+        except Exception as e:
+            self.logger.exception(
+                f"[Servicer ID: {self.servicer_id: 03}] Failed to process upload %s of client %d",
+                chunk.upload_id,
+                chunk.header.client_id,
+            )
+            code, error = grpc.StatusCode.INTERNAL, e
+        self.operator.uploads.discard(chunk.header.client_id, chunk.upload_id)
+        context.abort(code, "Upload %s: %s" % (chunk.upload_id, error))
+
+    def ResumeUpload(self, request, context):
+        committed, complete = self.operator.uploads.status(
+            request.header.client_id, request.upload_id
+        )
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Client %d resumes upload %s from offset %d",
+            request.header.client_id,
+            request.upload_id,
+            committed,
+        )
+        return UploadAck(
+            header=request.header,
+            upload_id=request.upload_id,
+            committed_offset=committed,
+            complete=complete,
+            status=MessageStatus.OK,
+        )
+
+    def GetSchema(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received SchemaRequest from client %d",
+            request.header.client_id,
+        )
+        proto = self.operator.schema.to_proto(request.header)
+        proto.shared_memory = self.operator.accepts_shared_memory(request.hostname)
+        return proto
+
+    def GetModelSegment(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received ModelRequest (shared memory) from (client,round)=(%d,%d)",
+            request.header.client_id,
+            request.round_number,
+        )
+        if not self.operator.use_shared_memory:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION, "Shared memory is disabled"
+            )
+        return SegmentHandle(
+            header=request.header,
+            name=self.operator.get_model_segment(request.round_number),
+            size=self.operator.schema.total_bytes,
+            round_number=request.round_number,
+            schema_hash=self.operator.schema.hash,
+        )
+
+    def GetModel(self, request, context):
+        self.logger.debug(
+            f"[Servicer ID: {self.servicer_id: 03}] Received ModelRequest from (client,round)=(%d,%d)",
+            request.header.client_id,
+            request.round_number,
+        )
+        if request.schema_hash != self.operator.schema.hash:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION, "Model schema does not match"
+            )
+        data_bytes = self.operator.get_model_bytes(request.round_number)
+        yield from utils.bytes_to_databuffer(data_bytes)
+
 
-def serve(servicer, max_message_size=2 * 1024 * 1024):
+def serve(
+    servicer,
+    max_message_size=2 * 1024 * 1024,
+    max_workers=10,
+    uds_path="",
+    interceptors=(),
+):
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        interceptors=interceptors,
         options=[
             ("grpc.max_send_message_length", max_message_size),
             ("grpc.max_receive_message_length", max_message_size),
@@ -94,6 +237,8 @@ def serve(servicer, max_message_size=2 * 1024 * 1024):
         servicer, server
     )
     server.add_insecure_port("[::]:" + servicer.port)
+    if uds_path:
+        server.add_insecure_port("unix:" + uds_path)
     server.start()
     try:
         server.wait_for_termination()
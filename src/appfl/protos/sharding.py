@@ -0,0 +1,249 @@
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent import futures
+
+from .federated_learning_pb2 import Job
+from .schema import ModelSchema, ALIGNMENT
+
+""" Model-sharded parameter server.
+
+    The tensors of the model are partitioned across several gRPC operators by byte size. Each operator
+    aggregates its shard as an ordinary session over a sub-model, and clients download and upload the shards
+    in parallel. Since the server algorithms update every tensor independently, the shards together compute
+    the same global model as a single operator.
+"""
+
+
+def partition_state(state, num_shards):
+    """Partition the tensors of ``state`` into ``num_shards`` lists of names of balanced byte sizes.
+
+    Tensors are assigned from the largest to the least loaded shard; every shard keeps the order of
+    ``state``. The partition only depends on the names and shapes, so that clients and operators agree on it.
+    """
+    nbytes = OrderedDict(
+        (name, tensor.numel() * tensor.element_size()) for name, tensor in state.items()
+    )
+    if num_shards > len(nbytes):
+        raise ValueError(
+            "Cannot partition %d tensors into %d shards" % (len(nbytes), num_shards)
+        )
+    loads = [0] * num_shards
+    owner = {}
+    for name in sorted(nbytes, key=lambda name: -nbytes[name]):
+        shard = loads.index(min(loads))
+        owner[name] = shard
+        loads[shard] += nbytes[name]
+    return [[name for name in nbytes if owner[name] == i] for i in range(num_shards)]
+
+
+def shard_model(model, names):
+    """Copy of ``model`` keeping only the parameters and buffers in ``names``.
+
+    The sub-model cannot run forward passes, but its ``state_dict`` and ``named_parameters`` cover the shard
+    under the names of the full model, as the server algorithms expect.
+    """
+    names = set(names)
+    shard = copy.deepcopy(model)
+    for module_name, module in shard.named_modules():
+        prefix = module_name + "." if module_name else ""
+        for key in list(module._parameters):
+            if prefix + key not in names:
+                del module._parameters[key]
+        for key in list(module._buffers):
+            if prefix + key not in names:
+                del module._buffers[key]
+    return shard
+
+
+def shard_config(cfg, shard_id):
+    """Configuration of the operator of shard ``shard_id``, listening on ``server.port + shard_id``."""
+    if cfg.asynchronous.enable == True or cfg.participation.deadline > 0:
+        raise ValueError(
+            "Sharded servers require synchronous rounds without deadline, "
+            "so that every shard aggregates the same clients."
+        )
+    cfg = copy.deepcopy(cfg)
+    suffix = "_shard_%d" % shard_id
+    cfg.server.port = cfg.server.port + shard_id
+    cfg.output_filename = cfg.output_filename + suffix
+    ## A sub-model cannot be evaluated.
+    cfg.validation = False
+    cfg.load_model = False
+    if cfg.server.uds_path:
+        cfg.server.uds_path = cfg.server.uds_path + suffix
+    if cfg.operator.checkpoint_dir:
+        cfg.operator.checkpoint_dir = cfg.operator.checkpoint_dir + suffix
+    if cfg.metrics.http_port > 0:
+        cfg.metrics.http_port = cfg.metrics.http_port + shard_id
+    if cfg.metrics.json_path:
+        cfg.metrics.json_path = cfg.metrics.json_path + suffix
+    return cfg
+
+
+def shard_uris(cfg):
+    """URIs of the operators of the shards, on their Unix domain sockets if those are on this host."""
+    uris = []
+    for i in range(cfg.server.num_shards):
+        uds_path = cfg.server.uds_path + "_shard_%d" % i
+        if cfg.server.uds_path and os.path.exists(uds_path):
+            uris.append("unix:" + uds_path)
+        else:
+            uris.append(cfg.server.host + ":" + str(cfg.server.port + i))
+    return uris
+
+
+class ShardedCodecStats:
+    """Bytes encoded by the codecs of all the shards."""
+
+    def __init__(self, codecs):
+        self.codecs = codecs
+
+    @property
+    def bytes_raw(self):
+        return sum(codec.bytes_raw for codec in self.codecs)
+
+    @property
+    def bytes_encoded(self):
+        return sum(codec.bytes_encoded for codec in self.codecs)
+
+    def compression_ratio(self) -> float:
+        if self.bytes_encoded == 0:
+            return 1.0
+        return self.bytes_raw / self.bytes_encoded
+
+
+class ShardedFLClient:
+    """Client of a sharded server, with the interface of ``FLClient``.
+
+    Every request is sent to the operators of all the shards in parallel. The client also coordinates the
+    rounds: it reports the oldest round among the shards, so that it only moves to the next round once every
+    shard has aggregated the current one.
+
+    Args:
+        shards (List): ``FLClient`` connected to the operator of each shard
+        partition (List): names of the tensors of each shard (see ``partition_state``)
+    """
+
+    def __init__(self, shards, partition):
+        self.logger = logging.getLogger(__name__)
+        self.shards = shards
+        self.partition = partition
+        self.owner = {name: i for i, names in enumerate(partition) for name in names}
+        self.client_id = shards[0].client_id
+        self.long_poll_timeout = shards[0].long_poll_timeout
+        self.metrics = shards[0].metrics
+        self.codec = None
+        if shards[0].codec is not None:
+            self.codec = ShardedCodecStats([shard.codec for shard in shards])
+        self.results_missing = False
+        self.schema = None
+        self.bases = []  # offset of each shard in the buffer of the schema
+        self.executor = futures.ThreadPoolExecutor(max_workers=len(shards))
+        self.time_get_job = 0.0
+        self.time_get_tensor = 0.0
+        self.time_send_results = 0.0
+
+    def map(self, function, *args):
+        """Call ``function(shard_id, shard, *args)`` for every shard in parallel and return the results."""
+        pending = [
+            self.executor.submit(function, i, shard, *args)
+            for i, shard in enumerate(self.shards)
+        ]
+        return [future.result() for future in pending]
+
+    @property
+    def bytes_uploaded(self):
+        return sum(shard.bytes_uploaded for shard in self.shards)
+
+    @property
+    def bytes_retransmitted(self):
+        return sum(shard.bytes_retransmitted for shard in self.shards)
+
+    def get_weight(self, training_size):
+        weights = self.map(lambda i, shard: shard.get_weight(training_size))
+        return min(weights)
+
+    def get_job(self, job_done, round_number=0):
+        start = time.time()
+        jobs = self.map(lambda i, shard: shard.get_job(job_done, round_number))
+        self.time_get_job += time.time() - start
+        self.results_missing = any(shard.results_missing for shard in self.shards)
+        if all(job_todo == Job.QUIT for _, job_todo in jobs):
+            return max(jobs)
+        ## Shards that have already finished wait for the others.
+        return min(job for job in jobs if job[1] != Job.QUIT)
+
+    def get_schema(self):
+        schemas = self.map(lambda i, shard: shard.get_schema())
+        if any(schema is None for schema in schemas):
+            self.schema = None
+            return None
+        ## Shards are laid out one after the other, each at an aligned offset, so that the offsets of the
+        ## tensors in the full buffer are those of their shard plus the base of the shard.
+        specs = []
+        self.bases = []
+        base = 0
+        for schema in schemas:
+            self.bases.append(base)
+            specs += [
+                (name, schema.shapes[name], schema.dtypes[name]) for name in schema.names
+            ]
+            base += -(-schema.total_bytes // ALIGNMENT) * ALIGNMENT
+        self.schema = ModelSchema(specs)
+        return self.schema
+
+    def get_model(self, round_number):
+        buffer = bytearray(self.schema.total_bytes)
+        self.get_model_into(round_number, buffer)
+        return self.schema.unpack(buffer)
+
+    def get_model_into(self, round_number, buffer):
+        view = memoryview(buffer).cast("B")
+
+        def download(i, shard):
+            base = self.bases[i]
+            shard.get_model_into(
+                round_number, view[base : base + shard.schema.total_bytes]
+            )
+
+        start = time.time()
+        self.map(download)
+        if round_number > 1:
+            self.time_get_tensor += time.time() - start
+        return buffer
+
+    def get_tensor_record(self, name, round_number):
+        return self.shards[self.owner[name]].get_tensor_record(name, round_number)
+
+    def send_learning_results(
+        self, penalty, primal, dual, round_number, global_state=None
+    ):
+        def send(i, shard):
+            names = self.partition[i]
+            shard.send_learning_results(
+                penalty,
+                OrderedDict((name, primal[name]) for name in names if name in primal),
+                OrderedDict((name, dual[name]) for name in names if name in dual),
+                round_number,
+                global_state=None
+                if global_state is None
+                else OrderedDict(
+                    (name, global_state[name]) for name in names if name in global_state
+                ),
+            )
+
+        start = time.time()
+        self.map(send)
+        if round_number > 1:
+            self.time_send_results += time.time() - start
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self.executor.shutdown()
+
+    def get_comm_time(self):
+        return self.time_get_job + self.time_get_tensor + self.time_send_results
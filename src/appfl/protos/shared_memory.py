@@ -0,0 +1,101 @@
+import os
+import re
+import socket
+import itertools
+from collections import OrderedDict
+from multiprocessing import shared_memory, resource_tracker
+
+""" Shared-memory transport for clients on the same host as the server.
+
+    Tensors are exchanged through POSIX shared memory segments laid out by the model schema,
+    while gRPC only carries control messages and segment names.
+"""
+
+_segment_ids = itertools.count()
+_created_segments = set()  # names of the segments created by this process
+
+
+def hostname():
+    return socket.gethostname()
+
+
+def new_segment_name(prefix="appfl"):
+    name = "%s_%d_%d" % (prefix, os.getpid(), next(_segment_ids))
+    _created_segments.add(name)
+    return name
+
+
+def client_segment_prefix(client_id):
+    return "appfl_client_%d" % client_id
+
+
+def is_client_segment(name, client_id):
+    """Whether ``name`` is a segment of ``client_id`` (named by ``new_segment_name`` with its prefix)."""
+    return re.fullmatch(r"%s_\d+_\d+" % client_segment_prefix(client_id), name) is not None
+
+
+def attach_segment(name):
+    segment = shared_memory.SharedMemory(name=name)
+    # The creating process owns the segment; do not let the tracker of this process unlink it at exit.
+    if name not in _created_segments:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def read_segment(name, size, out=None):
+    """Copy ``size`` bytes out of the segment ``name`` (into the writable buffer ``out``, if given)."""
+    segment = attach_segment(name)
+    try:
+        if out is None:
+            return bytearray(segment.buf[:size])
+        memoryview(out).cast("B")[:size] = segment.buf[:size]
+        return out
+    finally:
+        segment.close()
+
+
+class SegmentWriter:
+    """Segment of a fixed size rewritten with every message (e.g., the results of a client)."""
+
+    def __init__(self, size, prefix="appfl"):
+        self.segment = shared_memory.SharedMemory(
+            name=new_segment_name(prefix), create=True, size=max(size, 1)
+        )
+        self.name = self.segment.name
+
+    def close(self):
+        self.segment.close()
+        self.segment.unlink()
+        _created_segments.discard(self.name)
+
+
+class SegmentPublisher:
+    """Publish immutable buffers (e.g., versions of the global model) in new segments.
+
+    The last ``max_segments`` segments are kept so that clients can still attach to a recent version.
+    """
+
+    def __init__(self, max_segments=2, prefix="appfl"):
+        self.max_segments = max_segments
+        self.prefix = prefix
+        self.segments = OrderedDict()
+
+    def publish(self, data_bytes):
+        segment = shared_memory.SharedMemory(
+            name=new_segment_name(self.prefix), create=True, size=max(len(data_bytes), 1)
+        )
+        segment.buf[: len(data_bytes)] = data_bytes
+        self.segments[segment.name] = segment
+        while len(self.segments) > self.max_segments:
+            name, old = self.segments.popitem(last=False)
+            old.close()
+            old.unlink()
+            _created_segments.discard(name)
+        return segment.name
+
+    def close(self):
+        for name, segment in self.segments.items():
+            segment.close()
+            segment.unlink()
+            _created_segments.discard(name)
+        self.segments.clear()
@@ -0,0 +1,121 @@
+import threading
+import time
+
+""" Server-side buffers of resumable uploads.
+
+    A client uploads a serialized LearningResults in chunks tagged with an upload ID and a byte offset.
+    The server keeps the bytes received contiguously from offset 0, so that an interrupted upload continues
+    from the last committed offset instead of restarting from zero.
+"""
+
+
+class UploadError(Exception):
+    """A chunk does not continue its upload (wrong offset, size or client)."""
+
+
+class PartialUpload:
+    def __init__(self, client_id, total_size):
+        self.client_id = client_id
+        self.total_size = total_size
+        self.buffer = None  # allocated by the first chunk, under the lock of the upload
+        self.lock = threading.Lock()
+        self.committed = 0
+        self.complete = False
+        self.last_update = time.monotonic()
+
+
+class UploadManager:
+    """Partial uploads indexed by upload ID.
+
+    Uploads not updated for ``ttl`` seconds are dropped. Completed uploads are remembered (without their bytes)
+    for the same time, so that a client that missed the final acknowledgment does not send its results twice;
+    an upload whose results could not be processed is discarded instead, so that the client sends it again.
+    The buffer of an upload is allocated by its first chunk, so uploads larger than ``max_size`` are rejected,
+    and a client starting more than ``max_uploads_per_client`` partial uploads drops its oldest one.
+    Chunks of different uploads are copied concurrently; the lock of the manager only guards the index.
+
+    Args:
+        ttl (float): seconds a partial upload is kept without receiving a chunk
+        max_size (int): bytes of the largest upload accepted (0: no limit)
+        max_uploads_per_client (int): partial uploads kept per client (0: no limit)
+    """
+
+    def __init__(self, ttl=600.0, max_size=0, max_uploads_per_client=2):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_uploads_per_client = max_uploads_per_client
+        self.lock = threading.Lock()
+        self.uploads = {}
+
+    def expire(self):
+        now = time.monotonic()
+        with self.lock:
+            for upload_id in [
+                upload_id
+                for upload_id, upload in self.uploads.items()
+                if now - upload.last_update > self.ttl
+            ]:
+                del self.uploads[upload_id]
+
+    def drop_oldest_upload(self, client_id):
+        partial = [
+            (upload.last_update, upload_id)
+            for upload_id, upload in self.uploads.items()
+            if upload.client_id == client_id and not upload.complete
+        ]
+        if self.max_uploads_per_client > 0 and len(partial) >= self.max_uploads_per_client:
+            del self.uploads[min(partial)[1]]
+
+    def write(self, client_id, upload_id, offset, total_size, data_bytes):
+        """Append a chunk; returns the committed offset and the uploaded bytes once complete."""
+        self.expire()
+        with self.lock:
+            upload = self.uploads.get(upload_id)
+            if upload is None:
+                if self.max_size > 0 and total_size > self.max_size:
+                    raise UploadError(
+                        "Upload %s of %d bytes exceeds %d bytes" % (upload_id, total_size, self.max_size)
+                    )
+                self.drop_oldest_upload(client_id)
+                upload = PartialUpload(client_id, total_size)
+                self.uploads[upload_id] = upload
+        if upload.client_id != client_id or upload.total_size != total_size:
+            raise UploadError("Upload %s belongs to another client or size" % upload_id)
+        with upload.lock:
+            if upload.complete:
+                return upload.committed, None
+            if offset != upload.committed:
+                raise UploadError(
+                    "Upload %s expects offset %d, not %d"
+                    % (upload_id, upload.committed, offset)
+                )
+            end = offset + len(data_bytes)
+            if end > total_size:
+                raise UploadError("Upload %s exceeds %d bytes" % (upload_id, total_size))
+            if upload.buffer is None:
+                upload.buffer = bytearray(total_size)
+            upload.buffer[offset:end] = data_bytes
+            upload.committed = end
+            upload.last_update = time.monotonic()
+            if upload.committed < total_size:
+                return upload.committed, None
+            upload.complete = True
+            data, upload.buffer = upload.buffer, None
+            return upload.committed, bytes(data)
+
+    def discard(self, client_id, upload_id):
+        """Forget an upload of a client (e.g., whose results could not be processed)."""
+        with self.lock:
+            upload = self.uploads.get(upload_id)
+            if upload is not None and upload.client_id == client_id:
+                del self.uploads[upload_id]
+
+    def status(self, client_id, upload_id):
+        """Committed offset of an upload (0 if unknown or expired) and whether it is complete."""
+        self.expire()
+        with self.lock:
+            upload = self.uploads.get(upload_id)
+            if upload is None or upload.client_id != client_id:
+                return 0, False
+            upload.last_update = time.monotonic()
+            return upload.committed, upload.complete
@@ -1,5 +1,10 @@
 from .federated_learning_pb2 import DataBuffer
 from .federated_learning_pb2 import TensorRecord
+from .federated_learning_pb2 import QuantizedTensorRecord
+
+import numpy as np
+from appfl.codec import QuantizedTensor
+from .schema import parse_dtype, _to_numpy
 
 
 def construct_tensor_record(name, nparray):
@@ -11,6 +16,36 @@ def construct_tensor_record(name, nparray):
     )
 
 
+def construct_tensor_records(state):
+    return [construct_tensor_record(name, _to_numpy(value)) for name, value in state.items()]
+
+
+def tensor_from_record(record):
+    flat = np.frombuffer(record.data_bytes, dtype=parse_dtype(record.data_dtype))
+    return flat.reshape(tuple(record.data_shape))
+
+
+def construct_quantized_tensor_record(name, qtensor):
+    return QuantizedTensorRecord(
+        name=name,
+        data_shape=list(qtensor.shape),
+        bits=qtensor.bits,
+        block_size=qtensor.block_size,
+        data_bytes=qtensor.data_bytes,
+        scales=qtensor.scales.tobytes(order="C"),
+    )
+
+
+def quantized_tensor_from_record(record):
+    return QuantizedTensor(
+        shape=tuple(record.data_shape),
+        bits=record.bits,
+        block_size=record.block_size,
+        data_bytes=record.data_bytes,
+        scales=np.frombuffer(record.scales, dtype=np.float32),
+    )
+
+
 def proto_to_databuffer(proto, max_message_size=(2 * 1024 * 1024)):
     data_bytes = proto.SerializeToString()
     data_bytes_size = len(data_bytes)
@@ -22,3 +57,9 @@ def proto_to_databuffer(proto, max_message_size=(2 * 1024 * 1024)):
         chunk = data_bytes[i : i + message_size]
         msg = DataBuffer(size=message_size, data_bytes=chunk)
         yield msg
+
+
+def bytes_to_databuffer(data_bytes, chunk_size=(1024 * 1024)):
+    for i in range(0, len(data_bytes), chunk_size):
+        chunk = data_bytes[i : i + chunk_size]
+        yield DataBuffer(size=len(chunk), data_bytes=chunk)
@@ -3,14 +3,17 @@ from funcx import FuncXClient
 import numpy as np
 import torch.nn as nn
 import copy
-import ipdb
 import time
+from collections import OrderedDict
 
 from .algorithm import *
 from .misc import *
+from .codec import decode_local_states, CompactUpdate
 
 from .funcx import client_training, client_validate_data
 from .funcx import APPFLFuncTrainingEndpoints
+from .funcx import create_model_store, ModelHandle
+from .funcx import LocalStepScheduler
 
 from .funcx import appfl_funcx_save_log
 def run_server(
@@ -30,8 +33,24 @@ def run_server(
 
     ## funcX - APPFL training client
     trn_endps = APPFLFuncTrainingEndpoints(cfg, fxc, logger)
+    try:
+        server = train(cfg, model, loss_fn, trn_endps, test_data, logger)
+    finally:
+        ## Also stops the endpoint monitor when training fails
+        trn_endps.close()
+    appfl_funcx_save_log(cfg, logger)
+    server.logging_summary(cfg, logger)
+
+
+def train(cfg, model, loss_fn, trn_endps, test_data, logger):
+    """Check the data of the clients, then run the epochs; returns the APPFL server."""
+    ## Global models are written once per round to this store, and tasks only carry their handles
+    model_store = create_model_store(cfg)
+    if cfg.server.update_to_store and model_store is None:
+        raise ValueError("server.update_to_store requires server.model_store")
     
     ## Using tensorboard to visualize the test loss
+    writer = None
     if cfg.use_tensorboard:
         from tensorboardX import SummaryWriter
 
@@ -39,10 +58,6 @@ def run_server(
             comment=cfg.fed.args.optim + "_clients_nums_" + str(cfg.num_clients)
         )
         
-    ## Testing/validation variables
-    test_loss = 0.0
-    test_accuracy = 0.0
-    best_accuracy = 0.0
     # TODO: what is comm_size?
     cfg["logginginfo"]["comm_size"] = 1
 
@@ -53,10 +68,17 @@ def run_server(
     
     total_num_data = 0
     for k in range(cfg.num_clients):
+        if training_size_at_client.get(k) is None:
+            ## E.g., its endpoint is down (see server.endpoint_offline_timeout)
+            logger.warning("Client %s did not report its training samples; it is left out of training." % cfg.clients[k].name)
+            training_size_at_client[k] = 0
         total_num_data += training_size_at_client[k]
         #TODO: What if a client doesn't have any training samples
         logger.info("Client %s has %d training samples" % (cfg.clients[k].name, training_size_at_client[k]))
         
+    if total_num_data == 0:
+        raise RuntimeError("No training samples were reported by the clients")
+
     ## weight calculation
     weights = {}
     for k in range(cfg.num_clients):
@@ -69,6 +91,15 @@ def run_server(
     # Send server model to device
     server.model.to(cfg.server.device)
 
+    ## Partial participation (synchronous epochs only)
+    sampler = create_client_sampler(cfg, cfg.num_clients)
+    ## Clients reporting no training samples, or on unavailable endpoints, are left out of rounds
+    candidates = [k for k in range(cfg.num_clients) if weights[k] > 0]
+    left_out   = trn_endps.monitor is not None or len(candidates) < cfg.num_clients
+    if sampler.count < cfg.num_clients or cfg.participation.deadline > 0 \
+        or (left_out and not cfg.asynchronous.enable):
+        check_partial_participation(server)
+
     """ Server test-set data loader"""
     if cfg.validation == True and len(test_data) > 0:
         test_dataloader = DataLoader(
@@ -78,14 +109,54 @@ def run_server(
             shuffle=cfg.test_data_shuffle,
         )
     else:
+        test_dataloader = None
         cfg.validation = False
     
     # do_continue = True
 
     # client_training(cfg, 0, weights, model.state_dict(), loss_fn)
     
-    """ Looping over all epochs """ 
+    ## Local states are aggregated as they arrive (FedServer algorithms only)
+    streaming = cfg.server.streaming_aggregation
+    if streaming and not isinstance(server, FedServer):
+        logger.warning("%s does not support streaming aggregation; waiting for every client." % cfg.fed.servername)
+        streaming = False
+
+    ## Budgets of local steps per client, fitted to the times of its tasks (synchronous FedServer epochs only)
+    step_scheduler = None
+    if cfg.server.adaptive_local_steps:
+        if isinstance(server, FedServer) and not cfg.asynchronous.enable:
+            step_scheduler = LocalStepScheduler(
+                OrderedDict(
+                    (k, cfg.fed.args.num_local_epochs * -(-training_size_at_client[k] // cfg.train_data_batch_size))
+                    for k in range(cfg.num_clients)
+                ),
+                target_time = cfg.server.target_round_time,
+                min_steps   = cfg.server.min_local_steps,
+                max_steps   = cfg.server.max_local_steps,
+            )
+        else:
+            logger.warning("Adaptive local steps require synchronous epochs of a FedServer algorithm; ignored.")
+
     start_time = time.time()
+    ## Validation, logging and checkpointing (on a background thread with cfg.pipeline_validation, so that
+    ## the tasks of the next epoch are dispatched while the global model of the last one is validated)
+    finisher = RoundFinisher(cfg, logger, test_dataloader, writer, start_time)
+    try:
+        if cfg.asynchronous.enable:
+            run_async_epochs(cfg, server, trn_endps, model_store, weights, loss_fn, finisher, logger)
+        else:
+            run_sync_epochs(cfg, server, trn_endps, model_store, weights, loss_fn, finisher, logger,
+                sampler, candidates, streaming, step_scheduler)
+    finally:
+        finisher.close()
+    return server
+
+
+def run_sync_epochs(cfg, server, trn_endps, model_store, weights, loss_fn, finisher, logger,
+    sampler, candidates, streaming, step_scheduler):
+    """Synchronous funcX training: every epoch waits for the local updates of its participants."""
+    """ Looping over all epochs """ 
     for t in range(cfg.num_epochs):
         logger.info(" ====== Epoch [%d/%d] ====== " % (t+1, cfg.num_epochs))
         per_iter_start = time.time()
@@ -95,50 +166,200 @@ def run_server(
         global_state = server.model.state_dict()
         
         local_update_start = time.time()
+        task_state = global_state
+        if model_store is not None:
+            task_state = model_store.put(global_state)
+            logger.debug("Global model of epoch %d stored as %s" % (t + 1, task_state))
+        ## Sampled clients, replaced by others if their endpoints are not available
+        participants  = trn_endps.route(sampler.sample(t + 1), candidates)
+        ## Budgets of local steps of the participants
+        client_kwargs = None
+        if step_scheduler is not None:
+            client_kwargs = {
+                k: {"num_local_steps": steps} for k, steps in step_scheduler.assign(participants).items()
+            }
+        num_logged_tasks = len(cfg.logging_tasks)
         ## Boardcast global state and start training at funcX endpoints
         tasks   = trn_endps.send_task_to_clients(client_training,
-                    weights, global_state, loss_fn)
+                    weights, task_state, loss_fn, participants = participants, client_kwargs = client_kwargs)
     
-        ## Aggregate local updates from clients
-        local_states = []
-        local_states.append(trn_endps.receive_sync_endpoints_updates())
-        # TODO: timming for each client updates
-        cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
-
-        ## Perform global update
-        global_update_start = time.time()
-        server.update(local_states)
-        cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
-
-        """ Validation """
-        validation_start = time.time()
-        
-        if cfg.validation == True:
-            test_loss, test_accuracy = validation(server, test_dataloader)
-
-            if cfg.use_tensorboard:
-                # Add them to tensorboard
-                writer.add_scalar("server_test_accuracy", test_accuracy, t)
-                writer.add_scalar("server_test_loss", test_loss, t)
-
-            if test_accuracy > best_accuracy:
-                best_accuracy = test_accuracy
-
-        cfg["logginginfo"]["Validation_time"] = time.time() - validation_start
-        cfg["logginginfo"]["PerIter_time"]    = time.time() - per_iter_start
-        cfg["logginginfo"]["Elapsed_time"]    = time.time() - start_time
-        cfg["logginginfo"]["test_loss"]       = test_loss
-        cfg["logginginfo"]["test_accuracy"]   = test_accuracy
-        cfg["logginginfo"]["BestAccuracy"]    = best_accuracy
-
-        server.logging_iteration(cfg, logger, t)
-
-        """ Saving model"""
-        if (t + 1) % cfg.checkpoints_interval == 0 or t + 1 == cfg.num_epochs:
-            if cfg.save_model == True:
-                save_model_iteration(t + 1, server.model, cfg)
-    
-    appfl_funcx_save_log(cfg, logger)
-    server.logging_summary(cfg, logger)
+        if streaming:
+            ## Fold every local update into the global update as soon as it is fetched
+            server.set_weights(weights)
+            server.begin_update()
+            participants = []
+            stored = []
+            for client_idx, state in trn_endps.iter_endpoint_updates(cfg.participation.deadline):
+                if state is None:
+                    continue
+                stored += stored_updates([state])
+                if isinstance(state["primal"], CompactUpdate):
+                    ## Compact updates are deltas, decoded straight into the pseudo gradient
+                    server.accumulate_delta(client_idx, state["primal"].deltas(), state.get("num_steps"))
+                else:
+                    ## Quantized updates are decoded against the global model (unchanged until end_update)
+                    decode_local_states([{client_idx: state}], global_state)
+                    server.accumulate(client_idx, state)
+                participants.append(client_idx)
+            ## Identical updates share a blob, so blobs are removed once every update is decoded
+            remove_stored_updates(stored)
+            cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
 
-    
+            global_update_start = time.time()
+            if not server.end_update():
+                logger.warning("No update received in epoch %d" % (t + 1))
+            cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
+        else:
+            ## Aggregate local updates from clients
+            local_states = []
+            local_states.append(trn_endps.receive_sync_endpoints_updates(cfg.participation.deadline))
+            stored = stored_updates(local_states[0].values())
+            decode_local_states(local_states, global_state)
+            remove_stored_updates(stored)
+            # TODO: timming for each client updates
+            cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
+
+            ## Absent clients (not sampled, failed or late) have zero weight
+            participants = [k for k, state in local_states[0].items() if state is not None]
+            if len(participants) < cfg.num_clients:
+                local_states = [OrderedDict((k, local_states[0][k]) for k in participants)]
+                local_states.append(absent_states(global_state, participants, cfg.num_clients))
+
+            ## Perform global update
+            global_update_start = time.time()
+            if len(participants) > 0:
+                server.set_weights(renormalize_weights(weights, participants))
+                server.update(local_states)
+            else:
+                logger.warning("No update received in epoch %d" % (t + 1))
+            cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
+        cfg["logginginfo"]["Dispatch_time"]    = trn_endps.dispatch_time
+        cfg["logginginfo"]["Poll_count"]       = trn_endps.poll_count
+        if model_store is not None:
+            model_store.remove(task_state.key)
+
+        ## Achieved times of the budgets, from which the next budgets are fitted
+        if step_scheduler is not None:
+            achieved = step_scheduler.observe(cfg.logging_tasks[num_logged_tasks:])
+            for k, steps in step_scheduler.assigned.items():
+                logger.info("%s: %d local steps in %s (target %.2f s)" % (
+                    cfg.clients[k].name,
+                    steps,
+                    "%.2f s" % achieved[k] if k in achieved else "-",
+                    step_scheduler.assigned_target))
+
+        finisher.finish(t, server, per_iter_start)
+
+
+def stored_updates(states):
+    """Handles of the updates returned through the model store (see ``server.update_to_store``)."""
+    return [
+        state["primal"].data for state in states
+        if state is not None
+        and isinstance(state["primal"], CompactUpdate)
+        and isinstance(state["primal"].data, ModelHandle)
+    ]
+
+
+def remove_stored_updates(handles):
+    for handle in handles:
+        handle.store.remove(handle.key)
+
+
+def run_async_epochs(cfg, server, trn_endps, model_store, weights, loss_fn, finisher, logger):
+    """Asynchronous funcX training: a client is sent the latest global model as soon as it finishes, and its
+    update is weighted by its staleness (see ``FedAsyncAggregator``). An epoch is a global update, i.e.,
+    every ``cfg.asynchronous.buffer_size`` local updates. A client whose last ``cfg.server.max_task_failures``
+    tasks failed is not sent tasks anymore; training stops with an error once no client is left.
+    """
+    aggregator = FedAsyncAggregator(
+        server.model,
+        buffer_size=cfg.asynchronous.buffer_size,
+        staleness_fn=cfg.asynchronous.staleness_fn,
+        staleness_args=cfg.asynchronous.staleness_args,
+        max_staleness=cfg.asynchronous.max_staleness,
+        mixing_rate=cfg.asynchronous.mixing_rate,
+    )
+    base_states  = OrderedDict()  # version -> (global state, state passed to the tasks)
+    task_version = {}             # client -> version of the global model it trains on
+    version      = 0
+    stored       = []             # handles of the updates returned through the model store
+    parked       = []             # clients whose endpoints are not available, dispatched once they are
+    failures     = OrderedDict()  # client -> consecutive failed tasks
+    max_failures = cfg.server.max_task_failures
+
+    def dispatch(clients):
+        clients   = list(OrderedDict.fromkeys(parked + clients))
+        available = [client_idx for client_idx in clients if trn_endps.is_available(client_idx)]
+        if len(available) == 0 and len(trn_endps.executing_tasks) == 0:
+            ## Nothing else to wait for
+            available = clients
+        parked[:] = [client_idx for client_idx in clients if client_idx not in available]
+        for client_idx in parked:
+            task_version.pop(client_idx, None)
+        if len(available) == 0:
+            return
+        clients = available
+        if version not in base_states:
+            global_state = OrderedDict(
+                (k, v.detach().cpu().clone()) for k, v in server.model.state_dict().items()
+            )
+            task_state = global_state if model_store is None else model_store.put(global_state)
+            base_states[version] = (global_state, task_state)
+        trn_endps.send_task_to_clients(client_training,
+                    weights, base_states[version][1], loss_fn, participants = clients)
+        for client_idx in clients:
+            task_version[client_idx] = version
+        ## Versions no task trains on anymore are dropped
+        for old_version in list(base_states):
+            if old_version not in task_version.values():
+                _, task_state = base_states.pop(old_version)
+                if model_store is not None:
+                    model_store.remove(task_state.key)
+
+    logger.info(" ====== Epoch [%d/%d] ====== " % (1, cfg.num_epochs))
+    per_iter_start = time.time()
+    dispatch([k for k in range(cfg.num_clients) if weights[k] > 0])
+    for client_idx, state in trn_endps.iter_endpoint_updates():
+        if state is None:
+            failures[client_idx] = failures.get(client_idx, 0) + 1
+            if max_failures > 0 and failures[client_idx] >= max_failures:
+                logger.warning("Client %s failed %d tasks in a row; it is not sent tasks anymore." % (
+                    cfg.clients[client_idx].name, failures[client_idx]))
+                task_version.pop(client_idx, None)
+                continue
+        else:
+            failures[client_idx] = 0
+            global_state, _ = base_states[task_version[client_idx]]
+            stored += stored_updates([state])
+            decode_local_states([{client_idx: state}], global_state)
+            if aggregator.add(
+                client_idx,
+                weights[client_idx],
+                state["primal"],
+                global_state,
+                version - task_version[client_idx],
+            ):
+                cfg["logginginfo"]["LocalUpdate_time"] = time.time() - per_iter_start
+                global_update_start = time.time()
+                aggregator.aggregate()
+                remove_stored_updates(stored)
+                stored = []
+                cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
+                finisher.finish(version, server, per_iter_start)
+                version += 1
+                if version == cfg.num_epochs:
+                    break
+                logger.info(" ====== Epoch [%d/%d] ====== " % (version + 1, cfg.num_epochs))
+                per_iter_start = time.time()
+        dispatch([client_idx])
+    trn_endps.cancel_pending_tasks("is no longer needed")
+    remove_stored_updates(stored)
+    if model_store is not None:
+        for _, task_state in base_states.values():
+            model_store.remove(task_state.key)
+    if version < cfg.num_epochs:
+        raise RuntimeError(
+            "Asynchronous training stopped at epoch %d of %d: every client failed %d tasks in a row"
+            % (version + 1, cfg.num_epochs, max_failures)
+        )
@@ -5,6 +5,7 @@ import torch.nn as nn
 from torch.optim import *
 from torch.utils.data import DataLoader
 
+import os
 import copy
 import numpy as np
 import logging
@@ -12,17 +13,12 @@ import time
 
 from .misc import *
 from .algorithm import *
+from .codec import create_codec
 
 from .protos.federated_learning_pb2 import Job
-from .protos.client import FLClient
-
-
-def update_model_state(comm, model, round_number):
-    new_state = {}
-    for name in model.state_dict():
-        nparray = comm.get_tensor_record(name, round_number)
-        new_state[name] = torch.tensor(nparray)
-    model.load_state_dict(new_state)
+from .protos.client import FLClient, ModelDownloader
+from .protos.sharding import ShardedFLClient, partition_state, shard_uris
+from .protos.metrics import MetricsRegistry
 
 
 def run_client(
@@ -48,6 +44,9 @@ def run_client(
     logger = logging.getLogger(__name__)
     if cfg.server.use_tls == True:
         uri = cfg.server.host
+    elif cfg.server.uds_path and os.path.exists(cfg.server.uds_path):
+        ## The server is on this host.
+        uri = "unix:" + cfg.server.uds_path
     else:
         uri = cfg.server.host + ":" + str(cfg.server.port)
 
@@ -68,13 +67,33 @@ def run_client(
     logger.debug(
         f"[Client ID: {cid: 03}] connecting to (uri,tls)=({uri},{cfg.server.use_tls})."
     )
-    comm = FLClient(
-        cid,
-        uri,
-        cfg.server.use_tls,
-        max_message_size=cfg.max_message_size,
-        api_key=cfg.server.api_key,
-    )
+    metrics = MetricsRegistry() if cfg.metrics.enable == True else None
+
+    def connect(uri):
+        return FLClient(
+            cid,
+            uri,
+            cfg.server.use_tls,
+            max_message_size=cfg.max_message_size,
+            api_key=cfg.server.api_key,
+            codec=create_codec(cfg),
+            long_poll_timeout=cfg.server.long_poll_timeout,
+            use_shared_memory=cfg.server.use_shared_memory,
+            upload_chunk_size=cfg.server.upload_chunk_size,
+            upload_retries=cfg.server.upload_retries,
+            upload_window=cfg.server.upload_window,
+            reconnect_timeout=cfg.client.reconnect_timeout,
+            metrics=metrics,
+        )
+
+    if cfg.server.num_shards > 1:
+        ## Each shard of the model is served by its own operator.
+        comm = ShardedFLClient(
+            [connect(shard_uri) for shard_uri in shard_uris(cfg)],
+            partition_state(model.state_dict(), cfg.server.num_shards),
+        )
+    else:
+        comm = connect(uri)
 
     # Retrieve its weight from a server.
     weight = -1.0
@@ -88,7 +107,8 @@ def run_client(
             )
             if weight >= 0.0:
                 break
-            time.sleep(5)
+            if comm.long_poll_timeout == 0:
+                time.sleep(5)
     except KeyboardInterrupt:
         logger.info(f"[Client ID: {cid: 03}] terminating the client.")
         return
@@ -97,6 +117,9 @@ def run_client(
         logger.error(f"[Client ID: {cid: 03}] weight ({weight}) retrieval failed.")
         return
 
+    ## The model schema of this session lets the global model and the results travel as contiguous buffers.
+    comm.get_schema()
+
     "Run validation if test data is given or the configuration is enabled."
     if cfg.validation == True and len(test_data) > 0:
         test_dataloader = DataLoader(
@@ -132,6 +155,9 @@ def run_client(
     for name, _ in fed_client.model.named_parameters():
         model_name.append(name)
 
+    ## Global models are copied into the model in place; the next one is fetched while saving and logging.
+    downloader = ModelDownloader(comm, device, prefetch=cfg.client.prefetch_model)
+
     # Start federated learning.
     cur_round_number, job_todo = comm.get_job(Job.INIT)
     prev_round_number = 0
@@ -141,16 +167,27 @@ def run_client(
 
     while job_todo != Job.QUIT:
         if job_todo == Job.TRAIN:
-            if prev_round_number != cur_round_number:
+            ## In asynchronous mode, clients keep training on the latest global model.
+            ## Results lost by a restart of the server are computed again.
+            if (
+                prev_round_number != cur_round_number
+                or cfg.asynchronous.enable
+                or comm.results_missing
+            ):
                 logger.info(
                     f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Start training"
                 )
-                update_model_state(comm, fed_client.model, cur_round_number)
+                downloader.load(fed_client.model, cur_round_number)
                 logger.info(
                     f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Received model update from server"
                 )
                 prev_round_number = cur_round_number
 
+                ## Reference point of the quantized update
+                global_state = None
+                if comm.codec is not None:
+                    global_state = copy.deepcopy(fed_client.model.state_dict())
+
                 time_start = time.time()
                 local_state = fed_client.update()
                 time_end = time.time()
@@ -158,23 +195,26 @@ def run_client(
                 learning_time = time_end - time_start
                 cumul_learning_time += learning_time
 
-                if (
-                    cur_round_number % cfg.checkpoints_interval == 0
-                    or cur_round_number == cfg.num_epochs
-                ):
-                    """Saving model"""
-                    if cfg.save_model == True:
-                        save_model_iteration(cur_round_number, fed_client.model, cfg)
-
                 time_start = time.time()
                 comm.send_learning_results(
                     local_state["penalty"],
                     local_state["primal"],
                     local_state["dual"],
                     cur_round_number,
+                    global_state=global_state,
                 )
                 time_end = time.time()
                 send_time = time_end - time_start
+                downloader.prefetch_next_job(job_todo, prev_round_number)
+
+                if (
+                    cur_round_number % cfg.checkpoints_interval == 0
+                    or cur_round_number == cfg.num_epochs
+                ):
+                    """Saving model"""
+                    if cfg.save_model == True:
+                        save_model_iteration(cur_round_number, fed_client.model, cfg)
+
                 logger.info(
                     f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Trained (Time %.4f, Epoch {cfg.fed.args.num_local_epochs: 03}) and sent results back to the server (Elapsed %.4f)",
                     learning_time,
@@ -184,8 +224,16 @@ def run_client(
                 logger.info(
                     f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Waiting for next job"
                 )
+                if comm.long_poll_timeout == 0:
+                    time.sleep(5)
+        elif job_todo == Job.WAIT:
+            logger.info(
+                f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Not sampled for this round (or no new round yet); waiting for next job"
+            )
+            if comm.long_poll_timeout == 0:
                 time.sleep(5)
-        cur_round_number, job_todo = comm.get_job(job_todo)
+        # With long polling, the server holds this request until a round newer than prev_round_number opens.
+        cur_round_number, job_todo = downloader.get_job(job_todo, prev_round_number)
         if job_todo == Job.QUIT:
             logger.info(
                 f"[Client ID: {cid: 03} Round #: {cur_round_number: 03}] Quitting... Learning %.4f Sending %.4f Receiving %.4f Job %.4f Total %.4f",
@@ -195,10 +243,28 @@ def run_client(
                 comm.time_get_job,
                 comm.get_comm_time(),
             )
+            if comm.bytes_retransmitted > 0:
+                logger.info(
+                    f"[Client ID: {cid: 03}] Uploaded %d bytes of results, %d of them retransmitted after failures",
+                    comm.bytes_uploaded,
+                    comm.bytes_retransmitted,
+                )
+            if comm.codec is not None:
+                logger.info(
+                    f"[Client ID: {cid: 03}] Quantized updates: %d bytes sent for %d bytes of updates (ratio %.2f)",
+                    comm.codec.bytes_encoded,
+                    comm.codec.bytes_raw,
+                    comm.codec.compression_ratio(),
+                )
             # Update with the most recent weights before exit.
-            update_model_state(comm, fed_client.model, cur_round_number)
+            downloader.load(fed_client.model, cur_round_number)
+            if comm.metrics is not None and cfg.metrics.json_path:
+                root, ext = os.path.splitext(cfg.metrics.json_path)
+                comm.metrics.dump_json(root + "_client_%s" % cid + (ext or ".json"))
 
             outfile.close()
+            downloader.close()
+            comm.close()
 
 
 if __name__ == "__main__":
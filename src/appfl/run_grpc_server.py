@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 
 import torch.nn as nn
 from omegaconf import DictConfig
@@ -6,8 +7,12 @@ from omegaconf import DictConfig
 import grpc
 
 from .protos import server
+from .protos import aio_server
 from .protos import operator
+from .protos import metrics
+from .protos import sharding
 from .misc.data import Dataset
+from .misc.utils import load_model
 
 
 def grpc_server_on(channel) -> bool:
@@ -24,6 +29,7 @@ def run_server(
     loss_fn: nn.Module, 
     num_clients: int,
     test_data: Dataset = Dataset(),
+    shard_id: int = None,
 ) -> None:
     """Launch gRPC server to listen to the port to serve requests from clients.
     The service URI is set in the configuration.
@@ -35,8 +41,17 @@ def run_server(
         loss_fn (nn.Module): loss function
         num_clients (int): the number of clients used in PPFL simulation
         test_data (Dataset): optional testing data. If given, validation will run based on this data.
+        shard_id (int): serve this shard of the model (see ``run_sharded_server``)
     """
 
+    if cfg.server.num_shards > 1:
+        if shard_id is None:
+            run_sharded_server(cfg, model, loss_fn, num_clients)
+            return
+        partition = sharding.partition_state(model.state_dict(), cfg.server.num_shards)
+        model = sharding.shard_model(model, partition[shard_id])
+        cfg = sharding.shard_config(cfg, shard_id)
+
     # Do not launch a server if it is already on.
     # channel = grpc.insecure_channel(cfg.server.host + ':' + str(cfg.server.port))
     # if grpc_server_on(channel):
@@ -44,8 +59,95 @@ def run_server(
     #     return
 
     op = operator.FLOperator(cfg, model, loss_fn, test_data, num_clients)
-    op.servicer = server.FLServicer(cfg.server.id, str(cfg.server.port), op)
 
     logger = logging.getLogger(__name__)
     logger.info("Starting the server to listen to requests from clients . . .")
-    server.serve(op.servicer, max_message_size=cfg.max_message_size)
+
+    ## Metrics of every RPC are recorded by interceptors into the registry of the operator.
+    interceptors = []
+    exporter = None
+    dumper = None
+    if cfg.metrics.enable == True:
+        if cfg.server.use_aio == True:
+            interceptors.append(metrics.AioMetricsInterceptor(op.metrics))
+        else:
+            interceptors.append(metrics.MetricsInterceptor(op.metrics))
+        if cfg.metrics.http_port > 0:
+            exporter = metrics.start_http_exporter(op.metrics, cfg.metrics.http_port)
+        if cfg.metrics.json_path:
+            dumper = metrics.JSONDumper(
+                op.metrics, cfg.metrics.json_path, cfg.metrics.json_interval
+            )
+
+    if cfg.server.use_aio == True:
+        op.servicer = aio_server.AioFLServicer(
+            cfg.server.id, str(cfg.server.port), op, cfg.server.aio_workers
+        )
+        aio_server.serve_async(
+            op.servicer,
+            max_message_size=cfg.max_message_size,
+            uds_path=cfg.server.uds_path,
+            interceptors=interceptors,
+        )
+    else:
+        op.servicer = server.FLServicer(cfg.server.id, str(cfg.server.port), op)
+        # Every long-polling client occupies a thread while waiting for its next job.
+        max_workers = cfg.server.max_workers
+        if cfg.server.long_poll_timeout > 0:
+            max_workers = max(max_workers, num_clients + 2)
+        server.serve(
+            op.servicer,
+            max_message_size=cfg.max_message_size,
+            max_workers=max_workers,
+            uds_path=cfg.server.uds_path,
+            interceptors=interceptors,
+        )
+    op.close()
+    if exporter is not None:
+        exporter.shutdown()
+    if dumper is not None:
+        dumper.stop()
+
+
+def run_sharded_server(
+    cfg: DictConfig,
+    model: nn.Module,
+    loss_fn: nn.Module,
+    num_clients: int,
+) -> None:
+    """Launch one gRPC server per shard of the model (``cfg.server.num_shards``), each in its own process.
+    Shard i listens on ``cfg.server.port + i``; validation is disabled, as no operator holds the full model.
+
+    Args:
+        cfg (DictConfig): the configuration for this run
+        model (nn.Module): neural network model to train
+        loss_fn (nn.Module): loss function
+        num_clients (int): the number of clients used in PPFL simulation
+    """
+
+    logger = logging.getLogger(__name__)
+    if cfg.load_model == True:
+        model = load_model(cfg)
+        cfg.load_model = False
+    logger.info(
+        "Starting %d servers, each serving a shard of the model . . .",
+        cfg.server.num_shards,
+    )
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_server,
+            args=(cfg, model, loss_fn, num_clients, Dataset(), shard_id),
+            daemon=True,
+        )
+        for shard_id in range(cfg.server.num_shards)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
@@ -15,6 +15,7 @@ import logging
 
 from .misc import *
 from .algorithm import *
+from .codec import create_codec, encode_local_state, decode_local_states
 
 from mpi4py import MPI
 
@@ -55,6 +56,7 @@ def run_server(
     cfg["logginginfo"]["DataSet_name"] = dataset_name
 
     ## Using tensorboard to visualize the test loss
+    writer = None
     if cfg.use_tensorboard:
         from tensorboardX import SummaryWriter
 
@@ -71,6 +73,7 @@ def run_server(
             shuffle=cfg.test_data_shuffle,
         )
     else:
+        test_dataloader = None
         cfg.validation = False
 
     """
@@ -103,11 +106,15 @@ def run_server(
         weights, copy.deepcopy(model), loss_fn, num_clients, device, **cfg.fed.args
     )
 
+    ## Partial participation; clients draw the same participants from the seeded sampler.
+    sampler = create_client_sampler(cfg, num_clients)
+    if sampler.count < num_clients or cfg.participation.deadline > 0:
+        check_partial_participation(server)
+
     do_continue = True
     start_time = time.time()
-    test_loss = 0.0
-    test_accuracy = 0.0
-    best_accuracy = 0.0
+    ## Validation, logging and checkpointing (on a background thread with cfg.pipeline_validation)
+    finisher = RoundFinisher(cfg, logger, test_dataloader, writer, start_time)
     for t in range(cfg.num_epochs):
         per_iter_start = time.time()
         do_continue = comm.bcast(do_continue, root=0)
@@ -121,42 +128,30 @@ def run_server(
         local_update_start = time.time()
         global_state = comm.bcast(global_state, root=0)
         local_states = comm.gather(None, root=0)
+        decode_local_states(local_states, global_state)
         cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
 
+        ## Aggregate the updates received; absent clients have zero weight.
+        participants = [cid for states in local_states if states is not None for cid in states]
+        if len(participants) < num_clients:
+            local_states.append(absent_states(global_state, participants, num_clients))
+
         global_update_start = time.time()
-        server.update(local_states)
+        if len(participants) > 0:
+            server.set_weights(renormalize_weights(weights, participants))
+            server.update(local_states)
+        else:
+            logger.warning("[Round: %04d] No update received" % (t + 1))
         cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
 
-        validation_start = time.time()
-        best_accuracy = 0
-        if cfg.validation == True:
-            test_loss, test_accuracy = validation(server, test_dataloader)
-
-            if cfg.use_tensorboard:
-                # Add them to tensorboard
-                writer.add_scalar("server_test_accuracy", test_accuracy, t)
-                writer.add_scalar("server_test_loss", test_loss, t)
-
-            if test_accuracy > best_accuracy:
-                best_accuracy = test_accuracy
-        cfg["logginginfo"]["Validation_time"] = time.time() - validation_start
-        cfg["logginginfo"]["PerIter_time"] = time.time() - per_iter_start
-        cfg["logginginfo"]["Elapsed_time"] = time.time() - start_time
-        cfg["logginginfo"]["test_loss"] = test_loss
-        cfg["logginginfo"]["test_accuracy"] = test_accuracy
-        cfg["logginginfo"]["BestAccuracy"] = best_accuracy
-
-        server.logging_iteration(cfg, logger, t)
-
-        """ Saving model """
-        if (t + 1) % cfg.checkpoints_interval == 0 or t + 1 == cfg.num_epochs:
-            if cfg.save_model == True:
-                save_model_iteration(t + 1, server.model, cfg)
-
-        if np.isnan(test_loss) == True:
+        finisher.finish(t, server, per_iter_start)
+
+        ## With pipelined validation, the loss is the one of the previous round
+        if np.isnan(finisher.test_loss) == True:
             break
 
     """ Summary """
+    finisher.close()
     server.logging_summary(cfg, logger)
 
     do_continue = False
@@ -259,17 +254,33 @@ def run_client(
             model_name.append(name)
         break
 
-    do_continue = comm.bcast(None, root=0)
+    ## Codecs keep the error feedback of each client across rounds.
+    codecs = {client.id: create_codec(cfg, seed=client.id) for client in clients}
+
+    ## Partial participation
+    sampler = create_client_sampler(cfg, num_clients)
+    deadline = cfg.participation.deadline
 
-    local_states = OrderedDict()
+    do_continue = comm.bcast(None, root=0)
 
+    t = 0
     while do_continue:
+        t += 1
+        local_states = OrderedDict()
+
         """Receive "global_state" """
         global_state = comm.bcast(None, root=0)
+        round_start = time.time()
 
         """ Update "local_states" based on "global_state" """
+        participants = sampler.sample(t)
         for client in clients:
             cid = client.id
+            if cid not in participants:
+                continue
+            ## Clients of this rank train one after another; those past the deadline are stragglers.
+            if deadline > 0 and time.time() - round_start > deadline:
+                break
             ## initial point for a client model
             for name in client.model.state_dict():
                 if name not in model_name:
@@ -277,7 +288,12 @@ def run_client(
             client.model.load_state_dict(global_state)
 
             ## client update
-            local_states[cid] = client.update()
+            local_state = client.update()
+            if deadline > 0 and time.time() - round_start > deadline:
+                break
+            local_states[cid] = encode_local_state(
+                codecs[cid], local_state, global_state, model_name
+            )
 
         """ Send "local_states" to a server """
         comm.gather(local_states, root=0)
@@ -15,6 +15,7 @@ import logging
 
 from .misc import *
 from .algorithm import *
+from .codec import create_codec, encode_local_state, decode_local_states
 
 
 def run_serial(
@@ -44,6 +45,7 @@ def run_serial(
     cfg["logginginfo"]["DataSet_name"] = dataset_name
 
     ## Using tensorboard to visualize the test loss
+    writer = None
     if cfg.use_tensorboard:
         from tensorboardX import SummaryWriter
 
@@ -75,6 +77,7 @@ def run_serial(
             shuffle=cfg.test_data_shuffle,
         )
     else:
+        test_dataloader = None
         cfg.validation = False
 
     server = eval(cfg.fed.servername)(
@@ -114,11 +117,19 @@ def run_serial(
     model_name = []
     for name, _ in server.model.named_parameters():
         model_name.append(name)
-    
+
+    ## Codecs keep the error feedback of each client across rounds.
+    codecs = [create_codec(cfg, seed=k) for k in range(cfg.num_clients)]
+
+    ## Partial participation
+    sampler = create_client_sampler(cfg, cfg.num_clients)
+    deadline = cfg.participation.deadline
+    if sampler.count < cfg.num_clients or deadline > 0:
+        check_partial_participation(server)
+
     start_time = time.time()
-    test_loss = 0.0
-    test_accuracy = 0.0
-    best_accuracy = 0.0
+    ## Validation, logging and checkpointing (on a background thread with cfg.pipeline_validation)
+    finisher = RoundFinisher(cfg, logger, test_dataloader, writer, start_time)
     for t in range(cfg.num_epochs):
         per_iter_start = time.time()
 
@@ -127,8 +138,9 @@ def run_serial(
         global_state = server.model.state_dict()
 
         local_update_start = time.time()
-        for k, client in enumerate(clients):
-            
+        for k in sampler.sample(t + 1):
+            client = clients[k]
+
             ## initial point for a client model
             for name in server.model.state_dict():
                 if name not in model_name:
@@ -136,40 +148,38 @@ def run_serial(
             client.model.load_state_dict(global_state)
 
             ## client update
-            local_states[0][k] = client.update()
-
-        cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
+            client_update_start = time.time()
+            local_state = client.update()
 
-        global_update_start = time.time()
-        server.update(local_states)
-        cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
+            ## Clients run in parallel in practice; a client slower than the deadline is a straggler.
+            if deadline > 0 and time.time() - client_update_start > deadline:
+                logger.info("[Round: %04d] Dropped the late update of client %d" % (t + 1, k))
+                continue
 
-        validation_start = time.time()
-        if cfg.validation == True:
-            test_loss, test_accuracy = validation(server, test_dataloader)
+            local_states[0][k] = encode_local_state(
+                codecs[k], local_state, global_state, model_name
+            )
 
-            if cfg.use_tensorboard:
-                # Add them to tensorboard
-                writer.add_scalar("server_test_accuracy", test_accuracy, t)
-                writer.add_scalar("server_test_loss", test_loss, t)
+        cfg["logginginfo"]["LocalUpdate_time"] = time.time() - local_update_start
 
-            if test_accuracy > best_accuracy:
-                best_accuracy = test_accuracy
+        decode_local_states(local_states, global_state)
 
-        cfg["logginginfo"]["Validation_time"] = time.time() - validation_start
-        cfg["logginginfo"]["PerIter_time"] = time.time() - per_iter_start
-        cfg["logginginfo"]["Elapsed_time"] = time.time() - start_time
-        cfg["logginginfo"]["test_loss"] = test_loss
-        cfg["logginginfo"]["test_accuracy"] = test_accuracy
-        cfg["logginginfo"]["BestAccuracy"] = best_accuracy
+        ## Aggregate the updates received; absent clients have zero weight.
+        participants = list(local_states[0])
+        if len(participants) < cfg.num_clients:
+            local_states.append(absent_states(global_state, participants, cfg.num_clients))
 
-        server.logging_iteration(cfg, logger, t)
+        global_update_start = time.time()
+        if len(participants) > 0:
+            server.set_weights(renormalize_weights(weights, participants))
+            server.update(local_states)
+        else:
+            logger.warning("[Round: %04d] No update received" % (t + 1))
+        cfg["logginginfo"]["GlobalUpdate_time"] = time.time() - global_update_start
 
-        """ Saving model """
-        if (t + 1) % cfg.checkpoints_interval == 0 or t + 1 == cfg.num_epochs:
-            if cfg.save_model == True:
-                save_model_iteration(t + 1, server.model, cfg)
+        finisher.finish(t, server, per_iter_start)
 
+    finisher.close()
     server.logging_summary(cfg, logger)
 
     for k, client in enumerate(clients):
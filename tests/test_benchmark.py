@@ -0,0 +1,67 @@
+import multiprocessing
+import socket
+import threading
+import time
+
+import pytest
+
+from appfl.protos.benchmark import run_benchmark, format_report
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def test_benchmark_reports_throughput():
+    report = run_benchmark(
+        4, num_rounds=2, model_size=10000, num_tensors=3, port=free_port()
+    )
+    assert report["rounds_per_second"] > 0
+    assert report["latency"]["SendLearningResults"]["count"] == 4 * 2
+    assert report["latency"]["GetModel"]["p99"] >= report["latency"]["GetModel"]["p50"]
+    assert report["server_peak_rss_bytes"] > 0
+    assert "rounds/s" in format_report(report)
+
+
+def test_benchmark_clients_wait_for_the_rounds_they_are_sampled_for():
+    report = run_benchmark(
+        4,
+        num_rounds=2,
+        model_size=1000,
+        port=free_port(),
+        config={"participation": {"num_clients": 2}},
+    )
+    assert report["latency"]["SendLearningResults"]["count"] == 2 * 2
+
+
+def server_listens(port):
+    with socket.socket() as s:
+        return s.connect_ex(("localhost", port)) == 0
+
+
+def test_benchmark_fails_when_the_server_is_gone():
+    port = free_port()
+
+    def kill_server():
+        # Once the server listens, let the clients run a few rounds.
+        while not server_listens(port):
+            time.sleep(0.1)
+        time.sleep(1.0)
+        for process in multiprocessing.active_children():
+            process.kill()
+
+    threading.Thread(target=kill_server, daemon=True).start()
+    start = time.time()
+    # The clients give up on the lost server well before the timeout of the benchmark.
+    with pytest.raises(RuntimeError, match="server exit code -9"):
+        run_benchmark(
+            2,
+            num_rounds=100000,
+            model_size=100,
+            port=port,
+            config={"client": {"reconnect_timeout": 1.0}},
+            timeout=60.0,
+        )
+    assert time.time() - start < 40.0
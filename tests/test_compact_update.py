@@ -0,0 +1,65 @@
+import copy
+import pickle
+from collections import OrderedDict
+
+import pytest
+import torch
+import torch.nn as nn
+
+from appfl.config import *
+from appfl.algorithm import ServerFedAvg
+from appfl.codec import CompactUpdate, QuantizationCodec, decode_local_states, encode_compact
+
+
+def make_update(model, scale=1e-2):
+    global_state = copy.deepcopy(model.state_dict())
+    local_state = OrderedDict(
+        (k, v + scale * torch.randn(v.shape)) for k, v in global_state.items()
+    )
+    local_state["num_batches_tracked"] = torch.tensor(3)
+    return global_state, local_state
+
+
+@pytest.mark.parametrize(
+    "encoding, compression, tolerance",
+    [("float32", "", 0.0), ("float16", "zlib", 1e-4), ("quantized", "", 1e-3)],
+)
+def test_compact_update_round_trip(encoding, compression, tolerance):
+    global_state, local_state = make_update(nn.Linear(256, 64))
+    update = encode_compact(
+        local_state,
+        global_state,
+        encoding=encoding,
+        compression=compression,
+        codec=QuantizationCodec(bits=8, seed=0),
+    )
+    raw_bytes = sum(v.numel() * 4 for k, v in global_state.items())
+    assert update.nbytes() <= raw_bytes
+    if encoding != "float32":
+        assert len(pickle.dumps(update)) < raw_bytes / 1.9
+
+    states = [{0: {"primal": pickle.loads(pickle.dumps(update)), "penalty": {0: 0.0}}}]
+    decoded = decode_local_states(states, global_state)[0][0]["primal"]
+    assert torch.equal(decoded["num_batches_tracked"], torch.tensor(3))
+    for name in global_state:
+        assert torch.allclose(decoded[name], local_state[name], atol=tolerance)
+
+
+def test_compact_deltas_are_accumulated_directly():
+    cfg = OmegaConf.structured(Config)
+    model = nn.Linear(16, 4)
+    weights = {0: 0.5, 1: 0.5}
+    updates = [make_update(model) for _ in weights]
+
+    decoded = ServerFedAvg(weights, copy.deepcopy(model), None, 2, "cpu", **cfg.fed.args)
+    direct = ServerFedAvg(weights, copy.deepcopy(model), None, 2, "cpu", **cfg.fed.args)
+    for server in (decoded, direct):
+        server.begin_update()
+    for c, (global_state, local_state) in enumerate(updates):
+        update = encode_compact(local_state, global_state, encoding="float32")
+        decoded.accumulate(c, {"primal": update.decode(global_state)})
+        direct.accumulate_delta(c, update.deltas())
+    for server in (decoded, direct):
+        assert server.end_update()
+    for name, tensor in decoded.model.state_dict().items():
+        assert torch.allclose(direct.model.state_dict()[name], tensor)
@@ -0,0 +1,120 @@
+import logging
+import time
+from concurrent import futures
+
+import pytest
+
+pytest.importorskip("funcx")
+
+from appfl.config import *
+from appfl.funcx import APPFLFuncTrainingEndpoints, EndpointMonitor, client_validate_data
+from appfl.funcx.benchmark import benchmark_config
+from appfl.funcx.local import LocalEndpoint, LocalFuncXClient
+
+
+class UnreachableEndpoint(LocalEndpoint):
+    def status(self):
+        raise ConnectionError("service unavailable")
+
+
+def occupy(endpoint, num_tasks):
+    """Tasks pending at an endpoint (e.g., sent by other users) until they are resolved."""
+    tasks = [futures.Future() for _ in range(num_tasks)]
+    for task in tasks:
+        endpoint.futures.add(task)
+        task.add_done_callback(endpoint.futures.discard)
+    return tasks
+
+
+def test_monitor_caches_statuses_polled_in_the_background():
+    fxc = LocalFuncXClient(
+        {
+            "idle": {"num_workers": 4},
+            "busy": {"num_workers": 2},
+            "full": {"num_workers": 1},
+            "off": {"online": False},
+            "lost": UnreachableEndpoint(),
+        }
+    )
+    occupy(fxc.endpoint("busy"), 2)
+    occupy(fxc.endpoint("full"), 3)
+    monitor = EndpointMonitor(fxc, list(fxc.endpoints), interval=0.05, max_load=2.0)
+    monitor.start()
+    try:
+        polls = fxc.num_status_polls
+        assert monitor.status("idle").total_workers == 4
+        assert fxc.num_status_polls == polls  # cached
+        assert monitor.status("lost").status == "unreachable"
+        assert monitor.down_for("off") > 0.0 and monitor.down_for("idle") == 0.0
+
+        # Saturated and unavailable endpoints are not ranked; the others are ranked by load, then latency.
+        monitor.record("busy", 1.0)
+        assert monitor.rank(list(fxc.endpoints)) == ["idle", "busy"]
+        assert monitor.rank(["idle", "busy"], {"idle": 6}) == ["busy", "idle"]
+        assert not monitor.available("full")
+
+        # The background thread picks up the changes of status; an endpoint stays down since it went down.
+        down_since = monitor.status("off").down_since
+        fxc.endpoint("idle").set_online(False)
+        time.sleep(0.3)
+        assert not monitor.available("idle")
+        assert monitor.status("off").down_since == down_since
+    finally:
+        monitor.stop()
+        fxc.close()
+    assert monitor.thread is None
+
+
+def test_rounds_are_routed_around_unavailable_endpoints():
+    cfg = benchmark_config(5, 1, 100)
+    cfg.server.poll_min_interval = 0.02
+    cfg.server.endpoint_status_interval = 0.05
+    cfg.server.endpoint_max_load = 1.0
+    cfg.server.endpoint_offline_timeout = 0.2
+    endpoints = [client.endpoint_id for client in cfg.clients]
+    fxc = LocalFuncXClient(
+        {
+            endpoints[1]: {"online": False},
+            endpoints[3]: {"num_workers": 2},
+            endpoints[4]: {"num_workers": 2},
+        }
+    )
+    busy = occupy(fxc.endpoint(endpoints[2]), 1) + occupy(fxc.endpoint(endpoints[3]), 1)
+    trn_endps = APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__))
+    try:
+        # Clients 1 and 2 are replaced by the clients of the idlest endpoints.
+        assert trn_endps.route([0, 1, 2]) == [0, 3, 4]
+        assert trn_endps.route([0, 1, 2], candidates=[0, 1, 2, 3]) == [0, 3]
+        for endpoint_id in endpoints:
+            fxc.endpoint(endpoint_id).set_online(False)
+        time.sleep(0.2)
+        assert trn_endps.route([0, 1]) == [0, 1]
+
+        # The round does not wait for the task of an endpoint that went down.
+        for task in busy:
+            task.set_result(None)
+        fxc.endpoint(endpoints[0]).set_online(True)
+        time.sleep(0.2)
+        trn_endps.send_task_to_clients(client_validate_data, participants=[0, 1], silent=True)
+        start = time.time()
+        results = trn_endps.receive_sync_endpoints_updates()
+        assert results == {0: 2 * cfg.train_data_batch_size, 1: None}
+        tasks = {task.client_idx: task for task in cfg.logging_tasks}
+        assert tasks[0].success and not tasks[1].success
+        assert tasks[1].end_time - start < 2.0
+    finally:
+        trn_endps.close()
+        fxc.close()
+
+
+def test_routing_requires_partial_participation():
+    cfg = benchmark_config(2, 1, 100)
+    cfg.server.endpoint_status_interval = 0.05
+    cfg.fed.servername = "IIADMMServer"
+    with LocalFuncXClient() as fxc:
+        with pytest.raises(ValueError, match="IIADMMServer"):
+            APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__))
+
+        # Asynchronous epochs aggregate with FedAsyncAggregator, whatever the algorithm.
+        cfg.asynchronous.enable = True
+        APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__)).close()
@@ -0,0 +1,25 @@
+import numpy as np
+import torch
+import torch.nn as nn
+
+from appfl.algorithm import FedAsyncAggregator, staleness_polynomial
+
+
+def test_fed_buff_staleness_weighted_update():
+    model = nn.Linear(4, 2)
+    base_state = {k: np.array(v) for k, v in model.state_dict().items()}
+    aggregator = FedAsyncAggregator(
+        model, buffer_size=2, staleness_fn="polynomial", staleness_args={"a": 0.5}
+    )
+
+    fresh = {k: torch.from_numpy(v + 1.0) for k, v in base_state.items()}
+    stale = {k: torch.from_numpy(v + 2.0) for k, v in base_state.items()}
+
+    assert not aggregator.add(0, 0.5, fresh, base_state, 0)
+    assert not aggregator.add(1, 0.5, stale, base_state, 100)  # too stale; dropped
+    assert aggregator.add(1, 0.5, stale, base_state, 3)
+    aggregator.aggregate()
+
+    expected = 0.5 * 1.0 + 0.5 * 2.0 * staleness_polynomial(3, a=0.5)
+    assert np.allclose(model.weight.detach().numpy(), base_state["weight"] + expected)
+    assert aggregator.num_buffered == 0
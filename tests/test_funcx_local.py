@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+pytest.importorskip("funcx")
+
+from omegaconf import OmegaConf
+
+from appfl.config import *
+from appfl.funcx import LocalFuncXClient, client_validate_data
+from appfl.funcx.benchmark import benchmark_config, run_benchmark, format_report
+
+
+def wait_for(fxc, task_ids):
+    results = {}
+    while len(results) < len(task_ids):
+        pending = [task_id for task_id in task_ids if task_id not in results]
+        for task_id, result in fxc.get_batch_result(pending).items():
+            if not result["pending"]:
+                results[task_id] = result
+        time.sleep(0.05)
+    return [results[task_id] for task_id in task_ids]
+
+
+def test_tasks_run_on_endpoints_with_latency():
+    cfg = benchmark_config(2, 1, 100)
+    fxc = LocalFuncXClient({"slow": {"latency": 0.3}})
+    with fxc:
+        function_id = fxc.register_function(client_validate_data)
+        batch = fxc.create_batch()
+        batch.add(cfg, 0, endpoint_id="fast", function_id=function_id)
+        batch.add(cfg, 1, endpoint_id="slow", function_id=function_id)
+        start = time.time()
+        task_ids = fxc.batch_run(batch)
+        assert fxc.get_endpoint_status("slow")["logs"][0]["info"]["pending_tasks"] == 1
+
+        fast, slow = wait_for(fxc, task_ids)
+        assert fast["result"] == slow["result"] == 2 * cfg.train_data_batch_size
+        # The task and its result each cross the link of the slow endpoint.
+        assert float(slow["completion_t"]) - start >= 0.6
+        assert fxc.bytes_sent > 0 and fxc.bytes_received > 0
+
+        cfg.get_data.module = "no_such_module"
+        batch = fxc.create_batch()
+        batch.add(cfg, 0, endpoint_id="fast", function_id=function_id)
+        (failed,) = wait_for(fxc, fxc.batch_run(batch))
+        assert failed["status"] == "failed" and "no_such_module" in failed["exception"]
+
+
+def test_tasks_wait_for_offline_endpoints():
+    cfg = benchmark_config(1, 1, 100)
+    with LocalFuncXClient({"off": {"online": False}}) as fxc:
+        batch = fxc.create_batch()
+        batch.add(cfg, 0, endpoint_id="off", function_id=fxc.register_function(client_validate_data))
+        task_ids = fxc.batch_run(batch)
+        status = fxc.get_endpoint_status("off")
+        assert status["status"] == "offline"
+        assert status["logs"][0]["info"]["pending_tasks"] == 1
+        time.sleep(0.2)
+        assert fxc.get_batch_result(task_ids)[task_ids[0]]["pending"]
+
+        fxc.endpoint("off").set_online(True)
+        (result,) = wait_for(fxc, task_ids)
+        assert result["result"] == 2 * cfg.train_data_batch_size
+        assert fxc.num_status_polls == 1
+
+
+def test_benchmark_runs_the_funcx_server():
+    report = run_benchmark(
+        2, num_rounds=2, model_size=100, latency=[0.0, 0.1], server={"poll_max_interval": 0.5}
+    )
+    assert report["tasks"]["client_training"]["count"] == 2 * 2
+    assert 0.2 <= report["tasks"]["client_training"]["p99"] < 10
+    assert report["rounds_per_second"] > 0
+    assert report["polls"] > 0
+    assert "rounds/s" in format_report(report)
+
+
+def test_streaming_aggregation_decodes_quantized_updates():
+    report = run_benchmark(
+        2,
+        num_rounds=2,
+        model_size=100,
+        server={"poll_max_interval": 0.5, "streaming_aggregation": True},
+        config={"quantization": {"enable": True, "bits": 4}},
+    )
+    assert report["tasks"]["client_training"]["count"] == 2 * 2
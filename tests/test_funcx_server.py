@@ -0,0 +1,370 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+import types
+import uuid
+from collections import OrderedDict
+
+import pytest
+import torch
+import torch.nn as nn
+
+pytest.importorskip("funcx")
+
+from appfl.config import *
+from appfl.funcx import APPFLFuncTrainingEndpoints, FunctionRegistry, LocalStepScheduler, function_hash
+from appfl.funcx import client_training, client_validate_data
+from appfl.funcx import cache
+from appfl.misc.data import Dataset
+
+
+class ScriptedBatch:
+    def __init__(self):
+        self.tasks = []
+
+    def add(self, *args, endpoint_id=None, function_id=None, **kwargs):
+        self.tasks.append((endpoint_id, function_id))
+
+
+class ScriptedFuncXClient:
+    """Stand-in for ``FuncXClient`` with the latency of registering a function.
+    The task of the i-th client of a batch completes ``durations[i]`` seconds after the batch is run."""
+
+    def __init__(self, register_latency=0.05, durations=()):
+        self.register_latency = register_latency
+        self.durations = durations
+        self.registered = []
+        self.completion = {}
+        self.num_polls = 0
+
+    def register_function(self, func):
+        time.sleep(self.register_latency)
+        self.registered.append(func.__name__)
+        return str(uuid.uuid4())
+
+    def create_batch(self):
+        return ScriptedBatch()
+
+    def batch_run(self, batch):
+        task_ids = [str(uuid.uuid4()) for _ in batch.tasks]
+        now = time.time()
+        for i, task_id in enumerate(task_ids):
+            duration = self.durations[i] if i < len(self.durations) else 0.0
+            self.completion[task_id] = (i, now + duration)
+        return task_ids
+
+    def get_batch_result(self, task_ids):
+        self.num_polls += 1
+        results = {}
+        for task_id in task_ids:
+            client_idx, completion_t = self.completion[task_id]
+            if time.time() < completion_t:
+                results[task_id] = {"pending": True}
+            else:
+                results[task_id] = {
+                    "pending": False,
+                    "status": "success",
+                    "result": client_idx,
+                    "completion_t": str(completion_t),
+                }
+        return results
+
+
+def make_config(num_clients):
+    cfg = OmegaConf.structured(FuncXConfig)
+    cfg.server = OmegaConf.structured(FuncXServerConfig(output_dir=tempfile.mkdtemp()))
+    cfg.clients = [
+        OmegaConf.structured(FuncXClientConfig(data_split=None, name="c%d" % i))
+        for i in range(num_clients)
+    ]
+    return cfg
+
+
+def make_scale(factor):
+    def scale(x):
+        return factor * x
+
+    return scale
+
+
+def test_function_hash_follows_code_and_closure():
+    assert function_hash(make_scale(2)) == function_hash(make_scale(2))
+    assert function_hash(make_scale(2)) != function_hash(make_scale(3))
+    assert function_hash(client_training) != function_hash(client_validate_data)
+
+
+def test_functions_are_registered_once_per_deployment():
+    cfg = make_config(4)
+    fxc = ScriptedFuncXClient()
+    endpoints = APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__))
+
+    dispatch_time = []
+    for _ in range(5):
+        endpoints.executing_tasks = {}
+        endpoints.send_task_to_clients(client_training, silent=True)
+        dispatch_time.append(endpoints.dispatch_time)
+    endpoints.send_task_to_clients(client_validate_data, silent=True)
+    assert fxc.registered == ["client_training", "client_validate_data"]
+    # Only the first round pays for the registration.
+    assert max(dispatch_time[1:]) < fxc.register_latency <= dispatch_time[0]
+
+    # The next run reuses the registrations saved in the output directory.
+    path = os.path.join(cfg.server.output_dir, cfg.server.function_cache)
+    registry = FunctionRegistry(fxc, path)
+    assert registry.register(client_training) == endpoints.registry.register(client_training)
+    assert fxc.registered == ["client_training", "client_validate_data"]
+
+
+def test_results_are_polled_with_backoff():
+    cfg = make_config(3)
+    cfg.server.poll_min_interval = 0.02
+    fxc = ScriptedFuncXClient(register_latency=0.0, durations=(0.1, 0.3, 0.6))
+    endpoints = APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__))
+
+    endpoints.send_task_to_clients(client_validate_data, silent=True)
+    completed = [client_idx for client_idx, _ in endpoints.iter_endpoint_updates()]
+    assert completed == [0, 1, 2]
+    # A tight loop would poll thousands of times in 0.6 seconds.
+    first_round_polls = endpoints.poll_count
+    assert first_round_polls == fxc.num_polls < 20
+
+    # With the durations of the first round, the next round waits for the predicted completions.
+    endpoints.send_task_to_clients(client_validate_data, silent=True)
+    assert list(endpoints.receive_sync_endpoints_updates().values()) == [0, 1, 2]
+    assert endpoints.poll_count <= first_round_polls
+
+
+
+def test_logged_tasks_have_their_durations():
+    cfg = make_config(3)
+    cfg.server.poll_min_interval = 0.02
+    durations = (0.1, 0.3, 0.6)
+    fxc = ScriptedFuncXClient(register_latency=0.0, durations=durations)
+    endpoints = APPFLFuncTrainingEndpoints(cfg, fxc, logging.getLogger(__name__))
+
+    endpoints.send_task_to_clients(client_validate_data, silent=True)
+    endpoints.receive_sync_endpoints_updates()
+    # The log keeps copies of the tasks: they are logged once their end time is known.
+    logged = {task.client_idx: task.end_time - task.start_time for task in cfg.logging_tasks}
+    assert sorted(logged) == [0, 1, 2]
+    for client_idx, duration in enumerate(durations):
+        assert 0.0 <= logged[client_idx] < duration + 0.1
+
+
+NUM_GET_DATA = []
+
+
+def get_data(cfg, client_idx):
+    NUM_GET_DATA.append(client_idx)
+    generator = torch.Generator().manual_seed(client_idx)
+    return Dataset(torch.randn(32, 4, generator=generator), torch.zeros(32, dtype=torch.long))
+
+
+def get_model():
+    return nn.Linear
+
+
+def test_worker_cache_builds_data_and_model_once(monkeypatch):
+    cfg = make_config(2)
+    cfg.get_data = OmegaConf.structured(ExecutableFunc(module=__name__, call="get_data"))
+    cfg.get_model = OmegaConf.structured(ExecutableFunc(module=__name__, call="get_model"))
+    cfg.model_args = [4, 2]
+    for client_cfg in cfg.clients:
+        client_cfg.data_dir = tempfile.mkdtemp()
+        client_cfg.output_dir = tempfile.mkdtemp()
+    cfg.fed.args.num_local_epochs = 1
+    cache.clear()
+    NUM_GET_DATA.clear()
+
+    global_state = nn.Linear(4, 2).state_dict()
+    assert client_validate_data(cfg, 1) == 32
+    for _ in range(3):
+        client_training(cfg, 1, {0: 0.5, 1: 0.5}, global_state, nn.CrossEntropyLoss())
+    assert NUM_GET_DATA == [1]
+    assert cache.get_model(cfg) is cache.get_model(cfg)
+
+    # Another worker of the endpoint maps the dataset saved under data_dir.
+    dataset = cache.get_dataset(cfg, 1)
+    cache.clear()
+    mapped = cache.get_dataset(cfg, 1)
+    assert NUM_GET_DATA == [1]
+    assert torch.equal(mapped.data_input, dataset.data_input)
+
+    # The data loader follows the dataset of the client, not the identity of a dataset object.
+    loader = cache.get_dataloader(cfg, 1)
+    assert loader is cache.get_dataloader(cfg, 1)
+    assert loader.dataset is cache.get_dataset(cfg, 1)
+    assert cache.get_dataloader(cfg, 0).dataset is cache.get_dataset(cfg, 0)
+
+    # The saved datasets are not reused once the code of get_data changes.
+    monkeypatch.setattr(sys.modules[__name__], "get_data", get_shifted_data)
+    cache.clear()
+    assert torch.equal(cache.get_dataset(cfg, 1).data_input, mapped.data_input + 1)
+    cache.clear()
+
+
+def get_shifted_data(cfg, client_idx):
+    generator = torch.Generator().manual_seed(client_idx)
+    return Dataset(torch.randn(32, 4, generator=generator) + 1, torch.zeros(32, dtype=torch.long))
+
+
+def test_worker_cache_drops_the_least_recently_used_objects(monkeypatch):
+    monkeypatch.setattr(cache, "MAX_OBJECTS", 2)
+    cache.clear()
+    cache.cached("a", object)
+    cache.cached("b", object)
+    a = cache.cached("a", object)
+    cache.cached("c", object)
+    assert list(cache._objects) == ["a", "c"]
+    assert cache.cached("a", object) is a
+    cache.clear()
+
+
+def test_worker_cache_keeps_a_codec_per_client():
+    cfg = make_config(2)
+    cache.clear()
+    codec = cache.get_codec(cfg, 0)
+    assert cache.get_codec(cfg, 0) is codec
+    assert cache.get_codec(cfg, 1) is not codec
+    cfg.quantization.bits = 4
+    assert cache.get_codec(cfg, 0).bits == 4
+    cache.clear()
+
+
+def test_local_steps_are_fitted_to_the_target_time():
+    # Client 1 is four times slower per step than client 0; both have a second of overhead.
+    step_time = {0: 0.01, 1: 0.04}
+    scheduler = LocalStepScheduler({0: 100, 1: 100}, min_steps=5)
+    targets = []
+    for _ in range(3):
+        budgets = scheduler.assign([0, 1])
+        targets.append(scheduler.assigned_target)
+        tasks = [
+            OmegaConf.structured(ClientTask(
+                client_idx=c, success=True, start_time=0.0, end_time=1.0 + steps * step_time[c]
+            ))
+            for c, steps in budgets.items()
+        ]
+        times = scheduler.observe(tasks)
+    # The target is the median time of the default steps (2 and 5 seconds).
+    assert abs(scheduler.target() - 3.5) < 1e-6
+    # The first budgets are the default ones, assigned before any record (the target logged with them).
+    assert targets[0] == 0.0 and abs(targets[2] - 3.5) < 1e-6
+    assert budgets == {0: 250, 1: 62}
+    assert abs(times[0] - times[1]) < 0.05
+
+
+class FailingEndpoints:
+    """Stand-in for ``APPFLFuncTrainingEndpoints`` whose tasks of ``failing`` clients fail."""
+
+    def __init__(self, model, failing):
+        self.model = model
+        self.failing = failing
+        self.executing_tasks = OrderedDict()
+        self.sent = []
+
+    def is_available(self, client_idx):
+        return True
+
+    def send_task_to_clients(self, func, *args, participants=None, **kwargs):
+        for client_idx in participants:
+            self.sent.append(client_idx)
+            self.executing_tasks[len(self.sent)] = client_idx
+
+    def iter_endpoint_updates(self):
+        while self.executing_tasks:
+            _, client_idx = self.executing_tasks.popitem(last=False)
+            if client_idx in self.failing:
+                yield client_idx, None
+            else:
+                primal = OrderedDict((k, v.clone()) for k, v in self.model.state_dict().items())
+                yield client_idx, {"primal": primal, "dual": OrderedDict(), "penalty": {client_idx: 0.0}}
+
+    def cancel_pending_tasks(self, reason):
+        self.executing_tasks.clear()
+
+
+class CountingFinisher:
+    def __init__(self):
+        self.versions = []
+
+    def finish(self, version, server, start_time):
+        self.versions.append(version)
+
+
+def test_async_epochs_stop_sending_tasks_to_failing_clients():
+    from appfl.run_funcx_server import run_async_epochs
+
+    cfg = make_config(2)
+    cfg.num_clients = 2
+    cfg.num_epochs = 5
+    cfg.server.max_task_failures = 3
+    server = types.SimpleNamespace(model=nn.Linear(4, 2))
+    logger = logging.getLogger(__name__)
+
+    # Client 1 fails every task: it is sent three, and client 0 trains every epoch.
+    endpoints = FailingEndpoints(server.model, failing={1})
+    finisher = CountingFinisher()
+    run_async_epochs(cfg, server, endpoints, None, {0: 0.5, 1: 0.5}, None, finisher, logger)
+    assert finisher.versions == list(range(5))
+    assert endpoints.sent.count(1) == 3
+
+    # Once every client is dropped, training stops with an error.
+    endpoints = FailingEndpoints(server.model, failing={0, 1})
+    with pytest.raises(RuntimeError, match="every client failed 3 tasks in a row"):
+        run_async_epochs(cfg, server, endpoints, None, {0: 0.5, 1: 0.5}, None, CountingFinisher(), logger)
+    assert endpoints.sent == [0, 1] * 3
+
+
+class ReportingEndpoints:
+    """Stand-in for ``APPFLFuncTrainingEndpoints`` whose clients report their training samples."""
+
+    instances = []
+
+    def __init__(self, cfg, fxc, logger):
+        self.monitor = None
+        self.closed = False
+        self.instances.append(self)
+
+    def send_task_to_clients(self, *args, **kwargs):
+        pass
+
+    def receive_sync_endpoints_updates(self, deadline=0.0):
+        return {0: 10, 1: 10}
+
+    def close(self):
+        self.closed = True
+
+
+class ClosingFinisher(CountingFinisher):
+    instances = []
+
+    def __init__(self, *args):
+        super().__init__()
+        self.closed = False
+        self.instances.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_server_is_cleaned_up_when_training_fails(monkeypatch, asynchronous):
+    from appfl import run_funcx_server
+
+    def failing_epochs(*args):
+        raise RuntimeError("every client failed")
+
+    monkeypatch.setattr(run_funcx_server, "APPFLFuncTrainingEndpoints", ReportingEndpoints)
+    monkeypatch.setattr(run_funcx_server, "RoundFinisher", ClosingFinisher)
+    monkeypatch.setattr(run_funcx_server, "run_sync_epochs", failing_epochs)
+    monkeypatch.setattr(run_funcx_server, "run_async_epochs", failing_epochs)
+    cfg = make_config(2)
+    cfg.use_tensorboard = False
+    cfg.asynchronous.enable = asynchronous
+    with pytest.raises(RuntimeError, match="every client failed"):
+        run_funcx_server.run_server(cfg, nn.Linear(4, 2), nn.CrossEntropyLoss(), None)
+    assert ReportingEndpoints.instances[-1].closed
+    assert ClosingFinisher.instances[-1].closed
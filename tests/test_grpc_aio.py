@@ -0,0 +1,194 @@
+import asyncio
+import socket
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos import utils
+from appfl.protos.client import FLClient
+from appfl.protos.metrics import AioMetricsInterceptor, MetricsRegistry
+from appfl.protos.operator import FLOperator
+from appfl.protos.aio_server import AioFLServicer, start_async_server
+from appfl.protos.federated_learning_pb2 import Header
+from appfl.protos.federated_learning_pb2 import WeightRequest, TensorRequest
+from appfl.protos.federated_learning_pb2 import LearningResults
+from appfl.protos.federated_learning_pb2 import MessageStatus
+from appfl.protos.federated_learning_pb2 import Job
+from appfl.protos.federated_learning_pb2_grpc import FederatedLearningStub
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(servicer, interceptors=()):
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    servers = []  # keep a reference; the server stops once garbage-collected
+
+    def run():
+        asyncio.set_event_loop(loop)
+        servers.append(loop.run_until_complete(start_async_server(servicer, interceptors=interceptors)))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return loop, servers[0]
+
+
+async def run_client(stub, client_id, model):
+    header = Header(server_id=1, client_id=client_id)
+    response = await stub.GetWeight(
+        WeightRequest(header=header, size=10, wait_timeout=120.0)
+    )
+    assert response.weight > 0.0
+    record = await stub.GetTensorRecord(
+        TensorRequest(header=header, name="bias", round_number=1)
+    )
+    assert np.array_equal(
+        utils.tensor_from_record(record), model.state_dict()["bias"].numpy()
+    )
+
+    proto = LearningResults(
+        header=header,
+        round_number=1,
+        penalty=0.0,
+        primal=utils.construct_tensor_records(model.state_dict()),
+    )
+    ack = await stub.SendLearningResults(iter(utils.proto_to_databuffer(proto)))
+    return ack.status
+
+
+async def run_clients(port, num_clients, num_channels, model):
+    channels = [
+        grpc.aio.insecure_channel("localhost:%d" % port) for _ in range(num_channels)
+    ]
+    stubs = [FederatedLearningStub(channel) for channel in channels]
+    statuses = await asyncio.gather(
+        *[
+            run_client(stubs[c % num_channels], c, model)
+            for c in range(num_clients)
+        ]
+    )
+    for channel in channels:
+        await channel.close()
+    return statuses
+
+
+def test_aio_server_concurrent_uploads():
+    """1,000 clients wait on GetWeight at the same time, then upload concurrently."""
+
+    num_clients = 1000
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 1
+    model = nn.Linear(8, 3)
+
+    operator = FLOperator(cfg, model, None, Dataset(), num_clients)
+    computed = []
+    compute_weights = operator.compute_weights
+    operator.compute_weights = lambda: computed.append(compute_weights())
+    port = free_port()
+    operator.servicer = AioFLServicer(1, str(port), operator)
+    loop, server = start_server(operator.servicer)
+
+    statuses = asyncio.run(run_clients(port, num_clients, 16, model))
+    asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+    assert all(status == MessageStatus.OK for status in statuses)
+    # The clients waiting on GetWeight read the weights computed for the last client to report.
+    assert len(computed) == 1
+    operator.wait_for_aggregation()
+    assert operator.round_number == 2
+
+
+def test_aio_server_resumable_uploads():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 1
+    model = nn.Linear(64, 64)
+
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+    port = free_port()
+    operator.servicer = AioFLServicer(1, str(port), operator)
+    loop, server = start_server(operator.servicer)
+
+    comm = FLClient(0, "localhost:%d" % port, False, upload_chunk_size=4096)
+    try:
+        assert comm.get_weight(10) == 1.0
+        # Uploads larger than a primal and a dual state of the model are refused.
+        with pytest.raises(grpc.RpcError) as error:
+            comm.upload(bytes(operator.uploads.max_size + 1))
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        comm.send_learning_results({0: 0.0}, model.state_dict(), {}, 1)
+    finally:
+        comm.close()
+        asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    operator.wait_for_aggregation()
+    assert operator.round_number == 2
+
+
+def test_aio_server_labels_errors_like_the_client():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    operator = FLOperator(cfg, nn.Linear(4, 2), None, Dataset(), 1)
+    port = free_port()
+    operator.servicer = AioFLServicer(1, str(port), operator)
+    loop, server = start_server(
+        operator.servicer, interceptors=[AioMetricsInterceptor(operator.metrics)]
+    )
+
+    client_metrics = MetricsRegistry()
+    comm = FLClient(0, "localhost:%d" % port, False, upload_retries=0, metrics=client_metrics)
+    try:
+        with pytest.raises(grpc.RpcError):
+            comm.upload(bytes(operator.uploads.max_size + 1))
+    finally:
+        comm.close()
+        asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    key = ("rpc_errors_total", (("error", "FAILED_PRECONDITION"), ("method", "UploadLearningResults")))
+    assert operator.metrics.counters[key] == 1
+    assert client_metrics.counters[key] == 1
+
+
+def test_aio_get_job_waits_for_the_next_round():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(4, 2)
+
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+    port = free_port()
+    operator.servicer = AioFLServicer(1, str(port), operator)
+    loop, server = start_server(operator.servicer)
+
+    comm = FLClient(0, "localhost:%d" % port, False, long_poll_timeout=0.5)
+    try:
+        assert comm.get_weight(10) == 1.0
+        assert comm.get_job(Job.INIT) == (1, Job.TRAIN)
+        # No newer round by the timeout: the client is told to wait.
+        assert comm.get_job(Job.TRAIN, 1) == (1, Job.WAIT)
+        comm.send_learning_results({0: 0.0}, model.state_dict(), {}, 1)
+        comm.long_poll_timeout = 30.0
+        assert comm.get_job(Job.TRAIN, 1) == (2, Job.TRAIN)
+    finally:
+        comm.close()
+        asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    operator.close()
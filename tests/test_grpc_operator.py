@@ -0,0 +1,267 @@
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos import utils
+from appfl.protos.federated_learning_pb2 import Job
+from appfl.protos.operator import FLOperator
+from appfl.protos import operator as operator_module
+
+
+def upload(operator, client_id, round_number, value):
+    """Send results filling every tensor of the model with ``value``."""
+    primal = utils.construct_tensor_records(
+        OrderedDict(
+            (name, np.full(shape, value, dtype=np.float32))
+            for name, shape in operator.schema.shapes.items()
+        )
+    )
+    operator.send_learning_results(client_id, round_number, 0.0, primal, [])
+
+
+def test_operator_concurrent_uploads():
+    """Concurrent clients upload every round; each round must be aggregated exactly once."""
+
+    num_clients = 16
+    num_epochs = 5
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = num_epochs
+    model = nn.Linear(32, 8)
+
+    operator = FLOperator(cfg, model, None, Dataset(), num_clients)
+
+    num_updates = []
+    update = operator.fed_server.update
+
+    def counting_update(local_states):
+        num_updates.append(operator.round_number)
+        update(local_states)
+
+    operator.fed_server.update = counting_update
+
+    barrier = threading.Barrier(num_clients)
+    errors = []
+
+    def client(client_id):
+        try:
+            assert operator.get_weight(client_id, 10, timeout=30.0) > 0.0
+            for round_number in range(1, num_epochs + 1):
+                barrier.wait()
+                for name in model.state_dict():
+                    assert operator.get_tensor(name) is not None
+                upload(operator, client_id, round_number, client_id)
+                operator.get_job(round_number, timeout=30.0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=client, args=(c,)) for c in range(num_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    assert num_updates == list(range(1, num_epochs + 1))
+    assert operator.round_number == num_epochs + 1
+
+    # FedAvg with equal weights: the global model moves toward the mean of the uploaded states.
+    expected = np.mean(np.arange(num_clients))
+    weight = operator.get_tensor("weight")
+    assert not weight.flags.writeable
+    assert np.isfinite(weight).all()
+    assert abs(float(np.mean(weight)) - expected) < abs(
+        float(model.weight.mean()) - expected
+    )
+
+
+def test_operator_deadline_partial_participation():
+    """The round is aggregated at the deadline with the results received; late results are dropped."""
+
+    num_clients = 4
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.participation.deadline = 0.5
+    model = nn.Linear(4, 2)
+
+    operator = FLOperator(cfg, model, None, Dataset(), num_clients)
+    for client_id in range(num_clients):
+        operator.get_weight(client_id, 10)
+
+    upload(operator, 1, 1, 1)
+    upload(operator, 3, 1, 3)
+    assert operator.get_job(1, timeout=5.0)[0] == 2
+    upload(operator, 2, 1, 2)  # late
+
+    # Clients 1 and 3 have the same weight; client 2 is dropped.
+    assert np.allclose(operator.get_tensor("weight"), 2.0)
+    assert operator.fed_server.weights[0] == 0.0
+    assert operator.fed_server.weights[1] == 0.5
+    operator.deadline_timer.cancel()
+
+
+def test_operator_restores_from_checkpoint():
+    """A restarted operator resumes the round with the results saved before the restart."""
+
+    num_clients = 2
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 3
+    cfg.operator.checkpoint_dir = tempfile.mkdtemp()
+    cfg.fed.servername = "ServerFedAvgMomentum"
+    model = nn.Linear(4, 2)
+
+    operator = FLOperator(cfg, model, None, Dataset(), num_clients)
+    for client_id in range(num_clients):
+        operator.get_weight(client_id, 10 * (client_id + 1))
+    upload(operator, 0, 1, 0)
+    upload(operator, 1, 1, 1)
+    operator.wait_for_aggregation()
+    upload(operator, 1, 2, 1)
+    operator.checkpoint.flush()
+    operator.close()
+
+    restarted = FLOperator(cfg, nn.Linear(4, 2), None, Dataset(), num_clients)
+    assert restarted.round_number == 2
+    assert restarted.client_weights == operator.client_weights
+    assert np.array_equal(
+        restarted.get_tensor("weight"), operator.global_state_snapshot["weight"]
+    )
+    assert torch.equal(
+        restarted.fed_server.m_vector["weight"], operator.fed_server.m_vector["weight"]
+    )
+    # Client 1 already sent its results of round 2; client 0 lost its own (if any).
+    assert not restarted.results_missing(1, 2)
+    assert restarted.results_missing(0, 2)
+    upload(restarted, 0, 2, 0)
+    restarted.wait_for_aggregation()
+    assert restarted.round_number == 3
+    restarted.close()
+
+
+def test_next_round_opens_before_validation(monkeypatch):
+    """The last upload of a round returns, and the next round opens, while the global model is validated."""
+
+    release = threading.Event()
+
+    def blocking_validation(fed_server, dataloader):
+        assert release.wait(30)
+        return 0.0, 0.0
+
+    monkeypatch.setattr(operator_module, "validation", blocking_validation)
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(4, 2)
+    test_data = Dataset(torch.randn(8, 4), torch.zeros(8, dtype=torch.long))
+    operator = FLOperator(cfg, model, nn.CrossEntropyLoss(), test_data, 1)
+
+    operator.get_weight(0, 10)
+    upload(operator, 0, 1, 1.0)
+    assert operator.get_job(1, timeout=30.0) == (2, Job.TRAIN)
+    assert np.allclose(operator.get_tensor("bias"), np.ones(2, dtype=np.float32))
+    assert not operator.aggregation_future.done()
+
+    release.set()
+    operator.wait_for_aggregation()
+    assert operator.aggregation_future.done()
+    operator.close()
+
+
+def test_async_uploads_are_aggregated_while_validating(monkeypatch):
+    """In asynchronous mode, new versions are published while an earlier version is validated."""
+
+    release = threading.Event()
+    validated = []
+
+    def blocking_validation(fed_server, dataloader):
+        assert release.wait(30)
+        validated.append(fed_server)
+        return 0.0, 0.0
+
+    monkeypatch.setattr(operator_module, "validation", blocking_validation)
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 3
+    cfg.asynchronous.enable = True
+    cfg.asynchronous.buffer_size = 1
+    model = nn.Linear(4, 2)
+    test_data = Dataset(torch.randn(8, 4), torch.zeros(8, dtype=torch.long))
+    operator = FLOperator(cfg, model, nn.CrossEntropyLoss(), test_data, 2)
+    for client_id in range(2):
+        operator.get_weight(client_id, 10)
+
+    upload(operator, 0, 1, 1)
+    assert operator.round_number == 2
+    # Client 1 trained on version 1; its upload is aggregated while version 1 is validated.
+    upload(operator, 1, 1, 2)
+    assert operator.round_number == 3
+    assert operator.get_job(0)[0] == 3
+    assert not operator.aggregation_future.done()
+
+    release.set()
+    operator.wait_for_aggregation()
+    # Each version is validated on its own copy of the model.
+    assert len(validated) == 2
+    assert validated[0].model is not validated[1].model
+    assert validated[0].model is not operator.fed_server.model
+    operator.close()
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_checkpoint_is_saved_after_validation(monkeypatch, asynchronous):
+    """The checkpoint of a round carries the accuracy of its validation."""
+
+    monkeypatch.setattr(operator_module, "validation", lambda fed_server, dataloader: (0.0, 42.0))
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.operator.checkpoint_dir = tempfile.mkdtemp()
+    cfg.asynchronous.enable = asynchronous
+    cfg.asynchronous.buffer_size = 1
+    model = nn.Linear(4, 2)
+    test_data = Dataset(torch.randn(8, 4), torch.zeros(8, dtype=torch.long))
+    operator = FLOperator(cfg, model, nn.CrossEntropyLoss(), test_data, 1)
+
+    operator.get_weight(0, 10)
+    upload(operator, 0, 1, 1.0)
+    operator.wait_for_aggregation()
+    operator.checkpoint.flush()
+
+    state = operator.checkpoint.load("operator")
+    assert state["round_number"] == 2
+    assert state["best_accuracy"] == 42.0
+    operator.close()
+
+
+def test_weights_are_computed_once_per_round(monkeypatch):
+    """Clients retrying GetWeight get the weights without reopening the round."""
+
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.participation.deadline = 30.0
+    cfg.operator.checkpoint_dir = tempfile.mkdtemp()
+    operator = FLOperator(cfg, nn.Linear(4, 2), None, Dataset(), 2)
+    checkpoints = []
+    monkeypatch.setattr(operator, "save_checkpoint", lambda: checkpoints.append(operator.round_number))
+
+    assert operator.get_weight(0, 10) == -1.0
+    assert operator.get_weight(1, 30) == 0.75
+    timer = operator.deadline_timer
+    assert operator.get_weight(0, 10) == 0.25
+    assert operator.get_weight(1, 30, timeout=1.0) == 0.75
+    assert operator.deadline_timer is timer and timer.is_alive()
+    assert checkpoints == [1]
+    timer.cancel()
+    operator.close()
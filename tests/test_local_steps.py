@@ -0,0 +1,85 @@
+import copy
+import io
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from appfl.config import *
+from appfl.algorithm import ClientOptim, ServerFedAvg
+from appfl.misc.data import Dataset
+
+
+def local_state(model, scale, num_steps):
+    return OrderedDict(
+        primal=OrderedDict((k, v + scale) for k, v in model.state_dict().items()),
+        dual=OrderedDict(),
+        penalty=OrderedDict({0: 0.0}),
+        num_steps=num_steps,
+    )
+
+
+def test_client_runs_its_budget_of_local_steps():
+    cfg = OmegaConf.structured(Config)
+    cfg.fed.args.num_local_steps = 7
+    dataset = Dataset(torch.randn(40, 4), torch.zeros(40, dtype=torch.long))
+    client = ClientOptim(
+        0, 1.0, nn.Linear(4, 2), nn.CrossEntropyLoss(),
+        DataLoader(dataset, batch_size=16), cfg, io.StringIO(), None, **cfg.fed.args
+    )
+    assert client.update()["num_steps"] == 7
+
+
+def test_updates_are_normalized_by_local_steps():
+    """A client running four times the steps of another is not weighted four times more."""
+    cfg = OmegaConf.structured(Config)
+    model = nn.Linear(4, 2)
+    weights = {0: 0.5, 1: 0.5}
+    # Per step, client 0 moves by 0.1 and client 1 by 0.05.
+    states = OrderedDict([(0, local_state(model, 1.0, 10)), (1, local_state(model, 2.0, 40))])
+
+    batch = ServerFedAvg(weights, copy.deepcopy(model), None, 2, "cpu", **cfg.fed.args)
+    batch.update([states])
+    streaming = ServerFedAvg(weights, copy.deepcopy(model), None, 2, "cpu", **cfg.fed.args)
+    streaming.begin_update()
+    for c, state in states.items():
+        streaming.accumulate(c, state)
+    assert streaming.end_update()
+
+    # Over the 25 steps of the average client, the global model moves by 25 * (0.1 + 0.05) / 2.
+    for name, tensor in model.state_dict().items():
+        assert torch.allclose(batch.model.state_dict()[name], tensor + 1.875)
+        assert torch.allclose(streaming.model.state_dict()[name], tensor + 1.875)
+
+    # Without steps, the update is the plain average.
+    for state in states.values():
+        del state["num_steps"]
+    plain = ServerFedAvg(weights, copy.deepcopy(model), None, 2, "cpu", **cfg.fed.args)
+    plain.update([states])
+    for name, tensor in model.state_dict().items():
+        assert torch.allclose(plain.model.state_dict()[name], tensor + 1.5)
+
+
+def test_streaming_normalization_matches_batch_with_clients_without_steps():
+    cfg = OmegaConf.structured(Config)
+    model = nn.Linear(4, 2)
+    weights = {0: 0.2, 1: 0.3, 2: 0.5}
+    states = OrderedDict(
+        [(0, local_state(model, 1.0, 10)), (1, local_state(model, 2.0, None)), (2, local_state(model, 2.0, 40))]
+    )
+
+    batch = ServerFedAvg(weights, copy.deepcopy(model), None, 3, "cpu", **cfg.fed.args)
+    batch.update([states])
+    streaming = ServerFedAvg(weights, copy.deepcopy(model), None, 3, "cpu", **cfg.fed.args)
+    streaming.begin_update()
+    for c, state in states.items():
+        streaming.accumulate(c, state)
+    assert streaming.end_update()
+
+    # Clients 0 and 2 are normalized by their mean steps; client 1 (no steps reported) keeps its weight.
+    mean_steps = (0.2 * 10 + 0.5 * 40) / 0.7
+    expected = 0.2 * mean_steps / 10 * 1.0 + 0.3 * 2.0 + 0.5 * mean_steps / 40 * 2.0
+    for name, tensor in model.state_dict().items():
+        assert torch.allclose(batch.model.state_dict()[name], tensor + expected)
+        assert torch.allclose(streaming.model.state_dict()[name], tensor + expected)
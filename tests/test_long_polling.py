@@ -0,0 +1,74 @@
+import tempfile
+import time
+from concurrent import futures
+
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos.client import FLClient
+from appfl.protos.federated_learning_pb2 import Job
+from appfl.protos.operator import FLOperator
+from appfl.protos.server import FLServicer
+from appfl.protos import federated_learning_pb2_grpc
+
+
+def test_long_polls_wait_for_the_weights_and_the_next_round():
+    """GetWeight and GetJob are held until the state they wait for changes, or until their timeout."""
+
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(4, 2)
+    operator = FLOperator(cfg, model, None, Dataset(), 2)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    comms = [
+        FLClient(c, "localhost:%d" % port, False, long_poll_timeout=0.5)
+        for c in range(2)
+    ]
+    pool = futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        # Client 1 has not reported its training size: GetWeight times out without a weight.
+        start = time.time()
+        assert comms[0].get_weight(10) == -1.0
+        assert time.time() - start >= 0.5
+
+        # A waiting client gets its weight as soon as the last client reports.
+        comms[0].long_poll_timeout = 30.0
+        weight = pool.submit(comms[0].get_weight, 10)
+        time.sleep(0.2)
+        assert not weight.done()
+        assert comms[1].get_weight(30) == 0.75
+        assert weight.result(10) == 0.25
+
+        assert comms[1].get_job(Job.INIT) == (1, Job.TRAIN)
+        comms[0].send_learning_results({0: 0.0}, model.state_dict(), {}, 1)
+
+        # Round 1 is not over: GetJob times out and tells the client to wait.
+        start = time.time()
+        comms[0].long_poll_timeout = 0.5
+        assert comms[0].get_job(Job.TRAIN, 1) == (1, Job.WAIT)
+        assert time.time() - start >= 0.5
+
+        # A waiting client gets the next round as soon as it opens.
+        comms[0].long_poll_timeout = 30.0
+        job = pool.submit(comms[0].get_job, Job.TRAIN, 1)
+        time.sleep(0.2)
+        assert not job.done()
+        comms[1].send_learning_results({1: 0.0}, model.state_dict(), {}, 1)
+        assert job.result(10) == (2, Job.TRAIN)
+    finally:
+        pool.shutdown()
+        for comm in comms:
+            comm.close()
+        server.stop(None)
+    operator.close()
@@ -0,0 +1,99 @@
+import tempfile
+from concurrent import futures
+
+import pytest
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos.client import FLClient
+from appfl.protos.metrics import MetricsInterceptor, MetricsRegistry
+from appfl.protos.operator import FLOperator
+from appfl.protos.server import FLServicer
+from appfl.protos import federated_learning_pb2_grpc
+
+
+def test_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    for value in (0.0001, 0.003, 0.003, 100.0):
+        registry.observe("rpc_duration_seconds", value, method="GetJob")
+    registry.inc("rpc_sent_bytes_total", 10, method="GetJob")
+
+    lines = registry.to_prometheus().splitlines()
+    assert 'appfl_rpc_duration_seconds_bucket{method="GetJob",le="0.001"} 1' in lines
+    assert 'appfl_rpc_duration_seconds_bucket{method="GetJob",le="0.005"} 3' in lines
+    assert 'appfl_rpc_duration_seconds_bucket{method="GetJob",le="+Inf"} 4' in lines
+    assert 'appfl_rpc_duration_seconds_count{method="GetJob"} 4' in lines
+    assert 'appfl_rpc_sent_bytes_total{method="GetJob"} 10' in lines
+
+
+def test_interceptors_record_rpcs():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    operator = FLOperator(cfg, nn.Linear(4, 2), None, Dataset(), 1)
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=2),
+        interceptors=[MetricsInterceptor(operator.metrics)],
+    )
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    client_metrics = MetricsRegistry()
+    comm = FLClient(0, "localhost:%d" % port, False, metrics=client_metrics)
+    try:
+        comm.get_weight(10)
+        comm.get_schema()
+        comm.get_model(1)
+    finally:
+        comm.close()
+        server.stop(None)
+
+    for registry in (operator.metrics, client_metrics):
+        counters = {
+            (name, dict(labels)["method"]): value
+            for (name, labels), value in registry.counters.items()
+        }
+        for method in ("GetWeight", "GetSchema", "GetModel"):
+            assert counters[("rpc_total", method)] == 1
+            assert counters[("rpc_sent_bytes_total", method)] > 0
+    # What the server sends is what the client receives.
+    assert (
+        client_metrics.counters[("rpc_received_bytes_total", (("method", "GetModel"),))]
+        == operator.metrics.counters[("rpc_sent_bytes_total", (("method", "GetModel"),))]
+    )
+    assert operator.metrics.gauges[("rpc_active", (("method", "GetModel"),))] == 0
+
+
+def test_errors_are_labeled_by_status_code_on_both_ends():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    operator = FLOperator(cfg, nn.Linear(4, 2), None, Dataset(), 1)
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=2),
+        interceptors=[MetricsInterceptor(operator.metrics)],
+    )
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    client_metrics = MetricsRegistry()
+    comm = FLClient(0, "localhost:%d" % port, False, upload_retries=0, metrics=client_metrics)
+    try:
+        with pytest.raises(grpc.RpcError):
+            comm.upload(bytes(operator.uploads.max_size + 1))
+    finally:
+        comm.close()
+        server.stop(None)
+
+    key = ("rpc_errors_total", (("error", "FAILED_PRECONDITION"), ("method", "UploadLearningResults")))
+    assert operator.metrics.counters[key] == 1
+    assert client_metrics.counters[key] == 1
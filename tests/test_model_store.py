@@ -0,0 +1,50 @@
+import os
+import pickle
+import tempfile
+
+import pytest
+import torch
+import torch.nn as nn
+
+pytest.importorskip("funcx")
+
+from appfl.codec import encode_compact
+from appfl.funcx import LocalDirectoryStore, load_global_state
+
+
+def test_global_model_is_passed_by_reference():
+    store = LocalDirectoryStore(tempfile.mkdtemp())
+    state = nn.Linear(64, 8).state_dict()
+    handle = store.put(state)
+    assert store.put(state).key == handle.key
+    assert os.listdir(store.root) == [handle.key + ".pt"]
+
+    # The task payload only carries the handle; the endpoint fetches the model.
+    payload = pickle.dumps(handle)
+    assert len(payload) < handle.nbytes
+    fetched = load_global_state(pickle.loads(payload))
+    for name, tensor in state.items():
+        assert torch.equal(fetched[name], tensor)
+
+    with open(store.path(handle.key), "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 1]))
+    with pytest.raises(ValueError):
+        handle.load()
+
+    store.remove(handle.key)
+    assert not store.exists(handle.key)
+
+
+def test_updates_are_returned_through_the_store():
+    store = LocalDirectoryStore(tempfile.mkdtemp())
+    global_state = nn.Linear(64, 8).state_dict()
+    local_state = {k: v + 1.0 for k, v in global_state.items()}
+    update = encode_compact(local_state, global_state, encoding="float16", store=store)
+    assert len(pickle.dumps(update)) < update.nbytes()
+
+    decoded = pickle.loads(pickle.dumps(update)).decode(global_state)
+    for name, tensor in local_state.items():
+        assert torch.allclose(decoded[name], tensor, atol=1e-2)
@@ -0,0 +1,176 @@
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pytest
+import torch
+import torch.nn as nn
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.misc.participation import *
+from appfl import run_serial
+
+
+def test_participants_are_sampled_per_round():
+    sampler = ClientSampler(10, fraction=0.3, seed=1)
+    assert sampler.count == 3
+    rounds = [sampler.sample(r) for r in range(1, 6)]
+    for participants in rounds:
+        assert participants == sorted(set(participants)) and len(participants) == 3
+    # The participants depend only on the seed and the round number.
+    assert rounds == [ClientSampler(10, fraction=0.3, seed=1).sample(r) for r in range(1, 6)]
+    assert rounds != [ClientSampler(10, fraction=0.3, seed=2).sample(r) for r in range(1, 6)]
+
+    assert ClientSampler(10, fraction=0.3, count=4).count == 4
+    assert ClientSampler(10, fraction=0.01).count == 1
+    assert ClientSampler(10, count=20).sample(1) == list(range(10))
+
+
+def test_absent_clients_have_zero_weight():
+    weights = OrderedDict([(0, 0.5), (1, 0.3), (2, 0.2)])
+    renormalized = renormalize_weights(weights, [1, 2])
+    assert renormalized[0] == 0.0
+    assert abs(renormalized[1] - 0.6) < 1e-9 and abs(renormalized[2] - 0.4) < 1e-9
+
+    global_state = nn.Linear(2, 1).state_dict()
+    states = absent_states(global_state, [1], 3)
+    assert list(states) == [0, 2]
+    assert torch.equal(states[0]["primal"]["weight"], global_state["weight"])
+    assert states[0]["primal"]["weight"] is not global_state["weight"]
+    assert states[2]["penalty"] == {2: 0.0}
+
+
+def record_participants(monkeypatch, module):
+    recorded = []
+
+    def recording_renormalize_weights(weights, participants):
+        recorded.append(sorted(participants))
+        return renormalize_weights(weights, participants)
+
+    monkeypatch.setattr(module, "renormalize_weights", recording_renormalize_weights)
+    return recorded
+
+
+def make_config(num_clients, num_epochs):
+    cfg = OmegaConf.structured(Config)
+    cfg.num_clients = num_clients
+    cfg.num_epochs = num_epochs
+    cfg.validation = False
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.fed.args.num_local_epochs = 1
+    return cfg
+
+
+def make_data(num_clients):
+    generator = torch.Generator().manual_seed(0)
+    return [
+        Dataset(torch.randn(16, 4, generator=generator), torch.randint(2, (16,), generator=generator))
+        for _ in range(num_clients)
+    ]
+
+
+def test_serial_rounds_aggregate_the_sampled_clients(monkeypatch):
+    recorded = record_participants(monkeypatch, run_serial)
+    cfg = make_config(4, 3)
+    cfg.participation.num_clients = 2
+    run_serial.run_serial(cfg, nn.Linear(4, 2), nn.CrossEntropyLoss(), make_data(4), Dataset())
+
+    sampler = create_client_sampler(cfg, 4)
+    assert recorded == [sampler.sample(t) for t in range(1, 4)]
+
+    # Every client misses a deadline of a microsecond: no update is aggregated.
+    recorded.clear()
+    cfg = make_config(4, 1)
+    cfg.participation.deadline = 1e-6
+    run_serial.run_serial(cfg, nn.Linear(4, 2), nn.CrossEntropyLoss(), make_data(4), Dataset())
+    assert recorded == []
+
+
+class ThreadComm:
+    """Collectives of ``run_mpi`` between ranks running on threads of this process."""
+
+    def __init__(self, rank, size, barrier, slots):
+        self.rank = rank
+        self.size = size
+        self.barrier = barrier
+        self.slots = slots
+
+    @classmethod
+    def create(cls, size):
+        barrier = threading.Barrier(size)
+        slots = [None] * size
+        return [cls(rank, size, barrier, slots) for rank in range(size)]
+
+    def Get_rank(self):
+        return self.rank
+
+    def Get_size(self):
+        return self.size
+
+    def exchange(self, value):
+        self.slots[self.rank] = value
+        self.barrier.wait()
+        values = list(self.slots)
+        self.barrier.wait()
+        return values
+
+    def bcast(self, value, root=0):
+        return self.exchange(value)[root]
+
+    def gather(self, value, root=0):
+        values = self.exchange(value)
+        return values if self.rank == root else None
+
+    def scatter(self, values, root=0):
+        return self.exchange(values)[root][self.rank]
+
+
+def test_mpi_rounds_aggregate_the_sampled_clients(monkeypatch):
+    pytest.importorskip("mpi4py")
+    from appfl import run_mpi
+
+    recorded = record_participants(monkeypatch, run_mpi)
+    num_clients = 4
+    cfg = make_config(num_clients, 3)
+    cfg.participation.num_clients = 2
+    train_data = make_data(num_clients)
+    comms = ThreadComm.create(3)
+    errors = []
+
+    def run(rank):
+        try:
+            if rank == 0:
+                run_mpi.run_server(cfg, comms[0], nn.Linear(4, 2), nn.CrossEntropyLoss(), num_clients)
+            else:
+                run_mpi.run_client(
+                    cfg, comms[rank], nn.Linear(4, 2), nn.CrossEntropyLoss(), num_clients, train_data
+                )
+        except Exception as e:
+            errors.append(e)
+            comms[rank].barrier.abort()
+
+    threads = [threading.Thread(target=run, args=(rank,)) for rank in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    sampler = create_client_sampler(cfg, num_clients)
+    assert recorded == [sampler.sample(t) for t in range(1, 4)]
+
+
+def test_funcx_rounds_run_the_sampled_clients():
+    pytest.importorskip("funcx")
+    from appfl.funcx.benchmark import run_benchmark
+
+    report = run_benchmark(
+        4,
+        num_rounds=2,
+        model_size=100,
+        server={"poll_max_interval": 0.5},
+        config={"participation": {"num_clients": 2}},
+    )
+    assert report["tasks"]["client_validate_data"]["count"] == 4
+    assert report["tasks"]["client_training"]["count"] == 2 * 2
@@ -0,0 +1,46 @@
+import copy
+import logging
+import time
+
+import torch
+import torch.nn as nn
+
+from appfl.config import *
+from appfl.algorithm import ServerFedAvg
+from appfl.misc import pipeline
+from appfl.misc.pipeline import RoundFinisher
+
+
+def test_round_is_validated_in_background_against_a_snapshot(monkeypatch):
+    validated = []
+
+    def slow_validation(server, dataloader):
+        time.sleep(0.2)
+        validated.append(server.model.bias.detach().clone())
+        return 0.5, float(len(validated))
+
+    monkeypatch.setattr(pipeline, "validation", slow_validation)
+    cfg = OmegaConf.structured(Config)
+    cfg.pipeline_validation = True
+    cfg.num_epochs = 2
+    cfg["logginginfo"]["LocalUpdate_time"] = 0.0
+    cfg["logginginfo"]["GlobalUpdate_time"] = 0.0
+    model = nn.Linear(4, 2)
+    server = ServerFedAvg({0: 1.0}, model, None, 1, "cpu", **cfg.fed.args)
+    finisher = RoundFinisher(cfg, logging.getLogger(__name__))
+
+    for t in range(cfg.num_epochs):
+        start = time.time()
+        bias = server.model.bias.detach().clone()
+        finisher.finish(t, server, start)
+        # The next round starts before the validation of this one, and changes the model.
+        if t == 0:
+            assert time.time() - start < 0.1
+        with torch.no_grad():
+            server.model.bias += 1.0
+    finisher.close()
+
+    assert len(validated) == 2
+    assert torch.equal(validated[1], bias)
+    assert cfg["logginginfo"]["BestAccuracy"] == 2.0
+    assert cfg["logginginfo"]["Validation_time"] >= 0.2
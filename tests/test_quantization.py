@@ -0,0 +1,100 @@
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from appfl.codec import *
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos import utils
+from appfl.protos.operator import FLOperator
+
+
+@pytest.mark.parametrize("bits", SUPPORTED_BITS)
+@pytest.mark.parametrize("size", [1, 7, 13, 257])
+def test_levels_are_packed_and_unpacked(bits, size):
+    levels = np.random.default_rng(size).integers(0, 2**bits, size=size).astype(np.uint8)
+    packed = pack_levels(levels, bits)
+    assert len(packed) == -(-size * bits // 8)
+    assert np.array_equal(unpack_levels(packed, bits, size), levels)
+
+
+@pytest.mark.parametrize("bits", SUPPORTED_BITS)
+def test_quantization_is_bounded_and_unbiased(bits):
+    rng = np.random.default_rng(0)
+    array = rng.standard_normal((3, 5, 7)).astype(np.float32)  # odd-sized, several blocks
+    s = 2 ** (bits - 1) - 1
+    decoded = [dequantize(quantize(array, bits, block_size=16, rng=rng)) for _ in range(2000)]
+    assert decoded[0].shape == array.shape
+
+    # Every entry is rounded to one of the two levels around it.
+    step = np.abs(array).max() / s
+    assert np.abs(decoded[0] - array).max() <= step + 1e-6
+    # The rounding is unbiased: the mean of many draws converges to the array.
+    assert np.abs(np.mean(decoded, axis=0) - array).max() < 0.1 * step + 1e-3
+
+
+def test_error_feedback_carries_the_quantization_error_over():
+    delta = torch.full((100,), 0.3)
+    delta[0] = 1.0
+    num_rounds = 20
+    exact = num_rounds * delta
+    errors = {}
+    for error_feedback in (True, False):
+        codec = QuantizationCodec(bits=2, block_size=100, error_feedback=error_feedback, seed=0)
+        total = torch.zeros(100)
+        for _ in range(num_rounds):
+            total += torch.from_numpy(dequantize(codec.encode("w", delta)))
+        errors[error_feedback] = (total - exact).abs()
+        if error_feedback:
+            # The decoded updates add up to the true ones, but for the residual of the last round.
+            assert torch.allclose(total + torch.from_numpy(codec.residual["w"]), exact, atol=1e-4)
+    assert errors[True].mean() < errors[False].mean()
+
+
+def test_local_states_are_encoded_and_decoded():
+    model = nn.BatchNorm1d(4)
+    global_state = OrderedDict((k, v.clone()) for k, v in model.state_dict().items())
+    primal = OrderedDict((k, v.clone()) for k, v in global_state.items())
+    primal["weight"] += 0.5
+    local_state = {"primal": primal, "dual": OrderedDict(), "penalty": {0: 0.0}}
+
+    codec = QuantizationCodec(bits=8, block_size=256, seed=0)
+    encoded = encode_local_state(codec, local_state, global_state)
+    assert isinstance(encoded["primal"]["weight"], QuantizedTensor)
+    # Integer buffers are passed through.
+    assert encoded["primal"]["num_batches_tracked"] is primal["num_batches_tracked"]
+    assert codec.compression_ratio() > 1.0
+    assert encode_local_state(None, local_state, global_state) is local_state
+
+    decoded = decode_local_states([{0: encoded}], global_state)[0][0]["primal"]
+    assert torch.allclose(decoded["weight"], primal["weight"], atol=1.5 / 127)
+    assert torch.equal(decoded["bias"], primal["bias"])
+
+
+def test_operator_decodes_quantized_uploads():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(4, 2)
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+    operator.get_weight(0, 10)
+
+    global_state = model.state_dict()
+    local_state = OrderedDict((k, v + 0.25) for k, v in global_state.items())
+    codec = QuantizationCodec(bits=4, block_size=4, seed=0)
+    records = [
+        utils.construct_quantized_tensor_record(name, qtensor)
+        for name, qtensor in codec.encode_update(local_state, global_state).items()
+    ]
+    operator.send_learning_results(0, 1, 0.0, [], [], primal_quantized=records)
+    operator.wait_for_aggregation()
+
+    # A single client with all the weight: the global model becomes its local state.
+    assert operator.round_number == 2
+    for name, tensor in local_state.items():
+        assert np.allclose(operator.get_tensor(name), tensor.numpy(), atol=0.25 / 7 + 1e-6)
+    operator.close()
@@ -0,0 +1,190 @@
+import socket
+import tempfile
+import threading
+from concurrent import futures
+
+import pytest
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos.client import FLClient
+from appfl.protos.operator import FLOperator
+from appfl.protos.server import FLServicer
+from appfl.protos.upload import UploadError, UploadManager
+from appfl.protos import federated_learning_pb2_grpc
+
+
+class FaultyProxy:
+    """TCP proxy that drops its first connection after forwarding ``cut_after`` bytes to the server."""
+
+    def __init__(self, target_port, cut_after):
+        self.target_port = target_port
+        self.cut_after = cut_after
+        self.forwarded = 0
+        self.faults = 0
+        self.listener = socket.socket()
+        self.listener.bind(("localhost", 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        first = True
+        while True:
+            client, _ = self.listener.accept()
+            server = socket.create_connection(("localhost", self.target_port))
+            sockets = (client, server)
+            threading.Thread(
+                target=self.pump, args=(client, server, sockets, first), daemon=True
+            ).start()
+            threading.Thread(
+                target=self.pump, args=(server, client, sockets, False), daemon=True
+            ).start()
+            first = False
+
+    def pump(self, source, destination, sockets, faulty):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if faulty and self.forwarded + len(data) > self.cut_after:
+                    self.faults += 1
+                    break
+                destination.sendall(data)
+                if faulty:
+                    self.forwarded += len(data)
+        except OSError:
+            pass
+        for s in sockets:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            s.close()
+
+
+def test_upload_resumes_after_connection_loss():
+    """A connection dropped mid-upload only retransmits the chunks not acknowledged yet."""
+
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(512, 512)
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    total_size = 4 * 513 * 512
+    proxy = FaultyProxy(port, cut_after=total_size // 2)
+    comm = FLClient(
+        0, "localhost:%d" % proxy.port, False, upload_chunk_size=16 * 1024
+    )
+    try:
+        assert comm.get_weight(10) == 1.0
+        comm.get_schema()
+        comm.send_learning_results(
+            {0: 0.0}, model.state_dict(), {}, operator.round_number
+        )
+    finally:
+        comm.close()
+        server.stop(None)
+
+    assert proxy.faults == 1
+    assert operator.round_number == 2
+    assert comm.bytes_uploaded > total_size
+    assert 0 < comm.bytes_retransmitted <= (comm.upload_window + 2) * 16 * 1024
+
+
+def test_upload_manager_rejects_gaps():
+    uploads = UploadManager(ttl=60.0)
+    assert uploads.write(1, "a", 0, 6, b"abc") == (3, None)
+    with pytest.raises(UploadError):
+        uploads.write(1, "a", 4, 6, b"ef")
+    assert uploads.status(1, "a") == (3, False)
+    assert uploads.write(1, "a", 3, 6, b"def") == (6, b"abcdef")
+    assert uploads.status(1, "a") == (6, True)
+    assert uploads.status(2, "a") == (0, False)
+
+
+def test_upload_manager_bounds_partial_uploads():
+    uploads = UploadManager(ttl=60.0, max_size=6, max_uploads_per_client=2)
+    with pytest.raises(UploadError):
+        uploads.write(1, "a", 0, 7, b"abc")
+    assert "a" not in uploads.uploads
+
+    uploads.write(1, "a", 0, 6, b"abc")
+    uploads.write(1, "b", 0, 6, b"abc")
+    uploads.write(2, "c", 0, 6, b"abc")
+    # A third partial upload of client 1 drops its oldest one; other clients keep theirs.
+    uploads.write(1, "d", 0, 6, b"abc")
+    assert sorted(uploads.uploads) == ["b", "c", "d"]
+    assert uploads.status(1, "a") == (0, False)
+
+    # Completed uploads do not count.
+    assert uploads.write(1, "b", 3, 6, b"def") == (6, b"abcdef")
+    uploads.write(1, "e", 0, 6, b"abc")
+    assert sorted(uploads.uploads) == ["b", "c", "d", "e"]
+
+
+def test_upload_manager_copies_uploads_concurrently():
+    uploads = UploadManager(ttl=60.0)
+    uploads.write(1, "a", 0, 6, b"abc")
+    uploads.write(2, "b", 0, 6, b"abc")
+    # A chunk of another upload is copied while upload "a" is busy.
+    with uploads.uploads["a"].lock:
+        assert uploads.write(2, "b", 3, 6, b"def") == (6, b"abcdef")
+
+    uploads.discard(2, "a")
+    assert uploads.status(1, "a") == (3, False)
+    uploads.discard(1, "a")
+    assert uploads.status(1, "a") == (0, False)
+
+
+def test_upload_is_sent_again_when_its_results_fail():
+    """Results lost by a failure of the server are reported, and the client uploads them again."""
+
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    model = nn.Linear(64, 64)
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+    failures = []
+    send_learning_results = operator.send_learning_results
+
+    def failing_send_learning_results(*args, **kwargs):
+        if not failures:
+            failures.append(args[0])
+            raise RuntimeError("aggregation failed")
+        return send_learning_results(*args, **kwargs)
+
+    operator.send_learning_results = failing_send_learning_results
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    comm = FLClient(0, "localhost:%d" % port, False, upload_chunk_size=4096)
+    try:
+        assert comm.get_weight(10) == 1.0
+        comm.send_learning_results({0: 0.0}, model.state_dict(), {}, 1)
+    finally:
+        comm.close()
+        server.stop(None)
+
+    assert failures == [0]
+    total_size = 4 * 65 * 64
+    assert comm.bytes_uploaded > 2 * total_size
+    operator.wait_for_aggregation()
+    assert operator.round_number == 2
+    operator.close()
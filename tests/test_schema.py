@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+
+from appfl.protos.schema import ModelSchema, parse_dtype
+
+
+def test_schema_round_trip():
+    model = nn.Sequential(nn.Linear(5, 3), nn.BatchNorm1d(3))
+    schema = ModelSchema.from_state(model.state_dict())
+
+    received = ModelSchema.from_proto(schema.to_proto())
+    assert received.hash == schema.hash
+
+    state = received.unpack(schema.pack(model.state_dict()))
+    for name, tensor in model.state_dict().items():
+        assert state[name].dtype == tensor.numpy().dtype
+        assert np.array_equal(state[name], tensor.numpy())
+    assert all(offset % 64 == 0 for offset in schema.offsets.values())
+
+
+def test_parse_dtype_does_not_evaluate():
+    assert parse_dtype("np.float32") == np.float32
+    assert parse_dtype("int64") == np.int64
+    with pytest.raises(ValueError):
+        parse_dtype("__import__('os').getcwd()")
+
+
+class _LocalComm:
+    """Stands in for FLClient, serving a packed model from memory."""
+
+    def __init__(self, schema, data):
+        self.schema = schema
+        self.data = data
+
+    def get_model_into(self, round_number, buffer):
+        buffer[:] = np.frombuffer(self.data, dtype=np.uint8)
+        return buffer
+
+
+def test_downloader_loads_model_in_place():
+    from appfl.protos.client import ModelDownloader
+
+    source = nn.Sequential(nn.Linear(5, 3), nn.BatchNorm1d(3))
+    target = nn.Sequential(nn.Linear(5, 3), nn.BatchNorm1d(3))
+    schema = ModelSchema.from_state(source.state_dict())
+    storage = {name: t.data_ptr() for name, t in target.state_dict().items()}
+
+    downloader = ModelDownloader(
+        _LocalComm(schema, schema.pack(source.state_dict())), prefetch=False
+    )
+    downloader.load(target, 1)
+    for name, tensor in target.state_dict().items():
+        assert tensor.data_ptr() == storage[name]
+        assert torch.equal(tensor, source.state_dict()[name])
@@ -0,0 +1,82 @@
+import tempfile
+from collections import OrderedDict
+from concurrent import futures
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos.client import FLClient
+from appfl.protos.federated_learning_pb2 import Job
+from appfl.protos.operator import FLOperator
+from appfl.protos.server import FLServicer
+from appfl.protos.sharding import (
+    ShardedFLClient,
+    partition_state,
+    shard_config,
+    shard_model,
+)
+from appfl.protos import federated_learning_pb2_grpc
+
+
+def make_model():
+    return nn.Sequential(nn.Linear(64, 32), nn.ReLU(), nn.Linear(32, 4))
+
+
+def test_partition_balances_bytes():
+    state = make_model().state_dict()
+    partition = partition_state(state, 2)
+    assert partition == [["0.weight"], ["0.bias", "2.weight", "2.bias"]]
+    assert list(shard_model(make_model(), partition[1]).state_dict()) == partition[1]
+
+
+def test_sharded_round():
+    """Two operators each aggregate a shard; the client sees the full global model."""
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.server.num_shards = 2
+    model = make_model()
+    partition = partition_state(model.state_dict(), 2)
+
+    servers = []
+    shards = []
+    try:
+        for shard_id, names in enumerate(partition):
+            operator = FLOperator(
+                shard_config(cfg, shard_id), shard_model(model, names), None, Dataset(), 1
+            )
+            server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+            federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+                FLServicer(1, str(shard_id), operator), server
+            )
+            port = server.add_insecure_port("localhost:0")
+            server.start()
+            servers.append(server)
+            shards.append(FLClient(0, "localhost:%d" % port, False, long_poll_timeout=5.0))
+        comm = ShardedFLClient(shards, partition)
+
+        assert comm.get_weight(10) == 1.0
+        assert comm.get_schema().names == partition[0] + partition[1]
+        assert comm.get_job(Job.INIT) == (1, Job.TRAIN)
+        global_model = comm.get_model(1)
+        for name, tensor in model.state_dict().items():
+            assert np.array_equal(global_model[name], tensor.numpy())
+
+        primal = OrderedDict(
+            (name, torch.full(tensor.shape, 0.5)) for name, tensor in model.state_dict().items()
+        )
+        comm.send_learning_results({0: 0.0}, primal, {}, 1)
+        assert comm.get_job(Job.TRAIN, 1) == (2, Job.TRAIN)
+        global_model = comm.get_model(2)
+        for name in primal:
+            assert np.allclose(global_model[name], 0.5)
+            assert np.allclose(comm.get_tensor_record(name, 2), 0.5)
+        comm.close()
+    finally:
+        for server in servers:
+            server.stop(None)
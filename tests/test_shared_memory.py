@@ -0,0 +1,117 @@
+import tempfile
+from concurrent import futures
+
+import numpy as np
+import pytest
+import torch.nn as nn
+
+import grpc
+
+from appfl.config import *
+from appfl.misc.data import Dataset
+from appfl.protos import utils
+from appfl.protos.federated_learning_pb2 import Header, LearningResults
+from appfl.protos.federated_learning_pb2_grpc import FederatedLearningStub
+from appfl.protos.operator import FLOperator, InvalidResults
+from appfl.protos.server import FLServicer
+from appfl.protos import federated_learning_pb2_grpc
+from appfl.protos.schema import ModelSchema
+from appfl.protos.shared_memory import SegmentPublisher, SegmentWriter, read_segment
+from appfl.protos.shared_memory import client_segment_prefix, is_client_segment
+
+
+def test_shared_memory_round_trip():
+    model = nn.Linear(16, 4)
+    schema = ModelSchema.from_state(model.state_dict())
+
+    publisher = SegmentPublisher(max_segments=1)
+    writer = SegmentWriter(schema.total_bytes)
+    try:
+        name = publisher.publish(schema.pack(model.state_dict()))
+        state = schema.unpack(read_segment(name, schema.total_bytes))
+        assert np.array_equal(state["weight"], model.weight.detach().numpy())
+
+        # Only the latest segment is kept.
+        publisher.publish(schema.pack(model.state_dict()))
+        assert name not in publisher.segments
+
+        schema.pack_into(model.state_dict(), writer.segment.buf)
+        state = schema.unpack(read_segment(writer.name, schema.total_bytes))
+        assert np.array_equal(state["bias"], model.bias.detach().numpy())
+    finally:
+        writer.close()
+        publisher.close()
+
+
+def test_only_segments_of_the_client_are_read():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.server.use_shared_memory = True
+    model = nn.Linear(4, 2)
+    operator = FLOperator(cfg, model, None, Dataset(), 2)
+    operator.get_weight(0, 10)
+    operator.get_weight(1, 10)
+
+    writer = SegmentWriter(operator.schema.total_bytes, prefix=client_segment_prefix(0))
+    try:
+        assert is_client_segment(writer.name, 0)
+        assert not is_client_segment(writer.name, 1)
+        assert not is_client_segment(operator.global_state_segment, 0)
+        operator.schema.pack_into(model.state_dict(), writer.segment.buf)
+
+        # Client 1 cannot make the server read the segment of client 0, nor the published model.
+        for name in (writer.name, operator.global_state_segment, "../" + writer.name):
+            operator.send_learning_results(
+                1, 1, 0.0, [], [], schema_hash=operator.schema.hash, primal_segment=name
+            )
+            assert not operator.client_learning_status.get((1, 1))
+        operator.send_learning_results(
+            0, 1, 0.0, [], [], schema_hash=operator.schema.hash, primal_segment=writer.name
+        )
+        assert operator.client_learning_status[(0, 1)]
+    finally:
+        writer.close()
+        operator.close()
+
+
+def test_segments_of_the_wrong_size_are_rejected():
+    cfg = OmegaConf.structured(Config)
+    cfg.output_dirname = tempfile.mkdtemp()
+    cfg.num_epochs = 2
+    cfg.server.use_shared_memory = True
+    model = nn.Linear(4, 2)
+    operator = FLOperator(cfg, model, None, Dataset(), 1)
+    operator.get_weight(0, 10)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    federated_learning_pb2_grpc.add_FederatedLearningServicer_to_server(
+        FLServicer(1, "0", operator), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    channel = grpc.insecure_channel("localhost:%d" % port)
+    writer = SegmentWriter(operator.schema.total_bytes // 2, prefix=client_segment_prefix(0))
+    try:
+        with pytest.raises(InvalidResults):
+            operator.send_learning_results(
+                0, 1, 0.0, [], [], schema_hash=operator.schema.hash, primal_segment=writer.name
+            )
+
+        proto = LearningResults(
+            header=Header(server_id=1, client_id=0),
+            round_number=1,
+            schema_hash=operator.schema.hash,
+            primal_segment=writer.name,
+        )
+        with pytest.raises(grpc.RpcError) as error:
+            FederatedLearningStub(channel).SendLearningResults(
+                iter(utils.proto_to_databuffer(proto))
+            )
+        assert error.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert not operator.client_learning_status.get((0, 1))
+    finally:
+        writer.close()
+        channel.close()
+        server.stop(None)
+        operator.close()
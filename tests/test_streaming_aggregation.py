@@ -0,0 +1,45 @@
+import copy
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+
+from appfl.config import *
+from appfl.algorithm import ServerFedAdam
+from appfl.misc.participation import absent_states, renormalize_weights
+
+
+def test_streaming_update_matches_batch_update():
+    """Folding local states as they arrive updates the model as the update with every state at once."""
+    cfg = OmegaConf.structured(Config)
+    num_clients = 4
+    weights = OrderedDict((c, 0.25) for c in range(num_clients))
+    model = nn.Linear(8, 3)
+    participants = [2, 0, 3]  # client 1 does not send its state
+    local_states = OrderedDict()
+    for c in participants:
+        local_states[c] = OrderedDict(
+            primal=OrderedDict(
+                (k, v + torch.randn(v.shape)) for k, v in model.state_dict().items()
+            ),
+            dual=OrderedDict(),
+            penalty=OrderedDict({c: 0.0}),
+        )
+
+    batch = ServerFedAdam(weights, copy.deepcopy(model), None, num_clients, "cpu", **cfg.fed.args)
+    streaming = ServerFedAdam(weights, copy.deepcopy(model), None, num_clients, "cpu", **cfg.fed.args)
+    for _ in range(2):
+        batch.set_weights(renormalize_weights(weights, participants))
+        batch.update(
+            [local_states, absent_states(batch.model.state_dict(), participants, num_clients)]
+        )
+
+        streaming.set_weights(weights)
+        streaming.begin_update()
+        for c in participants:
+            streaming.accumulate(c, local_states[c])
+        assert streaming.end_update()
+
+        for name, tensor in batch.model.state_dict().items():
+            assert torch.allclose(streaming.model.state_dict()[name], tensor, atol=1e-6)
+        assert abs(streaming.prim_res - batch.prim_res) < 1e-4